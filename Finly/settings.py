@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -38,6 +39,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    # Indeksy GIN i rozszerzenie pg_trgm wyszukiwania (search.py)
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -48,7 +51,12 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication'
-    )
+    ),
+    # orjson gdy jest zainstalowany, inaczej zwykły JSONRenderer; widok może nadpisać renderer_classes
+    'DEFAULT_RENDERER_CLASSES': (
+        'Finly_API.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 
@@ -61,6 +69,7 @@ SIMPLE_JWT = {
 
 
 MIDDLEWARE = [
+    'Finly_API.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -99,17 +108,41 @@ WSGI_APPLICATION = 'Finly.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Połączenie z bazą z DB_* (docker-compose). Domyślnie połączenia trwałe (DB_CONN_MAX_AGE sekund)
+# ze sprawdzaniem przed ponownym użyciem. DB_POOL=1 włącza pulę psycopg (wymaga psycopg[pool]);
+# pula wyklucza CONN_MAX_AGE, więc wtedy połączenie wraca do puli po każdym żądaniu.
+# DB_STATEMENT_TIMEOUT (ms, domyślnie 0 = bez limitu) przerywa zbyt długie zapytania po stronie PostgreSQL.
+# Ustawiamy go tylko procesom WWW: migracje i komendy wsadowe (rebuild_rollups, load_fx_rates...)
+# mogą legalnie trwać dłużej i nie powinny być przerywane w połowie.
+
+DB_POOL = os.environ.get('DB_POOL', '') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'finly_db',
-        'USER': 'postgres',
-        'PASSWORD': '***',
-        'HOST': 'localhost',
-        'PORT': '5432'
+        'NAME': os.environ.get('DB_NAME', 'finly_db'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', '***'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            'options': f"-c statement_timeout={int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))}",
+        },
     }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        # Sekundy oczekiwania na wolne połączenie, potem błąd zamiast wiszącego żądania
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -151,3 +184,63 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Asynchroniczny eksport PDF
+# Domyślnie zadania renderuje osobny proces `manage.py process_export_jobs --loop`;
+# EXPORT_WORKERS > 0 renderuje je w wątkach procesu WWW (rysowanie PDF trzyma GIL)
+
+EXPORT_ROOT = BASE_DIR / 'exports'
+
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 0))
+
+# Zadanie "running" dłużej niż tyle sekund uznajemy za przerwane (np. restart workera)
+EXPORT_JOB_TIMEOUT = 15 * 60
+
+# Gotowe pliki PDF są usuwane po tylu sekundach
+EXPORT_RETENTION = 7 * 24 * 60 * 60
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND: locmem (domyślnie), file lub redis
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'finly'),
+    }
+}
+
+ANALYTICS_CACHE_ALIAS = 'default'
+
+ANALYTICS_CACHE_TIMEOUT = 60 * 60
+
+
+# Progi (procent kwoty budżetu), po których przekroczeniu zapisujemy BudgetAlert
+
+BUDGET_ALERT_THRESHOLDS = (80, 100)
+
+
+# Waluta bazowa: kursy w FxRate to wartość jednostki waluty w BASE_CURRENCY (load_fx_rates).
+# Nowe wiersze dostają ją jako domyślną walutę; istniejące zachowują swoją (migracja 0011 oznaczyła je PLN).
+# Zmiana waluty bazowej przy istniejących danych wymaga migracji danych: przeliczenia FxRate na nową
+# bazę i załadowania kursów dawnej waluty bazowej (albo przewalutowania wierszy).
+
+BASE_CURRENCY = os.environ.get('BASE_CURRENCY', 'PLN')
+
+# Ile kursów (waluta, dzień) trzyma w pamięci każdy proces
+FX_RATE_CACHE_SIZE = 4096
+
+
+# Pomiary zapytań: REQUEST_METRICS=1 włącza nagłówek Server-Timing i statystyki pod /api/request-metrics/
+# Percentyle liczone z ostatnich REQUEST_METRICS_WINDOW żądań każdego widoku
+
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', '') == '1'
+
+REQUEST_METRICS_WINDOW = 1000
@@ -1,8 +1,13 @@
 from django.contrib import admin
-from .models import Transaction, Category, Budget
+from .models import Transaction, Category, Budget, MonthlyRollup, ExportJob, RecurringRule, BudgetAlert, FxRate
 
 # Register your models here.
 
 admin.site.register(Transaction)
 admin.site.register(Category)
-admin.site.register(Budget)
\ No newline at end of file
+admin.site.register(Budget)
+admin.site.register(MonthlyRollup)
+admin.site.register(ExportJob)
+admin.site.register(RecurringRule)
+admin.site.register(BudgetAlert)
+admin.site.register(FxRate)
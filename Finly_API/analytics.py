@@ -0,0 +1,478 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db.models import (
+    BigIntegerField, Case, DecimalField, ExpressionWrapper, F, Func, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, NullIf, Round, TruncDay, TruncMonth, TruncWeek, TruncYear
+from django.db.models.lookups import Exact
+
+from .currency import AMOUNT_FIELD, converted_amount, converted_sql
+from .models import MonthlyRollup, Transaction
+from .rollups import month_start, next_month
+
+MAX_SERIES_BUCKETS = 10000
+
+
+class TransactionFilters:
+    """The start_date/end_date/category/month/type query parameters of StatisticsView.
+
+    Raises ValueError with the message the views return as {"error": ...}.
+    """
+    PARAMS = ('start_date', 'end_date', 'category', 'month', 'type')
+
+    def __init__(self, params):
+        self.params = {name: params[name] for name in self.PARAMS if params.get(name)}
+        try:
+            self.start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date() if params.get('start_date') else None
+            self.end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date() if params.get('end_date') else None
+        except ValueError:
+            raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+        self.category = params.get('category')
+        self.month = None
+        if params.get('month'):
+            try:
+                year, month = map(int, params['month'].split('-'))
+            except ValueError:
+                raise ValueError("Invalid month format. Use YYYY-MM")
+            self.month = (year, month)
+        self.type = params.get('type') if params.get('type') in ['income', 'expense'] else None
+
+    @property
+    def has_dates(self):
+        # Filtry dzienne wymagają surowych transakcji
+        return bool(self.start_date or self.end_date)
+
+    def apply(self, transactions, dates=True):
+        if dates and self.start_date:
+            transactions = transactions.filter(date__gte=self.start_date)
+        if dates and self.end_date:
+            transactions = transactions.filter(date__lte=self.end_date)
+        if self.category:
+            transactions = transactions.filter(category__name=self.category)
+        if self.month:
+            transactions = transactions.filter(date__year=self.month[0], date__month=self.month[1])
+        if self.type:
+            transactions = transactions.filter(type=self.type)
+        return transactions
+
+    def apply_to_rollups(self, rollups):
+        if self.category:
+            rollups = rollups.filter(category__name=self.category)
+        if self.month:
+            rollups = rollups.filter(month__year=self.month[0], month__month=self.month[1])
+        if self.type:
+            rollups = rollups.filter(type=self.type)
+        return rollups
+
+
+def _total(value):
+    # Sum() zwraca None dla pustego zbioru, widok zawsze zwracał wtedy 0
+    return value or 0
+
+
+def _add(current, value):
+    # Odpowiednik "0 + amount" z poprzedniej pętli po transakcjach
+    return current if value is None else current + value
+
+
+def _statistics_queries(transactions, today=None, currency=None):
+    today = today or date.today()
+    last_30_days = today - timedelta(days=30)
+    amount = converted_amount(currency or settings.BASE_CURRENCY)
+
+    per_category = (
+        transactions.order_by()
+        .values('category_id', 'category__name', 'category__icon')
+        .annotate(
+            income=Sum(amount, filter=Q(type='income')),
+            expense=Sum(amount, filter=Q(type='expense')),
+            recent_income=Sum(amount, filter=Q(type='income', date__gte=last_30_days)),
+            recent_expense=Sum(amount, filter=Q(type='expense', date__gte=last_30_days)),
+        )
+        .order_by('category_id')
+    )
+    per_month = (
+        transactions.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('month')
+        .annotate(
+            income=Sum(amount, filter=Q(type='income')),
+            expense=Sum(amount, filter=Q(type='expense')),
+        )
+        .order_by('-month')
+    )
+    return per_category, per_month
+
+
+def build_statistics(transactions, today=None, currency=None):
+    """Build the StatisticsView payload from an already filtered queryset.
+
+    Runs two grouped queries (per category and per month) and never loads
+    Transaction instances. Amounts are converted to `currency` (the base
+    currency by default) inside those queries. Same-named categories are
+    merged under the icon of the oldest one (lowest id), also used for
+    most_expense_category.
+    """
+    per_category, per_month = _statistics_queries(transactions, today, currency)
+    return _build_payload(per_category, per_month)
+
+
+async def abuild_statistics(transactions, today=None, currency=None):
+    """Async build_statistics.
+
+    The two queries are awaited one after the other: the async ORM runs them
+    on the request's single database thread, so gathering them would not
+    overlap them.
+    """
+    per_category, per_month = _statistics_queries(transactions, today, currency)
+    return _build_payload(await _alist(per_category), await _alist(per_month))
+
+
+def _recent_aggregates(today=None, currency=None):
+    today = today or date.today()
+    amount = converted_amount(currency or settings.BASE_CURRENCY)
+    return {
+        'recent_income': Sum(amount, filter=Q(type='income', date__gte=today - timedelta(days=30))),
+        'recent_expense': Sum(amount, filter=Q(type='expense', date__gte=today - timedelta(days=30))),
+    }
+
+
+class RollupTotal(Func):
+    """MonthlyRollup.total converted to `to`, see rollup_total()."""
+    output_field = AMOUNT_FIELD
+
+    def __init__(self, to, **extra):
+        super().__init__(
+            to, F('currency'), F('total'), F('user_id'), F('type'), F('category_id'), F('month'), **extra,
+        )
+
+    def as_sql(self, compiler, connection, month_end="CAST({} + INTERVAL '1' MONTH AS DATE)", **extra_context):
+        to, currency, total, user, type, category, month = map(compiler.compile, self.get_source_expressions())
+        qn = connection.ops.quote_name
+        # Własny alias, żeby nie zasłonić tabeli transakcji z zewnętrznego zapytania
+        column = lambda name: f'rollup_tx.{qn(name)}'
+        amount = converted_sql(
+            connection, (column('amount'), ()), (column('currency'), ()), to, (column('date'), ()),
+        )
+        # Zakres [month, następny miesiąc) czyta z indeksu tylko dni tego miesiąca
+        sql = (
+            f'CASE WHEN {currency[0]} = {to[0]} THEN {total[0]} ELSE ('
+            f'SELECT SUM({amount[0]}) FROM {qn(Transaction._meta.db_table)} rollup_tx '
+            f'WHERE {column("user_id")} = {user[0]} AND {column("type")} = {type[0]} '
+            f'AND {column("currency")} = {currency[0]} '
+            f'AND ({column("category_id")} = {category[0]} OR ({column("category_id")} IS NULL AND {category[0]} IS NULL)) '
+            f'AND {column("date")} >= {month[0]} AND {column("date")} < {month_end.format(month[0])}) END'
+        )
+        params = (
+            *currency[1], *to[1], *total[1],
+            *amount[1], *user[1], *type[1], *currency[1],
+            *category[1], *category[1], *month[1], *month[1],
+        )
+        return sql, params
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, month_end="date({}, '+1 month')", **extra_context)
+
+
+def rollup_total(to):
+    """MonthlyRollup.total in currency `to` (a code or an expression).
+
+    Rows in another currency are summed again from their transactions,
+    converted at each transaction's own date, so the result matches the raw
+    transactions path; rows already in `to` cost nothing extra. The lookup is
+    written as SQL (like currency.converted_sql): as an ORM subquery it took several
+    times longer to compile than to run.
+    """
+    return RollupTotal(Value(to) if isinstance(to, str) else to)
+
+
+class Share(Func):
+    """Percentage of a grouped value in the total of all groups: 100 * x / SUM(x) OVER ().
+
+    Written by hand because Window() refuses an aggregate of an aggregate
+    annotation, which is exactly what a share of grouped sums is.
+    """
+    output_field = AMOUNT_FIELD
+    contains_over_clause = True
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.get_source_expressions()[0])
+        return f'ROUND(100 * {sql} / NULLIF(SUM({sql}) OVER (), 0), 2)', (*params, *params)
+
+
+def average(total, count):
+    """total / count rounded to cents, NULL for groups without transactions."""
+    return Round(ExpressionWrapper(total / NullIf(count, 0), output_field=AMOUNT_FIELD), 2, output_field=AMOUNT_FIELD)
+
+
+def _rollup_rows(rollups, currency=None):
+    total = rollup_total(currency or settings.BASE_CURRENCY)
+    return (
+        rollups.order_by()
+        .values('category_id', 'category__name', 'category__icon', 'month')
+        .annotate(
+            income=Sum(total, filter=Q(type='income')),
+            expense=Sum(total, filter=Q(type='expense')),
+        )
+    )
+
+
+def build_rollup_statistics(rollups, transactions, today=None, currency=None):
+    """Same payload as build_statistics, read from MonthlyRollup rows.
+
+    Only the last 30 days block needs day precision, so it is the one query
+    that still touches the (filtered) transactions.
+    """
+    recent = transactions.order_by().aggregate(**_recent_aggregates(today, currency))
+    return _combine_rollup_rows(_rollup_rows(rollups, currency), recent)
+
+
+async def abuild_rollup_statistics(rollups, transactions, today=None, currency=None):
+    """Async build_rollup_statistics; like abuild_statistics the queries run one after the other."""
+    rows = await _alist(_rollup_rows(rollups, currency))
+    recent = await transactions.order_by().aaggregate(**_recent_aggregates(today, currency))
+    return _combine_rollup_rows(rows, recent)
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def _combine_rollup_rows(rows, recent):
+    per_category = {}
+    per_month = {}
+    for row in rows:
+        category = per_category.setdefault(row['category_id'], {
+            'category_id': row['category_id'],
+            'category__name': row['category__name'],
+            'category__icon': row['category__icon'],
+            'income': None,
+            'expense': None,
+        })
+        month = per_month.setdefault(row['month'], {'month': row['month'], 'income': None, 'expense': None})
+        for key in ('income', 'expense'):
+            if row[key] is not None:
+                category[key] = _add(category[key] or 0, row[key])
+                month[key] = _add(month[key] or 0, row[key])
+
+    per_category = [per_category[key] for key in sorted(per_category, key=lambda pk: (pk is not None, pk))]
+    per_month = [per_month[key] for key in sorted(per_month, reverse=True)]
+    return _build_payload(per_category, per_month, recent)
+
+
+def _build_payload(per_category, per_month, recent=None):
+    totals = defaultdict(lambda: None)
+    if recent is not None:
+        totals.update(recent)
+    category_data = defaultdict(lambda: {'income': 0, 'expense': 0, 'icon': ''})
+    expense_by_name = defaultdict(lambda: None)
+    icon_by_name = {}
+
+    for row in per_category:
+        for key in ('income', 'expense', 'recent_income', 'recent_expense'):
+            if row.get(key) is not None:
+                totals[key] = _add(totals[key] or 0, row[key])
+
+        name = row['category__name']
+        if row['expense'] is not None:
+            expense_by_name[name] = _add(expense_by_name[name] or 0, row['expense'])
+        if row['category_id'] is None:
+            continue
+
+        # Kategorie o tej samej nazwie są łączone, ikona z najstarszej kategorii (najmniejsze id).
+        # Dawna pętla brała ikonę kategorii najstarszej transakcji; to samo id co w most_expense_category
+        icon_by_name.setdefault(name, row['category__icon'])
+        category_data[name]['icon'] = icon_by_name[name]
+        category_data[name]['income'] = _add(category_data[name]['income'], row['income'])
+        category_data[name]['expense'] = _add(category_data[name]['expense'], row['expense'])
+
+    monthly_data = defaultdict(lambda: {'income': 0, 'expense': 0})
+    for row in per_month:
+        key = row['month'].strftime('%Y-%m')
+        monthly_data[key]['income'] = _add(monthly_data[key]['income'], row['income'])
+        monthly_data[key]['expense'] = _add(monthly_data[key]['expense'], row['expense'])
+
+    total_income = _total(totals['income'])
+    total_expense = _total(totals['expense'])
+
+    most_expense_category = None
+    most_expense_category_amount = 0
+    if expense_by_name:
+        most_expense_category = max(expense_by_name, key=lambda name: expense_by_name[name])
+        most_expense_category_amount = _total(expense_by_name[most_expense_category])
+
+    return {
+        "balance": total_income - total_expense,
+        "last_30_days": {
+            "income": _total(totals['recent_income']),
+            "expense": _total(totals['recent_expense'])
+        },
+        "by_category": dict(category_data),
+        "most_expense_category": {
+            "name": most_expense_category,
+            "amount": most_expense_category_amount,
+            "icon": icon_by_name.get(most_expense_category) if most_expense_category else None
+        },
+        "monthly": dict(monthly_data)
+    }
+
+
+SERIES_INTERVALS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'year': TruncYear,
+}
+
+
+def bucket_start(value, interval):
+    if interval == 'day':
+        return value
+    if interval == 'week':
+        return value - timedelta(days=value.weekday())
+    if interval == 'month':
+        return month_start(value)
+    return value.replace(month=1, day=1)
+
+
+def next_bucket(value, interval):
+    if interval == 'day':
+        return value + timedelta(days=1)
+    if interval == 'week':
+        return value + timedelta(days=7)
+    if interval == 'month':
+        return next_month(value)
+    return value.replace(year=value.year + 1)
+
+
+def build_time_series(user, filters, interval, fill=False, currency=None):
+    """Income, expense, net and running balance per day/week/month/year bucket.
+
+    `filters` is a TransactionFilters. Months and years are read from
+    MonthlyRollup unless day precision filters are used. Amounts are
+    converted to `currency` (the base currency by default) like in
+    build_statistics. With a start_date the running balance starts from the
+    balance before it. Raises ValueError when gap-filling would produce more
+    than MAX_SERIES_BUCKETS buckets.
+    """
+    currency = currency or settings.BASE_CURRENCY
+    transactions = Transaction.objects.filter(user=user)
+    rollups = MonthlyRollup.objects.filter(user=user)
+    trunc = SERIES_INTERVALS[interval]
+    if interval in ('month', 'year') and not filters.has_dates:
+        source, amount = filters.apply_to_rollups(rollups), rollup_total(currency)
+        bucket = trunc('month')
+    else:
+        source, amount = filters.apply(transactions), converted_amount(currency)
+        bucket = trunc('date')
+    rows = (
+        source.order_by()
+        .annotate(bucket=bucket)
+        .values('bucket')
+        .annotate(
+            income=Sum(amount, filter=Q(type='income')),
+            expense=Sum(amount, filter=Q(type='expense')),
+        )
+        .order_by('bucket')
+    )
+    totals = {row['bucket']: (_total(row['income']), _total(row['expense'])) for row in rows}
+
+    opening_balance = 0
+    if filters.start_date:
+        opening_balance = _balance_before(transactions, rollups, filters, currency)
+
+    buckets = list(totals)
+    if fill and (totals or filters.has_dates):
+        first = bucket_start(filters.start_date or min(totals, default=filters.end_date), interval)
+        last = bucket_start(filters.end_date or max(totals, default=filters.start_date), interval)
+        buckets = []
+        current = first
+        while current <= last:
+            if len(buckets) >= MAX_SERIES_BUCKETS:
+                raise ValueError("Too many buckets. Use a shorter date range or a longer interval.")
+            buckets.append(current)
+            current = next_bucket(current, interval)
+
+    series = []
+    balance = opening_balance
+    for key in buckets:
+        income, expense = totals.get(key, (0, 0))
+        balance += income - expense
+        series.append({
+            "period": key.isoformat(),
+            "income": income,
+            "expense": expense,
+            "net": income - expense,
+            "balance": balance,
+        })
+    return {
+        "interval": interval,
+        "opening_balance": opening_balance,
+        "series": series,
+    }
+
+
+def _balance_before(transactions, rollups, filters, currency):
+    """Balance of the filtered transactions before filters.start_date, in `currency`.
+
+    Whole months are read from MonthlyRollup and only the days of the start
+    month from raw transactions, instead of a sum over the whole history.
+    """
+    month = month_start(filters.start_date)
+    total, amount = rollup_total(currency), converted_amount(currency)
+    before = filters.apply_to_rollups(rollups).filter(month__lt=month).aggregate(
+        income=Sum(total, filter=Q(type='income')),
+        expense=Sum(total, filter=Q(type='expense')),
+    )
+    in_month = filters.apply(transactions, dates=False).filter(date__gte=month, date__lt=filters.start_date).aggregate(
+        income=Sum(amount, filter=Q(type='income')),
+        expense=Sum(amount, filter=Q(type='expense')),
+    )
+    return sum(_total(totals['income']) - _total(totals['expense']) for totals in (before, in_month))
+
+
+def _same_category(outer_field='category'):
+    # NULL = NULL nie jest prawdą w SQL, a budżet bez kategorii liczy wydatki bez kategorii
+    return Exact(
+        Coalesce('category', Value(0), output_field=BigIntegerField()),
+        Coalesce(OuterRef(outer_field), Value(0), output_field=BigIntegerField()),
+    )
+
+
+def annotate_budget_spent(budgets):
+    """Annotate each budget with `computed_spent` using correlated subqueries (one SQL query).
+
+    Budgets starting on the first day of a month read MonthlyRollup; others
+    fall back to summing expenses from budget.month to the end of that month.
+    Expenses are converted to the budget's currency.
+    """
+    rollup_spent = (
+        MonthlyRollup.objects.filter(_same_category(), user=OuterRef('user'), type='expense', month=OuterRef('month'))
+        .order_by()
+        .values('user')
+        .annotate(spent=Sum(rollup_total(OuterRef('currency'))))
+        .values('spent')
+    )
+    transaction_spent = (
+        Transaction.objects.annotate(budget_month=TruncMonth('date'))
+        .filter(
+            _same_category(),
+            user=OuterRef('user'),
+            type='expense',
+            date__gte=OuterRef('month'),
+            budget_month=OuterRef('budget_month'),
+        )
+        .order_by()
+        .values('user')
+        .annotate(spent=Sum(converted_amount(OuterRef('currency'))))
+        .values('spent')
+    )
+    return budgets.annotate(budget_month=TruncMonth('month')).annotate(
+        computed_spent=Case(
+            When(month__day=1, then=Subquery(rollup_spent)),
+            default=Subquery(transaction_spent),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+    )
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class FinlyApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Finly_API'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .pdf import register_fonts
+
+        # Czcionki rejestrujemy raz na proces, a nie przy każdym eksporcie
+        register_fonts()
@@ -0,0 +1,130 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views import View
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .analytics import TransactionFilters, abuild_statistics, abuild_rollup_statistics
+from .cache import _count, conditional_funcs, get_cache, response_cache_key
+from .currency import check_currency, reporting_currency
+from .models import Transaction, MonthlyRollup, Budget
+from .renderers import FastJSONRenderer
+from .views import CategoryListParams, category_totals, category_list_payload, filter_budgets, budgets_in_currency, budget_summary_item
+
+
+class AsyncAnalyticsView(View):
+    """Base for the async (ASGI) variants of the analytics views.
+
+    Authentication, the per-user response cache and ETag/Last-Modified work
+    like the DRF views and share their cache entries (same namespace), so the
+    sync and async endpoints return the same bytes. Subclasses implement
+    `aget_data(request)` and raise ValueError for a 400 response.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    cache_namespace = None
+    conditional = True
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            # Uwierzytelnianie DRF jest synchroniczne (sesja, JWT)
+            request = await sync_to_async(self.authenticate)(request)
+        except APIException as exc:
+            # Jak w DRF: 401 z nagłówkiem WWW-Authenticate pierwszego uwierzytelniacza
+            headers = {}
+            authenticate_header = self.authentication_classes[0]().authenticate_header(request)
+            if authenticate_header:
+                headers['WWW-Authenticate'] = authenticate_header
+            return self.render({'detail': exc.detail}, status=exc.status_code, headers=headers)
+
+        etag = last_modified = None
+        if self.conditional:
+            etag_func, last_modified_func = conditional_funcs(self.cache_namespace)
+            etag, last_modified = await sync_to_async(
+                lambda: (etag_func(request), last_modified_func(request))
+            )()
+            last_modified = int(last_modified.timestamp())
+            etag = quote_etag(etag)
+            response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+
+        response = await self.cached_response(request)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        return response
+
+    def authenticate(self, request):
+        request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        if not request.user or not request.user.is_authenticated:
+            raise NotAuthenticated()
+        return request
+
+    async def cached_response(self, request):
+        cache = get_cache()
+        key = await sync_to_async(response_cache_key)(self.cache_namespace, request)
+        data = await cache.aget(key)
+        if data is not None:
+            _count(f'{self.cache_namespace}.hit')
+            return self.render(data, headers={'X-Cache': 'HIT'})
+
+        _count(f'{self.cache_namespace}.miss')
+        try:
+            data = await self.aget_data(request)
+        except ValueError as e:
+            return self.render({"error": str(e)}, status=400, headers={'X-Cache': 'MISS'})
+        await cache.aset(key, data, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+        return self.render(data, headers={'X-Cache': 'MISS'})
+
+    async def aget_data(self, request):
+        raise NotImplementedError
+
+    @staticmethod
+    def render(data, status=200, headers=None):
+        renderer = FastJSONRenderer()
+        return HttpResponse(renderer.render(data), status=status, headers=headers, content_type=renderer.media_type)
+
+
+class AsyncStatisticsView(AsyncAnalyticsView):
+    cache_namespace = 'statistics'
+
+    async def aget_data(self, request):
+        filters = TransactionFilters(request.query_params)
+        currency = await sync_to_async(reporting_currency)(request.query_params)
+        transactions = filters.apply(Transaction.objects.filter(user=request.user))
+        rollups = filters.apply_to_rollups(MonthlyRollup.objects.filter(user=request.user))
+
+        # Filtry dzienne wymagają surowych transakcji, pozostałe czytamy z rollupu
+        if filters.has_dates:
+            return await abuild_statistics(transactions, currency=currency)
+        return await abuild_rollup_statistics(rollups, transactions, currency=currency)
+
+
+class AsyncCategoryListView(AsyncAnalyticsView):
+    cache_namespace = 'category-list'
+
+    async def aget_data(self, request):
+        params = CategoryListParams(request.query_params)
+        currency = await sync_to_async(reporting_currency)(request.query_params)
+        rows = [row async for row in category_totals(request.user, currency, params)]
+        return category_list_payload(rows, params)
+
+
+class AsyncBudgetSummaryView(AsyncAnalyticsView):
+    cache_namespace = 'budget-summary'
+    conditional = False
+
+    async def aget_data(self, request):
+        budgets = Budget.objects.filter(user=request.user).select_related('category')
+        try:
+            budgets = filter_budgets(budgets, request.query_params)
+        except ValueError:
+            raise ValueError("Invalid month format. Use YYYY-MM")
+        currency = request.query_params.get('currency')
+        currency = await sync_to_async(check_currency)(currency) if currency else None
+        budgets = budgets_in_currency(budgets, currency)
+        return [budget_summary_item(budget) async for budget in budgets]
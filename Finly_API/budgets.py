@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Sum
+
+from .analytics import annotate_budget_spent
+from .currency import convert, converted_amount
+from .models import Budget, BudgetAlert, Transaction
+from .rollups import month_start, next_month
+
+ZERO = Decimal('0.00')
+
+
+def covering_budgets(user_id, category_id, day):
+    """Budgets counting an expense of `day`: same category and month, starting on or before it."""
+    return Budget.objects.filter(user_id=user_id, category_id=category_id, month__gte=month_start(day), month__lte=day)
+
+
+def _apply(values, sign):
+    if values['type'] != 'expense':
+        return
+    amount = Decimal(values['amount'])
+    budgets = covering_budgets(values['user_id'], values['category_id'], values['date'])
+    for budget_currency in set(budgets.values_list('currency', flat=True)):
+        # Jedno UPDATE na walutę; zwykle jeden budżet na kategorię i miesiąc
+        change = convert(amount, values['currency'], budget_currency, values['date'])
+        in_currency = budgets.filter(currency=budget_currency)
+        if in_currency.update(spent=F('spent') + change * sign) and sign > 0:
+            record_alerts(in_currency, change)
+
+
+def add_transaction(values):
+    _apply(values, 1)
+
+
+def remove_transaction(values):
+    _apply(values, -1)
+
+
+def crossed_thresholds(amount, before, after):
+    return [
+        threshold for threshold in settings.BUDGET_ALERT_THRESHOLDS
+        if before < amount * threshold / 100 <= after
+    ]
+
+
+def _alerts(budget_id, user_id, amount, before, after):
+    return [
+        BudgetAlert(budget_id=budget_id, user_id=user_id, threshold=threshold, amount=amount, spent=after)
+        for threshold in crossed_thresholds(amount, before, after)
+    ]
+
+
+def record_alerts(budgets, increase):
+    """Record the thresholds the budgets crossed when their spend grew by `increase`."""
+    alerts = []
+    for budget_id, user_id, amount, spent in budgets.values_list('pk', 'user_id', 'amount', 'spent'):
+        alerts.extend(_alerts(budget_id, user_id, amount, spent - increase, spent))
+    # Każdy próg raz na budżet (unique_budget_alert)
+    BudgetAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+
+
+def compute_spent(budget):
+    return Transaction.objects.filter(
+        user_id=budget.user_id, category_id=budget.category_id, type='expense',
+        date__gte=budget.month, date__lt=next_month(month_start(budget.month)),
+    ).aggregate(total=Sum(converted_amount(budget.currency)))['total'] or ZERO
+
+
+def sync_alerts(budget):
+    """Alerts for every threshold the (new or edited) budget has already reached."""
+    BudgetAlert.objects.bulk_create(
+        _alerts(budget.pk, budget.user_id, budget.amount, ZERO, budget.spent), ignore_conflicts=True,
+    )
+
+
+def budgets_between(start, end, **filters):
+    return Budget.objects.filter(month__gte=month_start(start), month__lt=next_month(end), **filters)
+
+
+def refresh_budgets(budgets):
+    """Recompute the stored spend from transactions after bulk writes that skip the signals.
+
+    Runs after the rollup is up to date (first-of-month budgets read it) and
+    records the thresholds crossed by increases. Returns the number of
+    budgets that changed.
+    """
+    changed = []
+    alerts = []
+    for budget in annotate_budget_spent(budgets.order_by()).only('user', 'amount', 'spent'):
+        computed = budget.computed_spent or ZERO
+        if computed != budget.spent:
+            alerts.extend(_alerts(budget.pk, budget.user_id, budget.amount, budget.spent, computed))
+            budget.spent = computed
+            changed.append(budget)
+    Budget.objects.bulk_update(changed, ['spent'], batch_size=1000)
+    BudgetAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+    return len(changed)
+
+
+def verify_budgets(user=None):
+    """Return (budget_id, expected, stored) for budgets whose stored spend is out of date."""
+    budgets = Budget.objects.all() if user is None else Budget.objects.filter(user=user)
+    return [
+        (budget.pk, budget.computed_spent or ZERO, budget.spent)
+        for budget in annotate_budget_spent(budgets.order_by('pk'))
+        if (budget.computed_spent or ZERO) != budget.spent
+    ]
@@ -0,0 +1,61 @@
+from django.db import transaction as db_transaction
+from django.db.models import Max, Min
+
+from . import budgets, rollups
+from .cache import bump_user_version, lock_user_data
+
+
+def date_range(transactions):
+    """(first, last) date of the matched transactions, (None, None) when nothing matches."""
+    dates = transactions.order_by().aggregate(first=Min('date'), last=Max('date'))
+    return dates['first'], dates['last']
+
+
+def raw_delete(transactions):
+    """DELETE the matched transactions without the deletion collector and per-row signals.
+
+    QuerySet._raw_delete is private Django API: it skips CASCADE/SET_NULL
+    handling, so it is safe only while no model references Transaction.
+    Adding such a foreign key makes this fail loudly instead of leaving
+    dangling rows.
+    """
+    related = [relation.related_model.__name__ for relation in transactions.model._meta.related_objects]
+    if related:
+        raise RuntimeError(f"Raw delete of {transactions.model.__name__} would skip rows of {', '.join(related)}.")
+    return transactions._raw_delete(transactions.db)
+
+
+def update_transactions(user, transactions, patch):
+    """Apply `patch` (category, type, description) in one UPDATE and fix the derived data.
+
+    `transactions` must already be limited to `user`; bulk writes skip the
+    signals, so the rollup and budget spend of the touched months are rebuilt.
+    """
+    with db_transaction.atomic():
+        lock_user_data(user.pk)
+        first, last = date_range(transactions)
+        updated = transactions.update(**patch)
+        if not updated:
+            return 0
+
+        if 'category' in patch or 'type' in patch:
+            rollups.rebuild_rollup(user, start=first, end=last)
+            budgets.refresh_budgets(budgets.budgets_between(first, last, user=user))
+        bump_user_version(user.pk)
+    return updated
+
+
+def delete_transactions(user, transactions):
+    """Delete the matched transactions in one DELETE and fix the derived data."""
+    with db_transaction.atomic():
+        lock_user_data(user.pk)
+        first, last = date_range(transactions)
+        # QuerySet.delete() wysyłałby sygnały dla każdego wiersza osobno
+        deleted = raw_delete(transactions)
+        if not deleted:
+            return 0
+
+        rollups.rebuild_rollup(user, start=first, end=last)
+        budgets.refresh_budgets(budgets.budgets_between(first, last, user=user))
+        bump_user_version(user.pk)
+    return deleted
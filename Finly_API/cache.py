@@ -0,0 +1,149 @@
+import hashlib
+import threading
+from collections import Counter
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+from django.utils.timezone import now
+from django.views.decorators.http import condition
+from rest_framework.response import Response
+
+from .models import DataVersion
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.ANALYTICS_CACHE_ALIAS]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def get_user_state(user_id):
+    """(version, modified) of the user's data; (0, None) before the first change."""
+    return DataVersion.objects.filter(user_id=user_id).values_list('version', 'modified').first() or (0, None)
+
+
+def _request_state(request):
+    # Jeden odczyt na żądanie, wspólny dla klucza cache'u, ETagu i Last-Modified
+    state = getattr(request, '_finly_data_version', None)
+    if state is None:
+        state = request._finly_data_version = get_user_state(request.user.pk)
+    return state
+
+
+def bump_user_version(user_id, create=True):
+    """Increment the user's data version within the current transaction.
+
+    The version lives in the database, so every process sees the bump, and
+    it becomes visible only when the data change commits: a concurrent read
+    cannot cache pre-commit data under the new version. create=False
+    (deletions) never creates the row; it is missing then only while the
+    user is being deleted.
+    """
+    versions = DataVersion.objects.filter(user_id=user_id)
+    modified = now().replace(microsecond=0)
+    if versions.update(version=F('version') + 1, modified=modified) or not create:
+        return
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(user_id=user_id, version=1, modified=modified)
+    except IntegrityError:
+        # Równoległe żądanie utworzyło wiersz pierwsze
+        versions.update(version=F('version') + 1, modified=modified)
+
+
+def lock_user_data(user_id):
+    """Lock the user's DataVersion row, so writes of the user's derived data run one at a time."""
+    list(DataVersion.objects.select_for_update().filter(user_id=user_id).values_list('pk', flat=True))
+
+
+def _params_digest(request):
+    params = urlencode(sorted((key, sorted(values)) for key, values in request.query_params.lists()), doseq=True)
+    return hashlib.md5(params.encode('utf-8')).hexdigest()
+
+
+def response_cache_key(namespace, request):
+    digest = _params_digest(request)
+    version, _ = _request_state(request)
+    # Data w kluczu, bo "ostatnie 30 dni" zmienia się o północy
+    return f'finly:{namespace}:{request.user.pk}:{version}:{date.today():%Y%m%d}:{digest}'
+
+
+def cache_per_user(namespace):
+    """Cache a successful GET response per user, query string and data version."""
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            cache = get_cache()
+            key = response_cache_key(namespace, request)
+            data = cache.get(key)
+            if data is not None:
+                _count(f'{namespace}.hit')
+                return Response(data, headers={'X-Cache': 'HIT'})
+
+            _count(f'{namespace}.miss')
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def conditional_funcs(namespace, bypass_params=()):
+    """(etag, last_modified) functions of conditional_per_user, also used by the async views."""
+
+    def etag(request, *args, **kwargs):
+        if any(param in request.query_params for param in bypass_params):
+            return None
+        version, _ = _request_state(request)
+        raw = ':'.join([
+            namespace,
+            str(request.user.pk),
+            str(version),
+            f'{date.today():%Y%m%d}',
+            _params_digest(request),
+            request.META.get('HTTP_ACCEPT', ''),
+        ])
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if any(param in request.query_params for param in bypass_params):
+            return None
+        # Nie starsze niż dzisiejsza północ, bo "ostatnie 30 dni" zmienia się codziennie
+        today = now().replace(hour=0, minute=0, second=0, microsecond=0)
+        _, modified = _request_state(request)
+        return max(modified, today) if modified else today
+
+    return etag, last_modified
+
+
+def conditional_per_user(namespace, bypass_params=()):
+    """ETag / Last-Modified support driven by the per-user data version.
+
+    A matching If-None-Match returns 304 before the view runs, so neither the
+    aggregation nor the serialization happens. Requests carrying any of
+    bypass_params are not conditional (their data is not the user's own).
+    """
+    etag, last_modified = conditional_funcs(namespace, bypass_params)
+    return method_decorator(condition(etag_func=etag, last_modified_func=last_modified))
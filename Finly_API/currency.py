@@ -0,0 +1,188 @@
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db.models import DecimalField, F, Func, Value
+
+from .models import FxRate
+
+CENT = Decimal('0.01')
+ONE = Decimal('1')
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+RATE_FIELD = DecimalField(max_digits=18, decimal_places=8)
+
+
+class RateCache:
+    """Thread-safe LRU of (currency, date) -> rate."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_rates = RateCache(settings.FX_RATE_CACHE_SIZE)
+# Waluty z kursami; kursów się nie usuwa, więc raz znana waluta zostaje znana
+_known_currencies = set()
+
+
+def clear_rate_cache():
+    _rates.clear()
+    _known_currencies.clear()
+
+
+def fill_gaps(rates):
+    """{(currency, date): rate} plus the days between two rates of a currency, at the earlier rate.
+
+    Weekends and holidays then have rows of their own, so lookups for them
+    hit a published day and can be cached.
+    """
+    by_currency = defaultdict(dict)
+    for (currency, day), value in rates.items():
+        by_currency[currency][day] = value
+
+    filled = {}
+    for currency, days in by_currency.items():
+        ordered = sorted(days)
+        for day, next_day in zip(ordered, ordered[1:] + [None]):
+            value = days[day]
+            while day != next_day:
+                filled[(currency, day)] = value
+                if next_day is None:
+                    break
+                day += timedelta(days=1)
+    return filled
+
+
+def store_rates(rates, batch_size=1000):
+    """Insert or replace the rates (see fill_gaps) and drop this process's cached rates."""
+    rows = [FxRate(currency=currency, date=day, rate=value) for (currency, day), value in sorted(fill_gaps(rates).items())]
+    FxRate.objects.bulk_create(
+        rows, batch_size=batch_size, update_conflicts=True, unique_fields=['currency', 'date'], update_fields=['rate'],
+    )
+    clear_rate_cache()
+    return len(rows)
+
+
+def check_currency(code):
+    """Normalized currency code; ValueError when it is not the base currency and has no rates."""
+    code = str(code).strip().upper()
+    if code == settings.BASE_CURRENCY or code in _known_currencies:
+        return code
+    if not FxRate.objects.filter(currency=code).exists():
+        raise ValueError(f"Unknown currency: {code}. Load its exchange rates first.")
+    _known_currencies.add(code)
+    return code
+
+
+def reporting_currency(params):
+    """The ?currency= of the analytics views, settings.BASE_CURRENCY by default."""
+    code = params.get('currency')
+    return check_currency(code) if code else settings.BASE_CURRENCY
+
+
+def rate(currency, day):
+    """Value of one unit of `currency` in the base currency on `day`.
+
+    The latest rate published on or before `day` is used, or the first one
+    for days before it. Only rates published for that exact day are cached:
+    the others change once newer rates are loaded.
+    """
+    if currency == settings.BASE_CURRENCY:
+        return ONE
+    value = _rates.get((currency, day))
+    if value is not None:
+        return value
+
+    rates = FxRate.objects.filter(currency=currency).values_list('date', 'rate')
+    row = rates.filter(date__lte=day).order_by('-date').first() or rates.order_by('date').first()
+    if row is None:
+        raise ValueError(f"Unknown currency: {currency}. Load its exchange rates first.")
+    published, value = row
+    if published == day:
+        _rates.set((currency, day), value)
+    return value
+
+
+def convert(amount, currency, to, day):
+    """`amount` of `currency` in `to` at the rates of `day`, rounded to cents like converted_amount()."""
+    if currency == to:
+        return amount
+    return (amount * rate(currency, day) / rate(to, day)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def rate_sql(connection, currency, day):
+    """SQL counterpart of rate() for already compiled (sql, params) of the currency and the day.
+
+    Written as plain correlated lookups on the (currency, date) index instead
+    of ORM subqueries, which took longer to compile than to run.
+    """
+    (currency_sql, currency_params), (day_sql, day_params) = currency, day
+    qn = connection.ops.quote_name
+    table = qn(FxRate._meta.db_table)
+    column = lambda name: f'{table}.{qn(name)}'
+    rates = f'SELECT {column("rate")} FROM {table} WHERE {column("currency")} = {currency_sql}'
+    sql = (
+        f'CASE WHEN {currency_sql} = %s THEN 1 ELSE COALESCE('
+        f'({rates} AND {column("date")} <= {day_sql} ORDER BY {column("date")} DESC LIMIT 1), '
+        f'({rates} ORDER BY {column("date")} LIMIT 1)) END'
+    )
+    params = (
+        *currency_params, settings.BASE_CURRENCY,
+        *currency_params, *day_params,
+        *currency_params,
+    )
+    return sql, params
+
+
+def converted_sql(connection, amount, currency, to, day):
+    """(sql, params) of ConvertedAmount for already compiled (sql, params) parts."""
+    source_rate = rate_sql(connection, currency, day)
+    target_rate = rate_sql(connection, to, day)
+    sql = (
+        f'CASE WHEN {currency[0]} = {to[0]} THEN {amount[0]} '
+        f'ELSE ROUND({amount[0]} * {source_rate[0]} / {target_rate[0]}, 2) END'
+    )
+    return sql, (*currency[1], *to[1], *amount[1], *amount[1], *source_rate[1], *target_rate[1])
+
+
+class ConvertedAmount(Func):
+    """SQL of converted_amount(); one expression compiles much faster than the equivalent Case/When tree."""
+    output_field = AMOUNT_FIELD
+
+    def __init__(self, amount, currency, to, day, **extra):
+        super().__init__(amount, currency, to, day, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        amount, currency, to, day = map(compiler.compile, self.get_source_expressions())
+        return converted_sql(connection, amount, currency, to, day)
+
+
+def converted_amount(to, amount='amount', currency='currency', day='date'):
+    """`amount` converted to `to` (a currency code or an expression) at the rates of `day`.
+
+    Rows already in `to` are used as they are; the others look their rates
+    up in FxRate (see rate_sql) and are rounded to cents per row, so sums match
+    convert() applied to each transaction.
+    """
+    return ConvertedAmount(F(amount), F(currency), Value(to) if isinstance(to, str) else to, F(day))
@@ -0,0 +1,106 @@
+import csv
+
+from django.conf import settings
+from django.db.models import Sum
+
+from .analytics import TransactionFilters, rollup_total
+from .currency import converted_amount
+from .models import Transaction, MonthlyRollup
+
+CSV_CHUNK_SIZE = 2000
+CSV_DELIMITER = ';'
+CSV_ENCODING = 'utf-8-sig'
+
+
+class Echo:
+    """Pseudo-buffer: csv.writer gets the formatted line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+class ExportData:
+    """Everything the CSV and PDF exports print, shared by both writers.
+
+    The summary (totals and expenses per category) is a single grouped query,
+    read from MonthlyRollup unless start_date/end_date need raw transactions,
+    and converted to `currency`; rows() then streams the transactions once,
+    each in its own currency.
+    """
+
+    def __init__(self, user, filters=None, currency=None):
+        self.user = user
+        self.filters = filters or TransactionFilters({})
+        self.currency = currency or settings.BASE_CURRENCY
+        self.transactions = self.filters.apply(Transaction.objects.filter(user=user))
+
+        if self.filters.has_dates:
+            summary = self.transactions.order_by().values('category__name', 'type').annotate(
+                total=Sum(converted_amount(self.currency)),
+            )
+        else:
+            rollups = self.filters.apply_to_rollups(MonthlyRollup.objects.filter(user=user))
+            summary = rollups.order_by().values('category__name', 'type').annotate(
+                total=Sum(rollup_total(self.currency)),
+            )
+
+        self.total_income = 0
+        self.total_expense = 0
+        self.category_expenses = []
+        for row in summary.order_by('category__name', 'type'):
+            if row['type'] == 'income':
+                self.total_income += row['total']
+            else:
+                self.total_expense += row['total']
+                self.category_expenses.append((row['category__name'], row['total']))
+        self.balance = self.total_income - self.total_expense
+
+    def rows(self, chunk_size=CSV_CHUNK_SIZE):
+        """(date, type, category name, amount, description, currency) in the default transaction order."""
+        return self.transactions.values_list(
+            'date', 'type', 'category__name', 'amount', 'description', 'currency'
+        ).iterator(chunk_size=chunk_size)
+
+
+def csv_header_rows(data):
+    return [
+        # Dodanie podsumowania (w walucie raportu)
+        ['Podsumowanie', data.currency],
+        ['Przychody', f"{data.total_income:.2f}"],
+        ['Wydatki', f"{data.total_expense:.2f}"],
+        ['Bilans', f"{data.balance:.2f}"],
+        [],
+        # Dodanie wydatków na kategorie
+        ['Wydatki na kategorie'],
+        *([name, f"{total:.2f}"] for name, total in data.category_expenses),
+        [],
+        # Dodanie nagłówków i transakcji
+        ['Data', 'Typ', 'Kategoria', 'Kwota', 'Opis', 'Waluta'],
+    ]
+
+
+def csv_lines(data, chunk_size=CSV_CHUNK_SIZE):
+    """Yield the CSV export of an ExportData as encoded chunks of at most chunk_size rows.
+
+    Every line is encoded separately, like HttpResponse.write() did, so the
+    output keeps the utf-8-sig BOM in front of each row byte for byte.
+    """
+    writer = csv.writer(Echo(), delimiter=CSV_DELIMITER)
+
+    yield b''.join(writer.writerow(row).encode(CSV_ENCODING) for row in csv_header_rows(data))
+
+    chunk = []
+    for t_date, t_type, category_name, amount, description, currency in data.rows(chunk_size):
+        chunk.append(writer.writerow([
+            t_date,
+            t_type,
+            category_name or '',
+            f"{amount:.2f}",
+            description or '',
+            currency
+        ]).encode(CSV_ENCODING))
+        if len(chunk) >= chunk_size:
+            yield b''.join(chunk)
+            chunk = []
+    if chunk:
+        yield b''.join(chunk)
@@ -0,0 +1,167 @@
+import codecs
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from rest_framework.parsers import BaseParser
+
+from . import budgets, rollups
+from .cache import bump_user_version
+from .currency import check_currency
+from .exports import CSV_DELIMITER
+from .models import Transaction, Category
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+# Nagłówek tabeli transakcji z ExportCSVView; starsze eksporty nie mają kolumny Waluta
+CSV_HEADER = ['Data', 'Typ', 'Kategoria', 'Kwota', 'Opis', 'Waluta']
+CSV_FIELDS = ['date', 'type', 'category', 'amount', 'description', 'currency']
+LEGACY_CSV_HEADER = CSV_HEADER[:-1]
+
+
+class CSVStreamParser(BaseParser):
+    """Hands the raw body to the view so CSV rows are read lazily, line by line."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
+
+
+def csv_rows(stream):
+    """Yield (line number, row dict) from a CSV in the ExportCSVView layout.
+
+    Everything before the 'Data;Typ;...' header (the export summary) is
+    skipped; a file that starts directly with data rows is accepted too.
+    The export writes a BOM in front of every line, so each one is stripped.
+    """
+    lines = (line.lstrip('\ufeff') for line in codecs.iterdecode(stream, 'utf-8'))
+    reader = csv.reader(lines, delimiter=CSV_DELIMITER)
+
+    started = False
+    for row in reader:
+        if not started:
+            if row in (CSV_HEADER, LEGACY_CSV_HEADER):
+                started = True
+                continue
+            # Wiersze podsumowania mają najwyżej dwie kolumny
+            if len(row) not in (len(CSV_HEADER), len(LEGACY_CSV_HEADER)):
+                continue
+            started = True
+        if row:
+            yield reader.line_num, dict(zip(CSV_FIELDS, row))
+
+
+def json_rows(data):
+    for index, row in enumerate(data, start=1):
+        yield index, row
+
+
+class TransactionImporter:
+    batch_size = IMPORT_BATCH_SIZE
+    fields = {name: Transaction._meta.get_field(name) for name in ('date', 'type', 'amount', 'description')}
+
+    def __init__(self, user):
+        self.user = user
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.first_date = None
+        self.last_date = None
+        # Waluta -> komunikat błędu albo None, sprawdzana raz na import
+        self.currencies = {settings.BASE_CURRENCY: None}
+
+    def run(self, rows):
+        with db_transaction.atomic():
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch)
+            # bulk_create pomija sygnały, więc przeliczamy rollup dla zaimportowanych miesięcy
+            if self.created:
+                rollups.rebuild_rollup(self.user, start=self.first_date, end=self.last_date)
+                budgets.refresh_budgets(budgets.budgets_between(self.first_date, self.last_date, user=self.user))
+                bump_user_version(self.user.pk)
+        return self
+
+    def add_error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def import_batch(self, batch):
+        # Jedno zapytanie o kategorie na całą paczkę (po nazwie lub id)
+        names = {str(row['category']).strip() for _, row in batch
+                 if isinstance(row, dict) and row.get('category') not in (None, '')}
+        ids = [int(name) for name in names if name.isdigit()]
+        categories = {}
+        category_ids = set()
+        for category_id, name in Category.objects.filter(
+                Q(name__in=names) | Q(id__in=ids), user=self.user).values_list('id', 'name'):
+            categories.setdefault(name, category_id)
+            category_ids.add(category_id)
+
+        objects = []
+        for row_number, row in batch:
+            instance = self.build(row_number, row, categories, category_ids)
+            if instance is not None:
+                objects.append(instance)
+
+        Transaction.objects.bulk_create(objects)
+        self.created += len(objects)
+        for instance in objects:
+            self.first_date = min(self.first_date or instance.date, instance.date)
+            self.last_date = max(self.last_date or instance.date, instance.date)
+
+    def build(self, row_number, row, categories, category_ids):
+        if not isinstance(row, dict):
+            self.add_error(row_number, {'non_field_errors': ['Expected an object.']})
+            return None
+
+        values = {}
+        errors = {}
+        for name, field in self.fields.items():
+            raw = row.get(name)
+            if raw is None or (isinstance(raw, str) and not raw.strip()):
+                if name == 'description':
+                    values[name] = ''
+                    continue
+                errors[name] = ['This field is required.']
+                continue
+            try:
+                values[name] = field.clean(raw.strip() if isinstance(raw, str) else raw, None)
+            except ValidationError as exc:
+                errors[name] = exc.messages
+
+        category = row.get('category')
+        if category not in (None, ''):
+            category = str(category).strip()
+            if category in categories:
+                values['category_id'] = categories[category]
+            elif category.isdigit() and int(category) in category_ids:
+                values['category_id'] = int(category)
+            else:
+                errors['category'] = [f"Unknown category: {category}"]
+
+        currency = row.get('currency')
+        if currency not in (None, ''):
+            currency = str(currency).strip().upper()
+            if currency not in self.currencies:
+                try:
+                    check_currency(currency)
+                    self.currencies[currency] = None
+                except ValueError as exc:
+                    self.currencies[currency] = str(exc)
+            if self.currencies[currency]:
+                errors['currency'] = [self.currencies[currency]]
+            else:
+                values['currency'] = currency
+
+        if errors:
+            self.add_error(row_number, errors)
+            return None
+        return Transaction(user=self.user, **values)
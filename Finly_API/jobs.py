@@ -0,0 +1,107 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.timezone import now
+
+from .models import ExportJob
+from .analytics import TransactionFilters
+from .exports import ExportData
+from .pdf import render_summary_pdf
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def export_root():
+    return Path(settings.EXPORT_ROOT)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix='finly-export')
+    return _executor
+
+
+def submit_export_job(job):
+    """Queue the job after the surrounding transaction commits.
+
+    With EXPORT_WORKERS = 0 (the default) jobs stay pending until
+    `manage.py process_export_jobs` picks them up in a separate process, so
+    rendering never competes with API requests for the web process's GIL.
+    """
+    if settings.EXPORT_WORKERS > 0:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_worker, job.pk))
+
+
+def _run_in_worker(job_id):
+    try:
+        run_export_job(job_id)
+    finally:
+        # Wątek puli ma własne połączenia z bazą, zamykamy je po każdym zadaniu
+        connections.close_all()
+
+
+def run_export_job(job_id):
+    # Blokada na wierszu, żeby dwa workery nie wzięły tego samego zadania
+    with transaction.atomic():
+        job = ExportJob.objects.select_for_update(of=('self',)).select_related('user').filter(
+            pk=job_id, status='pending'
+        ).first()
+        if job is None:
+            return
+        job.status = 'running'
+        job.started_at = now()
+        job.save(update_fields=['status', 'started_at'])
+
+    file_name = f"{job.pk}.pdf"
+    path = export_root() / file_name
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as buffer:
+            render_summary_pdf(ExportData(job.user, TransactionFilters(job.filters), job.currency or None), buffer)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job.pk)
+        path.unlink(missing_ok=True)
+        job.status = 'failed'
+        job.error = str(exc)
+    else:
+        job.status = 'done'
+        job.file_name = file_name
+    job.finished_at = now()
+    job.save(update_fields=['status', 'file_name', 'error', 'finished_at'])
+
+
+def fail_stale_jobs():
+    """Mark jobs left 'running' by a worker that died mid-render as failed."""
+    return ExportJob.objects.filter(
+        status='running', started_at__lt=now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT),
+    ).update(status='failed', error="The export worker stopped before the job finished.", finished_at=now())
+
+
+def expire_old_jobs():
+    """Delete the files of jobs finished more than EXPORT_RETENTION seconds ago."""
+    expired = 0
+    jobs = ExportJob.objects.filter(
+        status='done', finished_at__lt=now() - timedelta(seconds=settings.EXPORT_RETENTION),
+    ).values_list('pk', 'file_name')
+    for job_id, file_name in jobs:
+        if file_name:
+            (export_root() / file_name).unlink(missing_ok=True)
+        expired += ExportJob.objects.filter(pk=job_id, status='done').update(status='expired', file_name='')
+    return expired
+
+
+def process_pending_jobs():
+    fail_stale_jobs()
+    expire_old_jobs()
+    processed = 0
+    for job_id in ExportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True):
+        run_export_job(job_id)
+        processed += 1
+    return processed
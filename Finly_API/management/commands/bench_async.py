@@ -0,0 +1,134 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Finly_API.metrics import percentile
+
+ROUTES = [
+    ('statistics', '/api/statistics/', '/api/async/statistics/'),
+    ('category-list', '/api/category-list/', '/api/async/category-list/'),
+    ('budget-summary', '/api/budgets-summary/', '/api/async/budgets-summary/'),
+]
+
+
+class Command(BaseCommand):
+    help = ("Compare the sync analytics views served by a WSGI thread pool with their async variants served "
+            "through the ASGI handler, with the same concurrency and under simulated database latency. "
+            "Use generate_synthetic_data first.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='synthetic_1', help="Username whose data is used.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per route and mode.")
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help="WSGI worker threads and concurrent ASGI requests.")
+        parser.add_argument('--latency', type=float, default=20.0, help="Simulated latency per query in ms.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist, run generate_synthetic_data first.")
+        token = str(RefreshToken.for_user(user).access_token)
+        latency = options['latency'] / 1000
+
+        original_execute = CursorWrapper.execute
+
+        def slow_execute(cursor, *args, **kwargs):
+            # Opóźnienie sieci/bazy blokuje wątek, tak jak prawdziwe zapytanie
+            time.sleep(latency)
+            return original_execute(cursor, *args, **kwargs)
+
+        # Bez cache'u (timeout 0), żeby każde żądanie liczyło dane od nowa
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], ANALYTICS_CACHE_TIMEOUT=0), \
+                patch.object(CursorWrapper, 'execute', slow_execute):
+            # Handler ASGI daje każdemu żądaniu własny wątek na zapytania ORM (ThreadSensitiveContext),
+            # więc przy równej współbieżności oba tryby blokują tyle samo wątków w oczekiwaniu na bazę
+            self.stdout.write(f"{options['concurrency']} concurrent requests and database threads in both modes")
+            for name, sync_url, async_url in ROUTES:
+                wsgi = self.run_wsgi(sync_url, token, options)
+                asgi = asyncio.run(self.run_asgi(async_url, token, options))
+                self.report(name, wsgi, asgi)
+
+    def run_wsgi(self, url, token, options):
+        def request(_):
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+            connections.close_all()
+            return elapsed, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(request, range(options['requests'])))
+        return self.summarize(results, time.perf_counter() - started)
+
+    async def run_asgi(self, url, token, options):
+        application = get_asgi_application()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request():
+            async with semaphore:
+                started = time.perf_counter()
+                status = await self.asgi_get(application, url, token)
+                return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(options['requests'])))
+        return self.summarize(results, time.perf_counter() - started)
+
+    @staticmethod
+    async def asgi_get(application, url, token):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': url, 'raw_path': url.encode(),
+            'query_string': b'', 'root_path': '', 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        }
+        body_sent = False
+        status = None
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Klient się nie rozłącza; Django anuluje to oczekiwanie po odpowiedzi
+            await asyncio.Future()
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        await application(scope, receive, send)
+        return status
+
+    @staticmethod
+    def summarize(results, elapsed):
+        timings = sorted(timing for timing, _ in results)
+        return {
+            'statuses': sorted({status for _, status in results}),
+            'rps': len(results) / elapsed,
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+        }
+
+    def report(self, name, wsgi, asgi):
+        for mode, result in (('wsgi', wsgi), ('asgi', asgi)):
+            self.stdout.write(
+                f"{name:<16} {mode}  status {','.join(map(str, result['statuses'])):<7} {result['rps']:>8.1f} req/s  "
+                f"p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{name:<16} asgi/wsgi throughput x{asgi['rps'] / wsgi['rps']:.2f}"))
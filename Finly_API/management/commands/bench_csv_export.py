@@ -0,0 +1,71 @@
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from Finly_API.models import Transaction, Category
+from Finly_API.rollups import rebuild_rollup
+from Finly_API.views import ExportCSVView
+
+
+class Command(BaseCommand):
+    help = "Measure peak Python memory of the streamed CSV export for several history sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            # Dane testowe są tworzone w transakcji, która zawsze jest wycofywana
+            with transaction.atomic():
+                user = self.seed(rows, options['batch_size'])
+                size, peak, elapsed = self.export(user)
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{rows:>9} rows: {size / 1024 / 1024:8.1f} MiB written, "
+                f"peak {peak / 1024 / 1024:6.2f} MiB, {elapsed:6.2f} s"
+            )
+
+    def seed(self, rows, batch_size):
+        user = User.objects.create_user(username=f'bench_csv_{rows}')
+        categories = Category.objects.bulk_create(
+            Category(user=user, name=f'Kategoria {i}', icon='icon') for i in range(20)
+        )
+        start = date(2015, 1, 1)
+        batch = []
+        for i in range(rows):
+            batch.append(Transaction(
+                user=user,
+                amount=Decimal(i % 50000) / 100,
+                type='expense' if i % 4 else 'income',
+                category=categories[i % len(categories)],
+                description=f'Transakcja {i}',
+                date=start + timedelta(days=i % 3650),
+            ))
+            if len(batch) >= batch_size:
+                Transaction.objects.bulk_create(batch)
+                batch = []
+        Transaction.objects.bulk_create(batch)
+        # Podsumowanie eksportu czyta rollup, a bulk_create pomija sygnały
+        rebuild_rollup(user)
+        return user
+
+    def export(self, user):
+        request = APIRequestFactory().get('/api/export-csv/')
+        force_authenticate(request, user)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = ExportCSVView.as_view()(request)
+        size = sum(len(chunk) for chunk in response.streaming_content)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size, peak, elapsed
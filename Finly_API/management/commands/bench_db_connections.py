@@ -0,0 +1,110 @@
+import copy
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Finly_API.metrics import percentile
+
+
+class Command(BaseCommand):
+    help = ("Measure per-request latency of one route with a new connection per request, persistent "
+            "connections (CONN_MAX_AGE + health checks) and the psycopg pool, using the DB_* settings. "
+            "Requests go through the WSGI handler, so connections are closed/reused like in production.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='synthetic_1', help="Username whose data is used.")
+        parser.add_argument('--url', default='/api/categories/', help="Route to request.")
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--conn-max-age', type=int, default=60, help="CONN_MAX_AGE of the persistent mode.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist, run generate_synthetic_data first.")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        base = copy.deepcopy(connections.settings['default'])
+        base['OPTIONS'].pop('pool', None)
+        modes = [
+            ('per-request', {**base, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}),
+            ('persistent', {**base, 'CONN_MAX_AGE': options['conn_max_age'], 'CONN_HEALTH_CHECKS': True}),
+        ]
+        if base['ENGINE'] == 'django.db.backends.postgresql':
+            modes.append(('pool', {**base, 'CONN_MAX_AGE': 0, 'OPTIONS': {**base['OPTIONS'], 'pool': True}}))
+        else:
+            self.stdout.write(f"Skipping the pool mode, {base['ENGINE']} has no connection pool.")
+
+        connections['default'].close()
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, settings_dict in modes:
+                results[name] = self.run_mode(settings_dict, token, options)
+                self.report(name, results[name], results['per-request'])
+
+    def run_mode(self, settings_dict, token, options):
+        original = connections['default']
+        wrapper = load_backend(settings_dict['ENGINE']).DatabaseWrapper(copy.deepcopy(settings_dict), 'default')
+        connections['default'] = wrapper
+        created = []
+
+        def count(sender, connection, **kwargs):
+            created.append(connection)
+
+        connection_created.connect(count)
+        handler = WSGIHandler()
+        timings = []
+        statuses = set()
+        try:
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                status = self.request(handler, options['url'], token)
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses.add(status)
+        finally:
+            connection_created.disconnect(count)
+            wrapper.close()
+            if hasattr(wrapper, 'close_pool'):
+                wrapper.close_pool()
+            connections['default'] = original
+
+        timings.sort()
+        return {
+            'statuses': sorted(statuses),
+            'connections': len(created),
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'mean_ms': sum(timings) / len(timings),
+        }
+
+    @staticmethod
+    def request(handler, url, token):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': url, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(),
+        }
+        status = []
+        response = handler(environ, lambda line, headers: status.append(int(line.split()[0])))
+        b''.join(response)
+        # close() wysyła request_finished, wtedy Django zamyka lub zostawia połączenie
+        response.close()
+        return status[0]
+
+    def report(self, name, result, baseline):
+        saved = baseline['mean_ms'] - result['mean_ms']
+        self.stdout.write(
+            f"{name:<12} status {','.join(map(str, result['statuses'])):<7} {result['connections']:>5} connections  "
+            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"mean {result['mean_ms']:>8.2f} ms ({saved:+.2f} ms saved per request)"
+        )
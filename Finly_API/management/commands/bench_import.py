@@ -0,0 +1,71 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from Finly_API.exports import CSV_ENCODING
+from Finly_API.models import Category
+from Finly_API.views import TransactionImportView
+
+
+class Command(BaseCommand):
+    help = "Measure bulk import throughput for CSV and JSON payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--format', choices=['csv', 'json', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        formats = ['csv', 'json'] if options['format'] == 'both' else [options['format']]
+
+        for fmt in formats:
+            # Import jest wycofywany po pomiarze
+            with transaction.atomic():
+                user = User.objects.create_user(username=f'bench_import_{fmt}')
+                categories = [
+                    Category.objects.create(user=user, name=f'Kategoria {i}').name for i in range(20)
+                ]
+                body, content_type = self.payload(fmt, rows, categories)
+
+                request = APIRequestFactory().generic(
+                    'POST', '/api/transaction-import/', body, content_type=content_type
+                )
+                force_authenticate(request, user)
+                # Duże tablice JSON przekraczają domyślny DATA_UPLOAD_MAX_MEMORY_SIZE
+                with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=None):
+                    started = time.perf_counter()
+                    response = TransactionImportView.as_view()(request)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{fmt:>4}: {response.data['created']} rows in {elapsed:.2f} s "
+                f"({response.data['created'] / elapsed:,.0f} rows/s), {response.data['error_count']} errors"
+            )
+
+    def payload(self, fmt, rows, categories):
+        start = date(2015, 1, 1)
+        records = [
+            {
+                'date': (start + timedelta(days=i % 3650)).isoformat(),
+                'type': 'expense' if i % 4 else 'income',
+                'category': categories[i % len(categories)],
+                'amount': f"{i % 50000 / 100:.2f}",
+                'description': f'Transakcja {i}',
+            }
+            for i in range(rows)
+        ]
+        if fmt == 'json':
+            return json.dumps(records), 'application/json'
+
+        lines = ['Data;Typ;Kategoria;Kwota;Opis\r\n']
+        lines.extend(
+            f"{r['date']};{r['type']};{r['category']};{r['amount']};{r['description']}\r\n" for r in records
+        )
+        return b''.join(line.encode(CSV_ENCODING) for line in lines), 'text/csv'
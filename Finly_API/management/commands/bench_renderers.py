@@ -0,0 +1,78 @@
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from Finly_API.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSONRenderer with FastJSONRenderer on StatisticsView and transaction list payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help="Transactions in the list payload.")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson is not installed, FastJSONRenderer falls back to the stdlib renderer.")
+
+        payloads = {
+            'statistics': self.statistics_payload(months=120, categories=200),
+            f"transactions ({options['rows']})": self.transactions_payload(options['rows']),
+        }
+        for name, payload in payloads.items():
+            baseline = JSONRenderer().render(payload)
+            identical = FastJSONRenderer().render(payload) == baseline
+            drf_time = self.measure(JSONRenderer(), payload, options['repeat'])
+            fast_time = self.measure(FastJSONRenderer(), payload, options['repeat'])
+            size = len(baseline) / 1024 / 1024
+            self.stdout.write(
+                f"{name}: {size:.2f} MiB, JSONRenderer {size / drf_time:>8.1f} MiB/s, "
+                f"FastJSONRenderer {size / fast_time:>8.1f} MiB/s ({drf_time / fast_time:.1f}x), "
+                f"identical output: {identical}"
+            )
+
+    @staticmethod
+    def measure(renderer, payload, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            renderer.render(payload)
+        return (time.perf_counter() - started) / repeat
+
+    @staticmethod
+    def statistics_payload(months, categories):
+        # Ten sam kształt co odpowiedź StatisticsView
+        by_category = defaultdict(lambda: {'income': 0, 'expense': 0, 'icon': ''})
+        for i in range(categories):
+            by_category[f'Kategoria {i}'] = {
+                'income': Decimal(i * 1234) / 100, 'expense': Decimal(i * 987) / 100, 'icon': 'food',
+            }
+        monthly = defaultdict(lambda: {'income': 0, 'expense': 0})
+        start = date(2015, 1, 1)
+        for i in range(months):
+            key = (start + timedelta(days=31 * i)).strftime('%Y-%m')
+            monthly[key] = {'income': Decimal(i * 50011) / 100, 'expense': Decimal(i * 40007) / 100}
+        return {
+            'balance': Decimal('123456.78'),
+            'last_30_days': {'income': Decimal('5000.00'), 'expense': Decimal('1234.56')},
+            'by_category': dict(by_category),
+            'most_expense_category': {'name': 'Kategoria 1', 'amount': Decimal('9.87'), 'icon': 'food'},
+            'monthly': dict(monthly),
+        }
+
+    @staticmethod
+    def transactions_payload(rows):
+        # Lista jak z TransactionValuesSerializer (kwoty jako tekst) z surowymi Decimal i datami
+        return [
+            {
+                'id': i, 'user': 1, 'category': i % 10 or None, 'amount': f'{i % 50000 / 100:.2f}',
+                'raw_amount': Decimal(i % 50000) / 100, 'type': 'expense' if i % 4 else 'income',
+                'description': f'Transakcja {i} – zakupy', 'date': date(2015, 1, 1) + timedelta(days=i % 3650),
+                'created_at': '2024-01-02T03:04:05.678000Z',
+            }
+            for i in range(rows)
+        ]
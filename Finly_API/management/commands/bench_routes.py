@@ -0,0 +1,206 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import date
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from Finly_API.cache import get_cache
+from Finly_API.metrics import percentile
+from Finly_API.models import Transaction, Category, Budget
+
+
+class Command(BaseCommand):
+    help = ("Drive every Finly API route through the test client and report latency percentiles, "
+            "query counts and peak memory. Use generate_synthetic_data first.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='synthetic_1', help="Username whose data is used.")
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--routes', nargs='+', help="Only run routes with these names.")
+        parser.add_argument('--warm-cache', action='store_true',
+                            help="Keep the analytics cache between requests (measures cache hits).")
+        parser.add_argument('--output', help="Write results to this JSON file.")
+        parser.add_argument('--baseline', help="JSON results file of a previous run to compare with.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist, run generate_synthetic_data first.")
+
+        routes = self.routes(user)
+        if options['routes']:
+            unknown = set(options['routes']) - {name for name, *_ in routes}
+            if unknown:
+                raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+            routes = [route for route in routes if route[0] in options['routes']]
+
+        client = APIClient()
+        client.force_authenticate(user)
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, method, url, data in routes:
+                results[name] = self.run_route(client, method, url, data, options)
+                self.report(name, results[name])
+
+        payload = {
+            'meta': {
+                'commit': self.git_commit(),
+                'created_at': now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'user': user.username,
+                'transactions': Transaction.objects.filter(user=user).count(),
+                'iterations': options['iterations'],
+                'warm_cache': options['warm_cache'],
+            },
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(payload, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        if options['baseline']:
+            self.compare(options['baseline'], results)
+
+    def routes(self, user):
+        """(name, method, url, data) for every route; the write routes run as create/update/delete."""
+        transaction = Transaction.objects.filter(user=user).order_by('-date').first()
+        category = Category.objects.filter(user=user).order_by('id').first()
+        budget = Budget.objects.filter(user=user).order_by('id').first()
+        today = date.today()
+        year_ago = today.replace(year=today.year - 1, day=1)
+        new_transaction = {
+            'amount': '12.34', 'type': 'expense', 'category': category.pk if category else None,
+            'description': 'bench_routes', 'date': today.isoformat(),
+        }
+
+        routes = [
+            ('statistics', 'get', '/api/statistics/', None),
+            ('statistics-month', 'get', f'/api/statistics/?month={today:%Y-%m}&type=expense', None),
+            ('statistics-range', 'get', f'/api/statistics/?start_date={year_ago}&end_date={today}', None),
+            ('category-list', 'get', '/api/category-list/', None),
+            ('budget-summary', 'get', '/api/budgets-summary/', None),
+            ('budget-summary-range', 'get', f'/api/budgets-summary/?from={year_ago:%Y-%m}&to={today:%Y-%m}', None),
+            ('transaction-list', 'get', '/api/transaction-list/', None),
+            ('transaction-list-highest', 'get', '/api/transaction-list/?order_by=highest&type=expense', None),
+            ('transaction-list-range', 'get', f'/api/transaction-list/?start_date={year_ago}&end_date={today}', None),
+            ('transaction-list-search', 'get', '/api/transaction-list/?search=biedronka', None),
+            ('transactions', 'get', '/api/transactions/', None),
+            ('categories', 'get', '/api/categories/', None),
+            ('budgets', 'get', '/api/budgets/', None),
+            ('export-csv', 'get', '/api/export-csv/', None),
+            ('export-pdf', 'get', '/api/export-pdf/', None),
+            ('transaction-create', 'post', '/api/transactions/', new_transaction),
+            ('transaction-update', 'patch', '/api/transactions/{id}/', {'amount': '43.21'}),
+            ('transaction-delete', 'delete', '/api/transactions/{id}/', None),
+        ]
+        if transaction:
+            routes.append(('transaction-detail', 'get', f'/api/transactions/{transaction.pk}/', None))
+        if category:
+            routes.append(('category-detail', 'get', f'/api/categories/{category.pk}/', None))
+        if budget:
+            routes.append(('budget-detail', 'get', f'/api/budgets/{budget.pk}/', None))
+        return routes
+
+    def run_route(self, client, method, url, data, options):
+        timings = []
+        queries = []
+        status = None
+        for iteration in range(options['warmup'] + options['iterations']):
+            if not options['warm_cache']:
+                get_cache().clear()
+            elapsed, query_count, status = self.request(client, method, url, data)
+            if iteration >= options['warmup']:
+                timings.append(elapsed)
+                queries.append(query_count)
+
+        # Pamięć mierzona osobno, tracemalloc spowalnia żądanie
+        if not options['warm_cache']:
+            get_cache().clear()
+        tracemalloc.start()
+        try:
+            self.request(client, method, url, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'method': method.upper(),
+            'url': url,
+            'status': status,
+            **{f'p{p}_ms': round(percentile(timings, p), 3) for p in (50, 95, 99)},
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'max_ms': round(timings[-1], 3),
+            'queries': max(queries),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    def request(self, client, method, url, data):
+        # Zapisy: tworzymy własną transakcję, zmieniamy ją lub usuwamy, żeby dane się nie rozrastały
+        if '{id}' in url:
+            created = client.post('/api/transactions/', {
+                'amount': '1.00', 'type': 'expense', 'description': 'bench_routes', 'date': date.today().isoformat(),
+            }, format='json')
+            url = url.format(id=created.json()['id'])
+
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            if method == 'get':
+                response = client.get(url)
+            else:
+                response = getattr(client, method)(url, data, format='json')
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = (time.perf_counter() - started) * 1000
+
+        if method == 'post' and response.status_code == 201:
+            Transaction.objects.filter(pk=response.json()['id']).delete()
+        elif method == 'patch':
+            Transaction.objects.filter(pk=response.json()['id']).delete()
+        return elapsed, len(captured), response.status_code
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<26} {result['status']:>3}  p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+            f"p99 {result['p99_ms']:>9.2f} ms  {result['queries']:>4} queries  {result['peak_memory_kib']:>9.1f} KiB"
+        )
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        self.stdout.write(f"\nCompared with {path} (commit {baseline['meta'].get('commit')}):")
+        for name, result in results.items():
+            previous = baseline['routes'].get(name)
+            if previous is None:
+                continue
+            change = (result['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100 if previous['p50_ms'] else 0
+            line = (f"{name:<26} p50 {previous['p50_ms']:>9.2f} -> {result['p50_ms']:>9.2f} ms ({change:+.0f}%)  "
+                    f"queries {previous['queries']} -> {result['queries']}")
+            if result['queries'] > previous['queries']:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
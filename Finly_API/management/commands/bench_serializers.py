@@ -0,0 +1,53 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from Finly_API.models import Transaction, Category
+from Finly_API.serializers import TransactionSerializer, TransactionValuesSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare TransactionSerializer with the .values() fast path (rows per second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            # Dane testowe są wycofywane po pomiarze
+            with transaction.atomic():
+                user = User.objects.create_user(username=f'bench_serializers_{rows}')
+                category = Category.objects.create(user=user, name='Kategoria')
+                Transaction.objects.bulk_create(
+                    Transaction(
+                        user=user, amount=Decimal(i % 50000) / 100, type='expense' if i % 4 else 'income',
+                        category=category if i % 3 else None, description=f'Transakcja {i}',
+                        date=date(2015, 1, 1) + timedelta(days=i % 3650),
+                    )
+                    for i in range(rows)
+                )
+                transactions = Transaction.objects.filter(user=user)
+
+                model_time, model_data = self.measure(lambda: TransactionSerializer(transactions, many=True).data)
+                fast_time, fast_data = self.measure(lambda: TransactionValuesSerializer.to_representation(
+                    transactions.values(*TransactionValuesSerializer.columns)
+                ))
+                transaction.set_rollback(True)
+
+            identical = JSONRenderer().render(model_data) == JSONRenderer().render(fast_data)
+            self.stdout.write(
+                f"{rows:>7} rows: ModelSerializer {rows / model_time:>10,.0f} rows/s, "
+                f"values() {rows / fast_time:>10,.0f} rows/s ({model_time / fast_time:.1f}x), "
+                f"identical output: {identical}"
+            )
+
+    @staticmethod
+    def measure(func):
+        started = time.perf_counter()
+        result = func()
+        return time.perf_counter() - started, result
@@ -0,0 +1,171 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Finly_API.budgets import refresh_budgets
+from Finly_API.bulk import raw_delete
+from Finly_API.cache import bump_user_version
+from Finly_API.models import Transaction, Category, Budget, MonthlyRollup
+from Finly_API.rollups import month_start, next_month, rebuild_rollup
+
+# (nazwa, ikona, waga, mediana kwoty, opisy)
+EXPENSE_CATEGORIES = [
+    ('Jedzenie', 'food', 30, 45, ['Biedronka', 'Lidl', 'Żabka', 'Piekarnia', 'Restauracja']),
+    ('Transport', 'car', 12, 30, ['Paliwo', 'Bilet miesięczny', 'Taxi', 'Parking']),
+    ('Mieszkanie', 'home', 4, 1200, ['Czynsz', 'Remont', 'Meble']),
+    ('Rachunki', 'bill', 6, 150, ['Prąd', 'Gaz', 'Internet', 'Telefon']),
+    ('Rozrywka', 'movie', 8, 60, ['Kino', 'Koncert', 'Streaming', 'Gry']),
+    ('Zdrowie', 'health', 4, 80, ['Apteka', 'Lekarz', 'Dentysta']),
+    ('Ubrania', 'shirt', 5, 120, ['Buty', 'Kurtka', 'Zakupy odzieżowe']),
+    ('Podróże', 'plane', 2, 900, ['Hotel', 'Bilety lotnicze', 'Wycieczka']),
+    ('Edukacja', 'book', 2, 200, ['Kurs', 'Książki']),
+    ('Prezenty', 'gift', 3, 100, ['Urodziny', 'Święta']),
+]
+INCOME_CATEGORIES = [
+    ('Pensja', 'cash', ['Wypłata']),
+    ('Premia', 'star', ['Premia kwartalna', 'Nagroda']),
+    ('Sprzedaż', 'tag', ['OLX', 'Allegro']),
+]
+
+
+class Command(BaseCommand):
+    help = ("Generate reproducible synthetic users, categories, budgets and transactions with bulk_create. "
+            "Usernames are '<prefix>_<n>'.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--transactions', type=int, default=10_000, help="Transactions per user.")
+        parser.add_argument('--months', type=int, default=24, help="History length in months.")
+        parser.add_argument('--budget-months', type=int, default=12, help="Months with budgets, counted back from the end date.")
+        parser.add_argument('--uncategorized', type=float, default=0.05, help="Share of expenses without a category.")
+        parser.add_argument('--end-date', help="Last transaction date (YYYY-MM-DD), defaults to today.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='synthetic')
+        parser.add_argument('--password', help="Password for the generated users, unusable by default.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true', help="Delete users with the same prefix first.")
+
+    def handle(self, *args, **options):
+        try:
+            end = datetime.strptime(options['end_date'], '%Y-%m-%d').date() if options['end_date'] else date.today()
+        except ValueError:
+            raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+        start = month_start(end)
+        for _ in range(options['months'] - 1):
+            start = month_start(start - timedelta(days=1))
+
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=f'{prefix}_')
+        if options['clear']:
+            self.clear(existing)
+        elif existing.exists():
+            raise CommandError(f"Users with prefix '{prefix}' already exist, use --clear or another --prefix.")
+
+        rng = random.Random(options['seed'])
+        password = make_password(options['password']) if options['password'] else make_password(None)
+        started = time.perf_counter()
+        total = 0
+
+        for index in range(1, options['users'] + 1):
+            with transaction.atomic():
+                user = User.objects.create(username=f'{prefix}_{index}', password=password)
+                expense, income = self.create_categories(user)
+                self.create_budgets(rng, user, expense, end, options['budget_months'])
+
+                rows = self.transactions(rng, user, expense, income, start, end, options)
+                while True:
+                    batch = list(islice(rows, options['batch_size']))
+                    if not batch:
+                        break
+                    Transaction.objects.bulk_create(batch)
+                    total += len(batch)
+
+                # bulk_create pomija sygnały
+                rebuild_rollup(user)
+                refresh_budgets(Budget.objects.filter(user=user))
+                bump_user_version(user.pk)
+            self.stdout.write(f"{user.username}: {options['transactions']} transactions")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {options['users']} users and {total} transactions "
+            f"({start:%Y-%m-%d} - {end:%Y-%m-%d}) in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)."
+        ))
+
+    def clear(self, users):
+        with transaction.atomic():
+            # Usuwamy bez sygnałów, rollup tych użytkowników i tak znika razem z nimi
+            transactions = Transaction.objects.filter(user__in=users)
+            deleted = raw_delete(transactions)
+            MonthlyRollup.objects.filter(user__in=users).delete()
+            users.delete()
+        self.stdout.write(f"Deleted {deleted} transactions of existing synthetic users.")
+
+    @staticmethod
+    def create_categories(user):
+        expense = Category.objects.bulk_create(
+            Category(user=user, name=name, icon=icon) for name, icon, *_ in EXPENSE_CATEGORIES
+        )
+        income = Category.objects.bulk_create(
+            Category(user=user, name=name, icon=icon) for name, icon, _ in INCOME_CATEGORIES
+        )
+        return expense, income
+
+    @staticmethod
+    def create_budgets(rng, user, categories, end, months):
+        budgets = []
+        month = month_start(end)
+        for _ in range(months):
+            for category, (_, _, weight, median, _) in zip(categories, EXPENSE_CATEGORIES):
+                if rng.random() < 0.6:
+                    amount = Decimal(round(median * weight * rng.uniform(0.8, 1.5), -1)).quantize(Decimal('0.01'))
+                    budgets.append(Budget(user=user, category=category, amount=amount, month=month))
+            month = month_start(month - timedelta(days=1))
+        Budget.objects.bulk_create(budgets)
+
+    @staticmethod
+    def transactions(rng, user, expense, income, start, end, options):
+        """Yield unsaved transactions: a monthly salary plus weighted random expenses and extra income."""
+        count = options['transactions']
+        days = (end - start).days + 1
+        salary = Decimal(rng.randrange(4000, 15000, 100))
+        salary_category, *other_income = income
+
+        produced = 0
+        month = start
+        while month <= end and produced < count:
+            payday = min(month.replace(day=10), end)
+            yield Transaction(user=user, amount=salary, type='income', category=salary_category,
+                              description='Wypłata', date=payday)
+            produced += 1
+            month = next_month(month)
+
+        weights = [weight for _, _, weight, _, _ in EXPENSE_CATEGORIES]
+        for _ in range(count - produced):
+            day = start + timedelta(days=rng.randrange(days))
+            if rng.random() < 0.05:
+                category = rng.choice(other_income)
+                descriptions = INCOME_CATEGORIES[income.index(category)][2]
+                amount = rng.lognormvariate(6, 0.8)
+                type = 'income'
+            else:
+                index = rng.choices(range(len(expense)), weights)[0]
+                _, _, _, median, descriptions = EXPENSE_CATEGORIES[index]
+                category = None if rng.random() < options['uncategorized'] else expense[index]
+                amount = rng.lognormvariate(0, 0.6) * median
+                type = 'expense'
+            yield Transaction(
+                user=user,
+                amount=Decimal(f'{max(amount, 0.01):.2f}'),
+                type=type,
+                category=category,
+                description=rng.choice(descriptions),
+                date=day,
+            )
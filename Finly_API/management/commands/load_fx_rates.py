@@ -0,0 +1,71 @@
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Finly_API.budgets import refresh_budgets
+from Finly_API.cache import bump_user_version
+from Finly_API.currency import store_rates
+from Finly_API.models import Budget
+from Finly_API.rollups import month_start
+
+FIELDS = ('date', 'currency', 'rate')
+
+
+class Command(BaseCommand):
+    help = ("Load exchange rates from a local CSV file with date (YYYY-MM-DD), currency and rate columns, "
+            "the rate being the value of one unit of the currency in BASE_CURRENCY. Existing rates of the "
+            "same day are replaced and days between two rates get the earlier one.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a date,currency,rate header.")
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file:
+                rates = self.read(csv.DictReader(file, delimiter=options['delimiter']))
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+        if not rates:
+            raise CommandError("No rates found.")
+
+        first = min(day for _, day in rates)
+        with transaction.atomic():
+            stored = store_rates(rates, batch_size=options['batch_size'])
+            # Wydatki budżetów w innych walutach zależą od kursów od `first` wzwyż
+            budgets = refresh_budgets(Budget.objects.filter(month__gte=month_start(first)))
+        # Odpowiedzi w innej walucie niż dane mogą mieć każdy użytkownik
+        for user_id in User.objects.values_list('pk', flat=True).iterator():
+            bump_user_version(user_id)
+
+        currencies = sorted({currency for currency, _ in rates})
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored} rates of {', '.join(currencies)} from {first:%Y-%m-%d}; "
+            f"{budgets} budgets changed their spend."
+        ))
+
+    def read(self, reader):
+        if reader.fieldnames is None or not set(FIELDS) <= set(reader.fieldnames):
+            raise CommandError(f"Expected a header with the columns: {', '.join(FIELDS)}.")
+        rates = {}
+        for row in reader:
+            try:
+                day = datetime.strptime(row['date'].strip(), '%Y-%m-%d').date()
+                rate = Decimal(row['rate'].strip())
+            except (ValueError, InvalidOperation, AttributeError):
+                raise CommandError(f"Line {reader.line_num}: invalid date or rate.")
+            currency = row['currency'].strip().upper()
+            if len(currency) != 3 or not currency.isalpha():
+                raise CommandError(f"Line {reader.line_num}: invalid currency code '{row['currency']}'.")
+            if currency == settings.BASE_CURRENCY:
+                raise CommandError(f"Line {reader.line_num}: {currency} is the base currency, its rate is always 1.")
+            if rate <= 0:
+                raise CommandError(f"Line {reader.line_num}: the rate must be positive.")
+            rates[(currency, day)] = rate
+        return rates
@@ -0,0 +1,28 @@
+import time
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Finly_API.recurring import materialize_due
+
+
+class Command(BaseCommand):
+    help = ("Create the transactions of all recurring rules due up to a date (today by default). "
+            "Safe to run repeatedly, e.g. from cron once a day.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Materialize occurrences up to this date (YYYY-MM-DD).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rules per database transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            today = datetime.strptime(options['date'], '%Y-%m-%d').date() if options['date'] else date.today()
+        except ValueError:
+            raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+
+        started = time.perf_counter()
+        rules, created = materialize_due(today, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Materialized {created} transactions from {rules} rules up to {today:%Y-%m-%d} "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Finly_API.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = ("Render pending PDF export jobs outside of the web workers. Jobs interrupted mid-render are marked "
+            "failed and files older than EXPORT_RETENTION are deleted.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Polling interval in seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending_jobs()
+            if processed:
+                self.stdout.write(f"Processed {processed} export jobs.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
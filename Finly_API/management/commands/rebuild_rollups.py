@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Finly_API.cache import bump_user_version
+from Finly_API.rollups import rebuild_rollup, verify_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or verify) the monthly transaction rollup from raw transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to limit the operation to.")
+        parser.add_argument('--verify', action='store_true', help="Only compare the rollup with raw transactions.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        if options['verify']:
+            mismatches = verify_rollup(user)
+            for key, expected, stored in mismatches:
+                self.stdout.write(f"{key}: expected {expected}, stored {stored}")
+            if mismatches:
+                raise CommandError(f"Rollup is out of date: {len(mismatches)} mismatched rows.")
+            self.stdout.write(self.style.SUCCESS("Rollup is consistent with transactions."))
+            return
+
+        with transaction.atomic():
+            rows = rebuild_rollup(user)
+            # Odpowiedzi z cache'u i ETagi pokazywałyby dalej stare sumy
+            users = [user.pk] if user else User.objects.values_list('pk', flat=True).iterator()
+            for user_id in users:
+                bump_user_version(user_id)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollup: {rows} rows."))
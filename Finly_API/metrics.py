@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+FIELDS = ('wall_ms', 'db_queries', 'db_ms', 'size')
+PERCENTILES = (50, 95, 99)
+
+_samples = defaultdict(lambda: deque(maxlen=settings.REQUEST_METRICS_WINDOW))
+_samples_lock = threading.Lock()
+
+
+def view_key(match):
+    """View name and route of a ResolverMatch: one URL name can serve several routes."""
+    if match is None:
+        return 'unresolved'
+    # Trasy routera DRF są wyrażeniami regularnymi zakończonymi "$"
+    return f'{match.view_name} /{match.route.rstrip("$")}'
+
+
+def record(view, method, sample):
+    with _samples_lock:
+        _samples[(view, method)].append(sample)
+
+
+def reset():
+    with _samples_lock:
+        _samples.clear()
+
+
+def percentile(values, p):
+    # Metoda najbliższej rangi na posortowanej liście
+    index = max(0, -(-len(values) * p // 100) - 1)
+    return values[index]
+
+
+def summary():
+    """Per view (see view_key) and method: request count plus p50/p95/p99 of every recorded field."""
+    with _samples_lock:
+        snapshot = {key: list(samples) for key, samples in _samples.items()}
+
+    result = {}
+    for (view, method), samples in sorted(snapshot.items()):
+        stats = {'count': len(samples)}
+        for index, field in enumerate(FIELDS):
+            values = sorted(sample[index] for sample in samples if sample[index] is not None)
+            if values:
+                stats[field] = {f'p{p}': percentile(values, p) for p in PERCENTILES}
+        result.setdefault(view, {})[method] = stats
+    return result
+
+
+class QueryTimer:
+    """Execute wrapper counting queries and their time on every connection it is attached to."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """Opt-in (REQUEST_METRICS) per-request timing, query counts and response size.
+
+    Adds a Server-Timing header and feeds the rolling window exposed by
+    RequestMetricsView. When disabled Django drops the middleware at startup,
+    so it costs nothing. For streaming responses only the time to the first
+    byte is measured and the size is unknown.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+        db_ms = timer.duration * 1000
+        size = None if response.streaming else len(response.content)
+
+        record(view_key(request.resolver_match), request.method, (round(wall_ms, 2), timer.count, round(db_ms, 2), size))
+
+        timings = [
+            f'total;dur={wall_ms:.2f}',
+            f'db;dur={db_ms:.2f};desc="{timer.count} queries"',
+            f'app;dur={max(wall_ms - db_ms, 0):.2f}',
+        ]
+        if size is not None:
+            timings.append(f'size;desc="{size} bytes"')
+        response['Server-Timing'] = ', '.join(timings)
+        return response
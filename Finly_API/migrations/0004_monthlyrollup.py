@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_rollup(apps, schema_editor):
+    Transaction = apps.get_model('Finly_API', 'Transaction')
+    MonthlyRollup = apps.get_model('Finly_API', 'MonthlyRollup')
+    rows = (
+        Transaction.objects.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category_id', 'type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    MonthlyRollup.objects.bulk_create((MonthlyRollup(**row) for row in rows), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0003_alter_transaction_options_alter_budget_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='Finly_API.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category', 'type'), name='unique_monthly_rollup')],
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
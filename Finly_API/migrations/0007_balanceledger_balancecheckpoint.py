@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_balances(apps, schema_editor):
+    Transaction = apps.get_model('Finly_API', 'Transaction')
+    BalanceLedger = apps.get_model('Finly_API', 'BalanceLedger')
+    BalanceCheckpoint = apps.get_model('Finly_API', 'BalanceCheckpoint')
+    rows = (
+        Transaction.objects.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month')
+        .annotate(income=Sum('amount', filter=Q(type='income')), expense=Sum('amount', filter=Q(type='expense')))
+        .order_by('user_id', 'month')
+    )
+    ledgers = {}
+    checkpoints = []
+    for row in rows:
+        income, expense = ledgers.get(row['user_id'], (0, 0))
+        income += row['income'] or 0
+        expense += row['expense'] or 0
+        ledgers[row['user_id']] = (income, expense)
+        checkpoints.append(BalanceCheckpoint(user_id=row['user_id'], month=row['month'], balance=income - expense))
+    BalanceLedger.objects.bulk_create(
+        BalanceLedger(user_id=user_id, income=income, expense=expense, balance=income - expense)
+        for user_id, (income, expense) in ledgers.items()
+    )
+    BalanceCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0006_transaction_budget_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceLedger',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='unique_balance_checkpoint')],
+            },
+        ),
+        migrations.RunPython(build_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import OperationalError, migrations
+
+import Finly_API.models
+
+FTS_TABLE = 'finly_transaction_fts'
+TRANSACTION_TABLE = '"Finly_API_transaction"'
+
+
+def create_sqlite_fts(apps, schema_editor):
+    # SQLite (testy lokalne) nie ma indeksów GIN: tabela FTS5 z wyzwalaczami
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(description, content={TRANSACTION_TABLE}, '
+                "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite bez FTS5: wyszukiwanie przez icontains
+            return
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TRANSACTION_TABLE} BEGIN '
+            f'INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description); END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TRANSACTION_TABLE} BEGIN '
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description); END"
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF description ON {TRANSACTION_TABLE} BEGIN '
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description); "
+            f'INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description); END'
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_sqlite_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0007_balanceledger_balancecheckpoint'),
+    ]
+
+    operations = [
+        # Indeksy GIN tylko na PostgreSQL (PostgresGinIndex), FTS5 na SQLite
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=Finly_API.models.PostgresGinIndex(
+                django.contrib.postgres.search.SearchVector('description', config='simple'),
+                name='transaction_desc_fts_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=Finly_API.models.PostgresGinIndex(
+                django.contrib.postgres.indexes.OpClass('description', name='gin_trgm_ops'),
+                name='transaction_desc_trgm_idx',
+            ),
+        ),
+        migrations.RunPython(create_sqlite_fts, drop_sqlite_fts),
+    ]
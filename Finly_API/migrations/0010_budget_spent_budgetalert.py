@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:30
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def compute_spent(apps, schema_editor):
+    Budget = apps.get_model('Finly_API', 'Budget')
+    Transaction = apps.get_model('Finly_API', 'Transaction')
+    for budget in Budget.objects.iterator():
+        month = budget.month.replace(day=1)
+        end = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        budget.spent = Transaction.objects.filter(
+            user_id=budget.user_id, category_id=budget.category_id, type='expense',
+            date__gte=budget.month, date__lt=end,
+        ).aggregate(total=Sum('amount'))['total'] or 0
+        budget.save(update_fields=['spent'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0009_recurringrule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='spent',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunPython(compute_spent, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='BudgetAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('threshold', models.PositiveSmallIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('spent', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='Finly_API.budget')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at', 'id'], name='budget_alert_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('budget', 'threshold'), name='unique_budget_alert')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0010_budget_spent_budgetalert'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FxRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='monthlyrollup',
+            name='unique_monthly_rollup',
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='currency',
+            field=models.CharField(default='PLN', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='monthlyrollup',
+            name='currency',
+            field=models.CharField(default='PLN', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='recurringrule',
+            name='currency',
+            field=models.CharField(default='PLN', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default='PLN', max_length=3),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'month', 'category', 'type', 'currency'), name='unique_monthly_rollup_currency'),
+        ),
+        migrations.AddConstraint(
+            model_name='fxrate',
+            constraint=models.UniqueConstraint(fields=('currency', 'date'), name='unique_fx_rate'),
+        ),
+    ]
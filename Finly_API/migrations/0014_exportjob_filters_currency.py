@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0013_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='currency',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='filters',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
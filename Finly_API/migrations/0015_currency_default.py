@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:14
+
+import Finly_API.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0014_exportjob_filters_currency'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='budget',
+            name='currency',
+            field=models.CharField(default=Finly_API.models.base_currency, max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='currency',
+            field=models.CharField(default=Finly_API.models.base_currency, max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='recurringrule',
+            name='currency',
+            field=models.CharField(default=Finly_API.models.base_currency, max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default=Finly_API.models.base_currency, max_length=3),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finly_API', '0015_currency_default'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='BalanceCheckpoint',
+        ),
+        migrations.DeleteModel(
+            name='BalanceLedger',
+        ),
+    ]
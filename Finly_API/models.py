@@ -1,5 +1,31 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.backends.ddl_references import Statement
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+
+
+def base_currency():
+    # Wywoływane przy tworzeniu wiersza: migracje nie zależą od zmiennej BASE_CURRENCY
+    return settings.BASE_CURRENCY
+
+
+class PostgresGinIndex(GinIndex):
+    """GinIndex skipped by other databases: SQLite (local tests) searches through its FTS5 table instead."""
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('')
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('')
+        return super().remove_sql(model, schema_editor, **kwargs)
+
 
 class Transaction(models.Model):
     TRANSACTION_TYPES = [
@@ -9,14 +35,31 @@ class Transaction(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=base_currency)
     type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     category = models.ForeignKey('Category', on_delete=models.SET_NULL, null=True)
     description = models.TextField(blank=True)
     date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
+    recurring_rule = models.ForeignKey('RecurringRule', on_delete=models.SET_NULL, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-date', '-created_at']
+        constraints = [
+            # Każde wystąpienie reguły materializujemy najwyżej raz
+            models.UniqueConstraint(fields=['recurring_rule', 'date'], name='unique_recurring_occurrence'),
+        ]
+        indexes = [
+            # Domyślne sortowanie i paginacja (date, created_at, id)
+            models.Index(fields=['user', 'date', 'created_at', 'id'], name='transaction_user_date_idx'),
+            models.Index(fields=['user', 'type', 'date'], name='transaction_user_type_idx'),
+            models.Index(fields=['user', 'category', 'type'], name='transaction_user_category_idx'),
+            # order_by=highest|lowest
+            models.Index(fields=['user', 'amount', 'id'], name='transaction_user_amount_idx'),
+            # ?search= (search.py): pełnotekstowy z konfiguracją SEARCH_CONFIG i trigramowy dla literówek
+            PostgresGinIndex(SearchVector('description', config='simple'), name='transaction_desc_fts_idx'),
+            PostgresGinIndex(OpClass('description', name='gin_trgm_ops'), name='transaction_desc_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.type} - {self.amount}"
@@ -33,10 +76,148 @@ class Budget(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=base_currency)
     month = models.DateField(help_text="Use the first day of the month, e.g. 2025-04-01")
+    # Wydatki od `month` do końca miesiąca w walucie budżetu, aktualizowane przy zapisie transakcji
+    spent = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'month', 'category'], name='budget_user_month_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.category.name if self.category else 'No Category'} - {self.amount}"
 
+class MonthlyRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    # Suma w walucie transakcji, każda waluta ma osobny wiersz
+    currency = models.CharField(max_length=3, default=base_currency)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'category', 'type', 'currency'], name='unique_monthly_rollup_currency',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m} - {self.type} - {self.total} {self.currency}"
+
+class DataVersion(models.Model):
+    """Counter of the user's data changes: keys the analytics cache and the ETags.
+
+    Kept in the database, so every web process and management command sees
+    the same value and a bump commits together with the data it describes.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.version}"
+
+class ExportJob(models.Model):
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    # Parametry StatisticsView (start_date, end_date, month, category, type) i waluta raportu
+    filters = models.JSONField(default=dict, blank=True)
+    currency = models.CharField(max_length=3, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.status} - {self.created_at:%Y-%m-%d %H:%M}"
 
+class RecurringRule(models.Model):
+    """Template of a transaction repeated every `interval` weeks or months.
 
+    Monthly rules fall on `day_of_month` (the start date's day by default),
+    moved to the last day of shorter months. `next_date` is the first
+    occurrence not materialized yet, None once the rule is past `end_date`.
+    """
+    FREQUENCIES = [
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=base_currency)
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    description = models.TextField(blank=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default='monthly')
+    interval = models.PositiveSmallIntegerField(default=1)
+    day_of_month = models.PositiveSmallIntegerField(null=True, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_date = models.DateField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Wyszukiwanie reguł do materializacji
+            models.Index(fields=['next_date', 'id'], name='recurring_rule_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.frequency} - {self.type} - {self.amount}"
+
+class BudgetAlert(models.Model):
+    """Recorded once when a budget's spend first reaches `threshold` percent of its amount."""
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='alerts')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    threshold = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['budget', 'threshold'], name='unique_budget_alert'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='budget_alert_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.budget_id} - {self.threshold}%"
+
+
+
+class FxRate(models.Model):
+    """Value of one unit of `currency` in settings.BASE_CURRENCY on `date`, loaded by load_fx_rates."""
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        constraints = [
+            # Indeks (currency, date) obsługuje też wyszukiwanie kursu z dnia lub wcześniejszego
+            models.UniqueConstraint(fields=['currency', 'date'], name='unique_fx_rate'),
+        ]
+
+    def __str__(self):
+        return f"{self.currency} - {self.date} - {self.rate}"
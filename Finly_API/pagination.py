@@ -0,0 +1,141 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on the full queryset ordering plus the primary key.
+
+    Unlike DRF's CursorPagination, the cursor stores every ordering column, so
+    each page is a single indexed range scan no matter how deep the client is.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    # ?paginate=false zwraca całą listę jak wcześniej
+    unpaginated_query_param = 'paginate'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.unpaginated_query_param) == 'false':
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        position, reverse = self.decode_cursor(request, queryset)
+        self.has_cursor = position is not None
+
+        ordering = [self.flip(field) for field in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.reverse = reverse
+        if reverse:
+            results.reverse()
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            # Klucz główny rozstrzyga remisy, kierunek jak w ostatnim polu
+            ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+        return ordering
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def after(ordering, position):
+        """(a, b, c) > (x, y, z) expanded into OR-ed prefix comparisons."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = data['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.get_field(queryset, field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def get_field(queryset, field):
+        name = field.lstrip('-')
+        # Sortowanie może używać adnotacji, np. rank wyszukiwania
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        model = queryset.model
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            # Strona może zawierać instancje modelu albo słowniki z .values()
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value if isinstance(value, int) else str(value))
+        data = json.dumps({'p': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        if self.reverse or self.has_more:
+            return self.encode_cursor(self.page[-1], reverse=False)
+        return None
+
+    def get_previous_link(self):
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param) if self.has_cursor else None
+        if (self.reverse and self.has_more) or (not self.reverse and self.has_cursor):
+            return self.encode_cursor(self.page[0], reverse=True)
+        return None
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,100 @@
+import logging
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from reportlab.pdfgen import canvas
+
+logger = logging.getLogger(__name__)
+
+# Czcionki obsługujące polskie znaki, w kolejności preferencji
+FONT_CANDIDATES = [
+    ('arial.ttf', 'arialbd.ttf'),
+    ('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf'),
+    ('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'),
+]
+FALLBACK_FONTS = ('Helvetica', 'Helvetica-Bold')
+
+FONT = FALLBACK_FONTS[0]
+FONT_BOLD = FALLBACK_FONTS[1]
+
+# Pozostałe waluty są drukowane kodem ISO
+CURRENCY_SYMBOLS = {'PLN': 'zł'}
+
+
+def register_fonts():
+    """Register the PDF fonts once per process, falling back to Helvetica."""
+    global FONT, FONT_BOLD
+
+    for regular, bold in FONT_CANDIDATES:
+        try:
+            pdfmetrics.registerFont(TTFont('Arial', regular))
+            pdfmetrics.registerFont(TTFont('Arial-Bold', bold))  # Pogrubiona wersja
+        except (TTFError, OSError):
+            continue
+        FONT, FONT_BOLD = 'Arial', 'Arial-Bold'
+        return FONT, FONT_BOLD
+
+    logger.warning("No TrueType font found for PDF export, falling back to %s.", FALLBACK_FONTS[0])
+    FONT, FONT_BOLD = FALLBACK_FONTS
+    return FONT, FONT_BOLD
+
+
+def currency_label(code):
+    return CURRENCY_SYMBOLS.get(code, code)
+
+
+def render_summary_pdf(data, buffer):
+    """Write the PDF summary of an ExportData into buffer."""
+    user = data.user
+    label = currency_label(data.currency)
+
+    p = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - 50
+
+    # Ustawienie czcionki
+    p.setFont(FONT_BOLD, 16)
+    p.drawString(50, y, f"Finly - Podsumowanie dla {user.username}")
+    y -= 40
+
+    p.setFont(FONT, 12)
+    p.drawString(50, y, f"Przychody: {data.total_income:.2f} {label}")
+    y -= 20
+    p.drawString(50, y, f"Wydatki: {data.total_expense:.2f} {label}")
+    y -= 20
+    p.drawString(50, y, f"Bilans: {data.balance:.2f} {label}")
+    y -= 40
+
+    # Dodanie wydatków na kategorie
+    p.setFont(FONT_BOLD, 14)
+    p.drawString(50, y, "Wydatki na kategorie:")
+    y -= 30
+
+    p.setFont(FONT, 12)
+    for name, total in data.category_expenses:
+        p.drawString(50, y, f"{name}: {total:.2f} {label}")
+        y -= 20
+        if y < 50:
+            p.showPage()
+            p.setFont(FONT, 12)
+            y = height - 50
+
+    # Dodanie historii transakcji
+    p.setFont(FONT_BOLD, 14)
+    p.drawString(50, y, "Historia transakcji:")
+    y -= 30
+
+    p.setFont(FONT, 12)
+    for t_date, t_type, category_name, amount, description, currency in data.rows():
+        line = f"{t_date} | {amount} {currency_label(currency)} | {t_type} | {category_name or ''} | {description}"
+        if y < 50:
+            p.showPage()
+            p.setFont(FONT, 12)
+            y = height - 50
+        p.drawString(50, y, line)
+        y -= 20
+
+    p.showPage()
+    p.save()
+    return buffer
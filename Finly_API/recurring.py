@@ -0,0 +1,126 @@
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction as db_transaction
+from django.db.models import Max
+
+from . import budgets, rollups
+from .cache import bump_user_version
+from .models import Transaction, RecurringRule
+
+
+def occurrence(rule, index):
+    """Date of the index-th occurrence counted from the start date (not clamped to start/end)."""
+    if rule.frequency == 'weekly':
+        return rule.start_date + timedelta(weeks=index * rule.interval)
+    months = rule.start_date.month - 1 + index * rule.interval
+    year, month = rule.start_date.year + months // 12, months % 12 + 1
+    # 31. w krótszym miesiącu to ostatni dzień miesiąca
+    day = min(rule.day_of_month or rule.start_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def next_occurrence(rule, after=None):
+    """First occurrence on or after the start date and later than `after`; None past the end date."""
+    index = 0
+    if after is not None and after >= rule.start_date:
+        if rule.frequency == 'weekly':
+            index = (after - rule.start_date).days // (7 * rule.interval)
+        else:
+            months = (after.year - rule.start_date.year) * 12 + after.month - rule.start_date.month
+            index = months // rule.interval
+
+    day = occurrence(rule, index)
+    while day < rule.start_date or (after is not None and day <= after):
+        index += 1
+        day = occurrence(rule, index)
+    if rule.end_date and day > rule.end_date:
+        return None
+    return day
+
+
+def reschedule(rule):
+    """Set next_date after the last materialized occurrence, e.g. when the schedule changes."""
+    last = Transaction.objects.filter(recurring_rule=rule).aggregate(last=Max('date'))['last']
+    rule.next_date = next_occurrence(rule, last)
+
+
+def materialize_due(today, batch_size=1000):
+    """Create transactions for every occurrence up to `today` of all users' rules.
+
+    Works through the due rules `batch_size` at a time. Each batch locks its
+    rules (skipping ones a concurrent run holds), inserts the missing
+    occurrences with bulk_create and advances next_date in one database
+    transaction, so a re-run never duplicates; unique_recurring_occurrence
+    guards against anything else. bulk_create skips the signals, so the rollup
+    gets batched deltas and budget spend of the touched months is recomputed. Returns (rules, transactions created).
+    """
+    processed = created = 0
+    last_id = 0
+    while True:
+        with db_transaction.atomic():
+            rules = list(
+                RecurringRule.objects.select_for_update(skip_locked=True)
+                .filter(next_date__lte=today, id__gt=last_id)
+                .order_by('id')[:batch_size]
+            )
+            if not rules:
+                return processed, created
+            last_id = rules[-1].pk
+            created += _materialize_batch(rules, today, batch_size)
+            processed += len(rules)
+
+
+def _materialize_batch(rules, today, batch_size):
+    occurrences = []
+    for rule in rules:
+        day = rule.next_date
+        while day is not None and day <= today:
+            occurrences.append((rule, day))
+            day = next_occurrence(rule, day)
+        rule.next_date = day
+    _save_next_dates(rules)
+    if not occurrences:
+        return 0
+
+    # Wystąpienia utworzone wcześniej (np. przerwany przebieg) pomijamy
+    existing = set(
+        Transaction.objects.filter(
+            recurring_rule__in=rules, date__gte=min(day for _, day in occurrences), date__lte=today,
+        ).values_list('recurring_rule_id', 'date')
+    )
+    transactions = [
+        Transaction(
+            user_id=rule.user_id, amount=rule.amount, currency=rule.currency, type=rule.type,
+            category_id=rule.category_id, description=rule.description, date=day, recurring_rule=rule,
+        )
+        for rule, day in occurrences
+        if (rule.pk, day) not in existing
+    ]
+    Transaction.objects.bulk_create(transactions, batch_size=batch_size)
+
+    rollup_deltas = defaultdict(lambda: [0, 0])
+    for transaction in transactions:
+        month = rollups.month_start(transaction.date)
+        delta = rollup_deltas[
+            (transaction.user_id, month, transaction.category_id, transaction.type, transaction.currency)
+        ]
+        delta[0] += transaction.amount
+        delta[1] += 1
+    rollups.apply_deltas(rollup_deltas, batch_size=batch_size)
+    user_ids = {transaction.user_id for transaction in transactions}
+    budgets.refresh_budgets(budgets.budgets_between(min(day for _, day in occurrences), today, user_id__in=user_ids))
+    for user_id in user_ids:
+        bump_user_version(user_id)
+    return len(transactions)
+
+
+def _save_next_dates(rules):
+    # Jedno UPDATE na każdą nową datę zamiast bulk_update z CASE dla każdej reguły
+    by_date = defaultdict(list)
+    for rule in rules:
+        by_date[rule.next_date].append(rule.pk)
+    for next_date, ids in by_date.items():
+        RecurringRule.objects.filter(pk__in=ids).update(next_date=next_date)
+
@@ -0,0 +1,36 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # orjson jest opcjonalny
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that serializes with orjson when it is installed.
+
+    The bytes are the same as DRF's JSONRenderer: Decimal is rendered as a
+    float and datetimes, lazy strings etc. go through DRF's encoder (so
+    milliseconds and 'Z' for UTC are kept). Payloads orjson rejects (non-string
+    keys, ints over 64 bits) are rendered by the stdlib path instead.
+    Known differences, unreachable for 2-decimal amounts: NaN/Infinity become
+    null instead of raising, and floats in exponent form (>= 1e16, < 1e-4)
+    are spelled '1e16' instead of '1e+16'.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+    default = staticmethod(encoders.JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Wcięcia, ASCII i nie-kompaktowe separatory obsługuje tylko json ze stdlib
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
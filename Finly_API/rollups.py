@@ -0,0 +1,186 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Sum, Count, Min, F
+from django.db.models.functions import TruncMonth
+
+from .models import Transaction, MonthlyRollup
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def apply_delta(user_id, month, category_id, type, currency, amount, count):
+    """Add amount/count to a single rollup row, creating or dropping it as needed."""
+    with db_transaction.atomic():
+        # Wiersze z category=NULL po usuniętej kategorii scala merge_uncategorized;
+        # gdyby jeszcze było ich kilka, zmieniamy zawsze ten sam
+        rows = (
+            MonthlyRollup.objects.select_for_update()
+            .filter(user_id=user_id, month=month, category_id=category_id, type=type, currency=currency)
+            .order_by('pk')
+        )
+        row = rows.first()
+        if row is None:
+            if count <= 0:
+                return
+            try:
+                with db_transaction.atomic():
+                    MonthlyRollup.objects.create(
+                        user_id=user_id, month=month, category_id=category_id, type=type, currency=currency,
+                        total=amount, count=count,
+                    )
+                return
+            except IntegrityError:
+                # Równoległe żądanie utworzyło wiersz pierwsze
+                row = rows.first()
+
+        MonthlyRollup.objects.filter(pk=row.pk).update(total=F('total') + amount, count=F('count') + count)
+        MonthlyRollup.objects.filter(pk=row.pk, count__lte=0).delete()
+
+
+def merge_uncategorized(user_id):
+    """Merge the user's category=NULL rows left by a deleted category into one row per month/type/currency.
+
+    SET_NULL turns the deleted category's rows into duplicates of the existing
+    uncategorized ones; apply_delta only changes one of them, so a removal
+    could otherwise drop a row that still holds other transactions.
+    """
+    with db_transaction.atomic():
+        rows = MonthlyRollup.objects.select_for_update().filter(user_id=user_id, category__isnull=True)
+        duplicates = (
+            rows.order_by().values('month', 'type', 'currency')
+            .annotate(first=Min('pk'), rows=Count('pk'), total_sum=Sum('total'), count_sum=Sum('count'))
+            .filter(rows__gt=1)
+        )
+        for group in list(duplicates):
+            MonthlyRollup.objects.filter(pk=group['first']).update(total=group['total_sum'], count=group['count_sum'])
+            rows.filter(month=group['month'], type=group['type'], currency=group['currency']).exclude(
+                pk=group['first'],
+            ).delete()
+
+
+def apply_deltas(deltas, batch_size=1000):
+    """apply_delta for many rows at once: {(user_id, month, category_id, type, currency): (amount, count)}.
+
+    Like rebuild_rollup the touched rows are deleted and bulk-created again,
+    which is much cheaper than a bulk_update with one CASE per row.
+    """
+    if not deltas:
+        return
+    with db_transaction.atomic():
+        rows = {}
+        existing = (
+            MonthlyRollup.objects.select_for_update()
+            .filter(user_id__in={key[0] for key in deltas}, month__in={key[1] for key in deltas})
+            .order_by('pk')
+        )
+        for row in existing:
+            rows.setdefault((row.user_id, row.month, row.category_id, row.type, row.currency), row)
+
+        replaced, created = [], []
+        for key, (amount, count) in deltas.items():
+            row = rows.get(key)
+            if row is None:
+                user_id, month, category_id, type, currency = key
+                row = MonthlyRollup(
+                    user_id=user_id, month=month, category_id=category_id, type=type, currency=currency,
+                    total=0, count=0,
+                )
+            else:
+                replaced.append(row.pk)
+            row.total += amount
+            row.count += count
+            if row.count > 0:
+                row.pk = None
+                created.append(row)
+
+        MonthlyRollup.objects.filter(pk__in=replaced).delete()
+        MonthlyRollup.objects.bulk_create(created, batch_size=batch_size)
+
+
+def add_transaction(values):
+    apply_delta(values['user_id'], month_start(values['date']), values['category_id'], values['type'],
+                values['currency'], Decimal(values['amount']), 1)
+
+
+def remove_transaction(values):
+    apply_delta(values['user_id'], month_start(values['date']), values['category_id'], values['type'],
+                values['currency'], -Decimal(values['amount']), -1)
+
+
+def transaction_values(instance):
+    return {
+        'user_id': instance.user_id,
+        'date': instance.date,
+        'category_id': instance.category_id,
+        'type': instance.type,
+        'amount': instance.amount,
+        'currency': instance.currency,
+    }
+
+
+def aggregate_transactions(transactions):
+    """Group raw transactions the same way MonthlyRollup stores them."""
+    return (
+        transactions.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category_id', 'type', 'currency')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def rebuild_rollup(user=None, batch_size=1000, start=None, end=None):
+    """Recompute rollup rows from raw transactions.
+
+    start/end (any dates) limit the rebuild to the months they cover, which is
+    how bulk writes that bypass the signals (imports) bring the rollup up to date.
+    """
+    transactions = Transaction.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        rollups = rollups.filter(user=user)
+    if start is not None:
+        transactions = transactions.filter(date__gte=month_start(start))
+        rollups = rollups.filter(month__gte=month_start(start))
+    if end is not None:
+        transactions = transactions.filter(date__lt=next_month(end))
+        rollups = rollups.filter(month__lt=next_month(end))
+
+    with db_transaction.atomic():
+        rollups.delete()
+        rows = [MonthlyRollup(**row) for row in aggregate_transactions(transactions)]
+        MonthlyRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def verify_rollup(user=None):
+    """Return (key, expected, stored) tuples for rows that differ from raw transactions."""
+    transactions = Transaction.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        rollups = rollups.filter(user=user)
+
+    key_fields = ('user_id', 'month', 'category_id', 'type', 'currency')
+    expected = {
+        tuple(row[f] for f in key_fields): (row['total'], row['count'])
+        for row in aggregate_transactions(transactions)
+    }
+    stored = {
+        tuple(row[f] for f in key_fields): (row['total_sum'], row['count_sum'])
+        for row in rollups.values(*key_fields).annotate(total_sum=Sum('total'), count_sum=Sum('count'))
+    }
+
+    return [
+        (key, expected.get(key), stored.get(key))
+        for key in sorted(set(expected) | set(stored), key=str)
+        if expected.get(key) != stored.get(key)
+    ]
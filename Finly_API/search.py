@@ -0,0 +1,122 @@
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Transaction
+
+MAX_SEARCH_TERMS = 10
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'finly_transaction_fts'
+
+_fts_available = {}
+
+
+def search_terms(query):
+    """Words of the search query; ValueError when there are none."""
+    terms = re.findall(r'\w+', query)[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise ValueError("Search query must contain letters or digits.")
+    return terms
+
+
+def search_transactions(transactions, query):
+    """Keep transactions whose description matches every term (as a prefix) and annotate `rank`.
+
+    PostgreSQL uses the GIN full-text index plus trigram word similarity, so
+    typos like "Netflx" still match; SQLite uses the FTS5 table kept in sync
+    by triggers. Other databases fall back to icontains without ranking.
+    """
+    terms = search_terms(query)
+    connection = connections[transactions.db]
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(transactions, query, terms)
+    if connection.vendor == 'sqlite' and has_sqlite_fts(connection):
+        return _search_sqlite(transactions, terms)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(description__icontains=term)
+    return transactions.filter(condition).annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def _search_postgresql(transactions, query, terms):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, SearchVector, SearchVectorExact, TrigramWordSimilarity,
+    )
+
+    # Ten sam wyraz co w indeksie transaction_desc_fts_idx (Transaction.Meta.indexes)
+    vector = SearchVector('description', config=SEARCH_CONFIG)
+    prefix_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw')
+    return transactions.filter(
+        SearchVectorExact(vector, prefix_query) | TrigramWordSimilar(F('description'), Value(query))
+    ).annotate(
+        rank=SearchRank(vector, prefix_query) + TrigramWordSimilarity(Value(query), 'description'),
+    )
+
+
+def _search_sqlite(transactions, terms):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    table = connections[transactions.db].ops.quote_name(Transaction._meta.db_table)
+    return transactions.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,)),
+    ).annotate(
+        # bm25 jest ujemne, im mniejsze tym lepsze
+        rank=RawSQL(
+            f'(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id)',
+            (match,), output_field=FloatField(),
+        ),
+    )
+
+
+def has_sqlite_fts(connection):
+    if connection.alias not in _fts_available:
+        _fts_available[connection.alias] = FTS_TABLE in connection.introspection.table_names(include_views=True)
+    return _fts_available[connection.alias]
+
+
+def install_search_index(connection):
+    """Restore the SQLite FTS5 table and its triggers; safe to run repeatedly.
+
+    Migration 0008 creates them; the PostgreSQL GIN indexes are declared in
+    Transaction.Meta.indexes.
+    """
+    _fts_available.pop(connection.alias, None)
+    if connection.vendor != 'sqlite':
+        return
+    table = connection.ops.quote_name(Transaction._meta.db_table)
+    with connection.cursor() as cursor:
+        _install_sqlite_fts(cursor, table)
+
+
+def _install_sqlite_fts(cursor, table):
+    names = [FTS_TABLE, *(f'{FTS_TABLE}_{suffix}' for suffix in ('ai', 'ad', 'au'))]
+    cursor.execute(f"SELECT count(*) FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names)
+    if cursor.fetchone()[0] == len(names):
+        return
+    try:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(description, content={table}, '
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite bez FTS5: wyszukiwanie przez icontains
+        return
+    # Wyzwalacze łapią też bulk_create, update() i _raw_delete; przebudowa tabeli przez
+    # migrację SQLite je usuwa, dlatego post_migrate wywołuje tę funkcję ponownie
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description); END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description); END"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF description ON {table} BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description); "
+        f'INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description); END'
+    )
+    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
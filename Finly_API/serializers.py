@@ -1,19 +1,104 @@
-from rest_framework import serializers
+from datetime import date as date_type
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
-from .models import Transaction, Category, Budget
+from .currency import check_currency
+from .models import Transaction, Category, Budget, BudgetAlert, ExportJob, RecurringRule
+from .recurring import next_occurrence, reschedule
+
+class CurrencyField(serializers.CharField):
+    """ISO code of the base currency or of one with loaded exchange rates, upper-cased."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 3)
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            return check_currency(super().to_internal_value(data))
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
 
 class TransactionSerializer(serializers.ModelSerializer):
+    currency = CurrencyField()
+
     class Meta:
         model = Transaction
-        fields = ['id','user', 'amount', 'type', 'category', 'date', 'description', 'created_at']
+        fields = ['id','user', 'amount', 'currency', 'type', 'category', 'date', 'description', 'created_at',
+                  'recurring_rule']
         read_only_fields = ['user']
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
 
+class ValuesSerializer:
+    """Read-only fast path producing the same output as a ModelSerializer.
+
+    Rows come straight from queryset.values(*columns); each field gets a
+    precomputed converter instead of going through DRF field machinery.
+    """
+
+    def __init__(self, serializer_class):
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if getattr(field, 'write_only', False):
+                continue
+            self.fields.append((name, field.source, self.converter(field)))
+        self.columns = [source for _, source, _ in self.fields]
+
+    @staticmethod
+    def converter(field):
+        """Return a factory called once per to_representation() that yields the converter."""
+        if isinstance(field, serializers.DecimalField):
+            if not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) or field.localize:
+                return lambda: field.to_representation
+            quantum = Decimal(1).scaleb(-field.decimal_places)
+            return lambda: lambda value: '{:f}'.format(value.quantize(quantum))
+        if isinstance(field, serializers.DateTimeField):
+            if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+                return lambda: field.to_representation
+
+            def bind():
+                # Strefa czasowa jest ustalana raz na odpowiedź, a nie dla każdego wiersza
+                tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+                def to_iso(value):
+                    if tz is not None and timezone.is_aware(value):
+                        value = value.astimezone(tz)
+                    else:
+                        value = field.enforce_timezone(value)
+                    value = value.isoformat()
+                    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+                return to_iso
+            return bind
+        if isinstance(field, serializers.DateField):
+            if getattr(field, 'format', api_settings.DATE_FORMAT) != ISO_8601:
+                return lambda: field.to_representation
+            return lambda: date_type.isoformat
+        if isinstance(field, (serializers.PrimaryKeyRelatedField, serializers.IntegerField, serializers.CharField,
+                              serializers.ChoiceField)):
+            return lambda: None
+        return lambda: field.to_representation
+
+    def to_representation(self, rows):
+        fields = [(name, source, factory()) for name, source, factory in self.fields]
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in fields:
+                value = row[source]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -24,14 +109,71 @@ class CategorySerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 class BudgetSerializer(serializers.ModelSerializer):
+    currency = CurrencyField()
+
     class Meta:
         model = Budget
-        fields = ['id', 'category', 'amount', 'month']
+        fields = ['id', 'category', 'amount', 'currency', 'month', 'spent']
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
 
+class BudgetAlertSerializer(serializers.ModelSerializer):
+    category = serializers.CharField(source='budget.category.name', read_only=True, default=None)
+    month = serializers.DateField(source='budget.month', read_only=True)
+
+    class Meta:
+        model = BudgetAlert
+        fields = ['id', 'budget', 'category', 'month', 'threshold', 'amount', 'spent', 'created_at']
+        read_only_fields = fields
+
+class RecurringRuleSerializer(serializers.ModelSerializer):
+    currency = CurrencyField()
+
+    class Meta:
+        model = RecurringRule
+        fields = ['id', 'category', 'amount', 'currency', 'type', 'description', 'frequency', 'interval', 'day_of_month',
+                  'start_date', 'end_date', 'next_date', 'created_at']
+
+    def validate_category(self, value):
+        if value is not None and value.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError(f'Invalid pk "{value.pk}" - object does not exist.')
+        return value
+
+    def validate_interval(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Interval must be at least 1.")
+        return value
+
+    def validate_day_of_month(self, value):
+        if value is not None and not 1 <= value <= 31:
+            raise serializers.ValidationError("Day of month must be between 1 and 31.")
+        return value
+
+    def validate(self, attrs):
+        get = lambda name: attrs.get(name, getattr(self.instance, name, None))
+        if get('day_of_month') and get('frequency') == 'weekly':
+            raise serializers.ValidationError({"day_of_month": "Only monthly rules have a day of month."})
+        if get('end_date') and get('end_date') < get('start_date'):
+            raise serializers.ValidationError({"end_date": "End date must not be before the start date."})
+        return attrs
+
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        rule = RecurringRule(**validated_data)
+        rule.next_date = next_occurrence(rule)
+        rule.save()
+        return rule
+
+    def update(self, instance, validated_data):
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        # Zmiana harmonogramu liczy się od ostatniego utworzonego wystąpienia
+        reschedule(instance)
+        instance.save()
+        return instance
+
 class RegisterSerializer(serializers.Serializer):
    email = serializers.EmailField(
        required=True,
@@ -65,6 +207,62 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
+class ExportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExportJob
+        fields = ['id', 'status', 'filters', 'currency', 'error', 'created_at', 'finished_at']
+        read_only_fields = fields
+
+class TransactionFilterSerializer(serializers.Serializer):
+    """The filters of TransactionListView (type, category id or name, date range)."""
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES, required=False)
+    category = serializers.CharField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    # Pusty filtr obejmuje całą historię, więc trzeba o to poprosić wprost
+    all = serializers.BooleanField(required=False)
+
+    def to_internal_value(self, data):
+        # Literówka w nazwie klucza nie może po cichu zamienić się w pusty filtr
+        if isinstance(data, dict):
+            unknown = sorted(set(data) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError({key: "Unknown filter." for key in unknown})
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if not attrs.get('all') and not (set(attrs) - {'all'}):
+            raise serializers.ValidationError(
+                'Provide at least one of: type, category, start_date, end_date, or "all": true.'
+            )
+        return attrs
+
+class TransactionPatchSerializer(serializers.Serializer):
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), allow_null=True, required=False)
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES, required=False)
+    description = serializers.CharField(allow_blank=True, required=False)
+
+    def validate_category(self, value):
+        if value is not None and value.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError(f'Invalid pk "{value.pk}" - object does not exist.')
+        return value
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Provide at least one of: category, type, description.")
+        return attrs
+
+class TransactionBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=10000)
+    filter = TransactionFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        return attrs
 
+class TransactionBulkUpdateSerializer(TransactionBulkDeleteSerializer):
+    patch = TransactionPatchSerializer()
 
 
+TransactionValuesSerializer = ValuesSerializer(TransactionSerializer)
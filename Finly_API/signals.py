@@ -0,0 +1,85 @@
+from django.db import connections
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from . import budgets, rollups, search
+from .cache import bump_user_version, lock_user_data
+from .models import Transaction, Category, Budget
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction(sender, instance, raw=False, **kwargs):
+    instance._previous_values = None
+    if instance.pk and not raw:
+        instance._previous_values = (
+            Transaction.objects.filter(pk=instance.pk)
+            .values('user_id', 'date', 'category_id', 'type', 'amount', 'currency')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_values', None)
+    # Blokada najpierw: porządkuje równoległe zapisy użytkownika
+    lock_user_data(instance.user_id)
+    values = rollups.transaction_values(instance)
+    if previous:
+        rollups.remove_transaction(previous)
+    rollups.add_transaction(values)
+    # Edycja samego opisu nie zmienia budżetów
+    if previous != values:
+        if previous:
+            budgets.remove_transaction(previous)
+        budgets.add_transaction(values)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    values = rollups.transaction_values(instance)
+    lock_user_data(instance.user_id)
+    rollups.remove_transaction(values)
+    budgets.remove_transaction(values)
+
+
+@receiver(pre_save, sender=Budget)
+def compute_budget_spent(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.spent = budgets.compute_spent(instance)
+
+
+@receiver(post_save, sender=Budget)
+def record_budget_alerts(sender, instance, raw=False, **kwargs):
+    if not raw:
+        budgets.sync_alerts(instance)
+
+
+@receiver(post_delete, sender=Category)
+def refresh_uncategorized_budgets(sender, instance, **kwargs):
+    # SET_NULL przenosi transakcje i budżety kategorii do "bez kategorii"
+    rollups.merge_uncategorized(instance.user_id)
+    budgets.refresh_budgets(Budget.objects.filter(user_id=instance.user_id))
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Budget)
+def invalidate_user_cache(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Budget)
+def invalidate_user_cache_on_delete(sender, instance, **kwargs):
+    # Przy usuwaniu użytkownika jego wiersz wersji może już nie istnieć
+    bump_user_version(instance.user_id, create=False)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    # Migracje SQLite przebudowują tabelę transakcji i gubią wyzwalacze FTS5
+    if sender.name == 'Finly_API' and connections[using].vendor == 'sqlite':
+        search.install_search_index(connections[using])
@@ -1,3 +1,1531 @@
-from django.test import TestCase
+import csv
+import json
+import re
+import tempfile
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction as db_transaction
+from django.db.models import F, QuerySet, Sum
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .models import (
+    Transaction, Category, Budget, MonthlyRollup, ExportJob, RecurringRule,
+    BudgetAlert, FxRate, DataVersion,
+)
+from .bulk import raw_delete
+from .budgets import verify_budgets
+from .cache import get_cache, get_user_state
+from .currency import check_currency, clear_rate_cache, convert, rate, store_rates
+from .imports import CSV_HEADER, TransactionImporter, json_rows
+from . import metrics
+from .pagination import KeysetPagination
+from .pdf import render_summary_pdf
+from .renderers import FastJSONRenderer
+from .recurring import next_occurrence, occurrence
+from .rollups import apply_delta, rebuild_rollup, verify_rollup
+from .serializers import TransactionSerializer, TransactionValuesSerializer
+
+
+class FinlyTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='jan', password='haslo12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.food = Category.objects.create(user=self.user, name='Jedzenie', icon='food')
+        self.salary = Category.objects.create(user=self.user, name='Pensja', icon='cash')
+
+    def add(self, amount, type, category=None, days_ago=0, description=''):
+        return Transaction.objects.create(
+            user=self.user,
+            amount=Decimal(amount),
+            type=type,
+            category=category,
+            date=date.today() - timedelta(days=days_ago),
+            description=description,
+        )
+
+
+class StatisticsViewTests(FinlyTestCase):
+    def test_statistics_payload(self):
+        self.add('5000.00', 'income', self.salary, days_ago=1)
+        self.add('120.50', 'expense', self.food, days_ago=2)
+        self.add('79.50', 'expense', self.food, days_ago=40)
+        self.add('30.00', 'expense', None, days_ago=3)
+
+        response = self.client.get(reverse('statistics'))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['balance'], 4770.0)
+        self.assertEqual(data['last_30_days'], {'income': 5000.0, 'expense': 150.5})
+        self.assertEqual(data['by_category'], {
+            'Jedzenie': {'income': 0, 'expense': 200.0, 'icon': 'food'},
+            'Pensja': {'income': 5000.0, 'expense': 0, 'icon': 'cash'},
+        })
+        self.assertEqual(data['most_expense_category'], {'name': 'Jedzenie', 'amount': 200.0, 'icon': 'food'})
+        months = {
+            (date.today() - timedelta(days=days)).strftime('%Y-%m')
+            for days in (1, 2, 3, 40)
+        }
+        self.assertEqual(set(data['monthly']), months)
+        self.assertEqual(
+            sum(m['expense'] for m in data['monthly'].values()), 230.0
+        )
+
+    def test_statistics_empty(self):
+        data = self.client.get(reverse('statistics')).json()
+
+        self.assertEqual(data['balance'], 0)
+        self.assertEqual(data['by_category'], {})
+        self.assertEqual(data['most_expense_category'], {'name': None, 'amount': 0, 'icon': None})
+
+    def test_same_named_categories_use_oldest_category_icon(self):
+        newer = Category.objects.create(user=self.user, name='Jedzenie', icon='pizza')
+        self.add('10.00', 'expense', newer, days_ago=40)
+        self.add('20.00', 'expense', self.food, days_ago=1)
+
+        for params in ({}, {'start_date': '2000-01-01'}):
+            data = self.client.get(reverse('statistics'), params).json()
+            self.assertEqual(data['by_category']['Jedzenie'], {'income': 0, 'expense': 30.0, 'icon': 'food'}, params)
+            self.assertEqual(data['most_expense_category']['icon'], 'food')
+
+    def test_statistics_query_count_is_constant(self):
+        for i in range(50):
+            category = Category.objects.create(user=self.user, name=f'Kategoria {i}')
+            self.add('10.00', 'expense', category, days_ago=i * 7)
+            self.add('20.00', 'income', category, days_ago=i * 3)
+
+        # Wersja danych (klucz cache'u) i dwa zapytania agregujące
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('statistics'), {'type': 'expense'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_statistics_with_day_filter_matches_rollup(self):
+        self.add('100.00', 'expense', self.food, days_ago=1)
+        self.add('50.00', 'income', self.salary, days_ago=1)
+
+        from_rollup = self.client.get(reverse('statistics')).json()
+        from_transactions = self.client.get(reverse('statistics'), {'start_date': '2000-01-01'}).json()
+
+        self.assertEqual(from_rollup, from_transactions)
+
+
+class MonthlyRollupTests(FinlyTestCase):
+    def rollup(self):
+        return sorted(MonthlyRollup.objects.values_list('month', 'category__name', 'type', 'total', 'count'))
+
+    def test_rollup_follows_transaction_view_writes(self):
+        response = self.client.post('/api/transactions/', {
+            'amount': '40.00', 'type': 'expense', 'category': self.food.id, 'date': '2025-03-10',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.client.post('/api/transactions/', {
+            'amount': '60.00', 'type': 'expense', 'category': self.food.id, 'date': '2025-03-20',
+        })
+        self.assertEqual(self.rollup(), [(date(2025, 3, 1), 'Jedzenie', 'expense', Decimal('100.00'), 2)])
+
+        pk = response.json()['id']
+        self.client.patch(f'/api/transactions/{pk}/', {'category': self.salary.id, 'date': '2025-04-02'})
+        self.assertEqual(self.rollup(), [
+            (date(2025, 3, 1), 'Jedzenie', 'expense', Decimal('60.00'), 1),
+            (date(2025, 4, 1), 'Pensja', 'expense', Decimal('40.00'), 1),
+        ])
+
+        self.client.delete(f'/api/transactions/{pk}/')
+        self.assertEqual(self.rollup(), [(date(2025, 3, 1), 'Jedzenie', 'expense', Decimal('60.00'), 1)])
+        self.assertEqual(verify_rollup(self.user), [])
+
+    def test_deleted_category_keeps_totals(self):
+        self.add('10.00', 'expense', self.food)
+        self.add('15.00', 'expense', None)
+        self.food.delete()
+
+        self.add('5.00', 'expense', None)
+        Transaction.objects.filter(amount=Decimal('10.00')).get().delete()
+
+        self.assertEqual(verify_rollup(self.user), [])
+
+    def test_deleted_category_merges_uncategorized_rows(self):
+        self.add('10.00', 'expense', None)
+        self.add('50.00', 'expense', self.food)
+        self.food.delete()
+        self.assertEqual(MonthlyRollup.objects.filter(user=self.user).count(), 1)
+
+        Transaction.objects.get(amount=Decimal('50.00')).delete()
+        self.assertEqual(verify_rollup(self.user), [])
+        self.assertEqual(self.rollup(), [(date.today().replace(day=1), None, 'expense', Decimal('10.00'), 1)])
+
+    def test_concurrent_first_write_updates_existing_row(self):
+        self.add('10.00', 'expense', self.food, days_ago=0)
+        first = QuerySet.first
+        calls = []
+
+        def first_misses_once(queryset):
+            # Pierwszy odczyt jak w drugim żądaniu, zanim pierwsze utworzyło wiersz
+            calls.append(queryset.model)
+            return None if len(calls) == 1 else first(queryset)
+
+        with patch.object(QuerySet, 'first', first_misses_once):
+            apply_delta(self.user.pk, date.today().replace(day=1), self.food.pk, 'expense', 'PLN', Decimal('5.00'), 1)
+
+        self.assertEqual(self.rollup(), [(date.today().replace(day=1), 'Jedzenie', 'expense', Decimal('15.00'), 2)])
+
+    def test_failed_signal_rolls_back_the_save(self):
+        with patch('Finly_API.budgets.add_transaction', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/transactions/', {
+                    'amount': '40.00', 'type': 'expense', 'category': self.food.id, 'date': '2025-03-10',
+                })
+
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(self.rollup(), [])
+
+    def test_rebuild_command(self):
+        self.add('10.00', 'expense', self.food)
+        Transaction.objects.update(amount=Decimal('99.00'))
+        self.assertNotEqual(verify_rollup(), [])
+        version, _ = get_user_state(self.user.pk)
+
+        call_command('rebuild_rollups', stdout=StringIO())
+
+        self.assertEqual(verify_rollup(), [])
+        # update() pominął sygnały, więc dopiero przebudowa unieważnia cache
+        self.assertEqual(get_user_state(self.user.pk)[0], version + 1)
+        call_command('rebuild_rollups', user='jan', stdout=StringIO())
+        self.assertEqual(get_user_state(self.user.pk)[0], version + 2)
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+
+class ExportCSVViewTests(FinlyTestCase):
+    def test_streamed_csv_matches_buffered_output(self):
+        self.add('5000.00', 'income', self.salary, days_ago=1, description='Wypłata')
+        self.add('120.50', 'expense', self.food, days_ago=2, description='Zakupy; "Biedronka"')
+        self.add('30.00', 'expense', None, days_ago=3)
+
+        response = self.client.get(reverse('export-csv'))
+        streamed = b''.join(response.streaming_content)
+
+        expected = HttpResponse(content_type='text/csv; charset=utf-8-sig')
+        writer = csv.writer(expected, delimiter=';')
+        writer.writerow(['Podsumowanie', 'PLN'])
+        writer.writerow(['Przychody', '5000.00'])
+        writer.writerow(['Wydatki', '150.50'])
+        writer.writerow(['Bilans', '4849.50'])
+        writer.writerow([])
+        writer.writerow(['Wydatki na kategorie'])
+        for name, total in Transaction.objects.filter(type='expense').values_list('category__name').annotate(
+                total=Sum('amount')).order_by('category__name'):
+            writer.writerow([name, f"{total:.2f}"])
+        writer.writerow([])
+        writer.writerow(['Data', 'Typ', 'Kategoria', 'Kwota', 'Opis', 'Waluta'])
+        for t in Transaction.objects.all():
+            writer.writerow([t.date, t.type, t.category.name if t.category else '', f"{t.amount:.2f}", t.description,
+                             t.currency])
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8-sig')
+        self.assertEqual(streamed, expected.content)
+
+    def read(self, **params):
+        response = self.client.get(reverse('export-csv'), params)
+        self.assertEqual(response.status_code, 200)
+        return list(csv.reader(b''.join(response.streaming_content).decode('utf-8').replace('\ufeff', '').splitlines(),
+                               delimiter=';'))
+
+    def test_filters(self):
+        self.add('5000.00', 'income', self.salary, days_ago=40)
+        self.add('120.50', 'expense', self.food, days_ago=40)
+        self.add('30.00', 'expense', None, days_ago=1)
+        month = f"{date.today() - timedelta(days=40):%Y-%m}"
+
+        for params in ({'month': month}, {'start_date': (date.today() - timedelta(days=45)).isoformat(),
+                                          'end_date': (date.today() - timedelta(days=35)).isoformat()}):
+            rows = self.read(**params)
+            self.assertEqual(rows[1:4], [['Przychody', '5000.00'], ['Wydatki', '120.50'], ['Bilans', '4879.50']])
+            self.assertEqual(rows[6], ['Jedzenie', '120.50'])
+            self.assertEqual(len(rows[rows.index(['Data', 'Typ', 'Kategoria', 'Kwota', 'Opis', 'Waluta']) + 1:]), 2)
+
+        rows = self.read(type='expense', category='Jedzenie')
+        self.assertEqual(rows[1:4], [['Przychody', '0.00'], ['Wydatki', '120.50'], ['Bilans', '-120.50']])
+
+        self.assertEqual(self.client.get(reverse('export-csv'), {'start_date': 'wczoraj'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export-pdf'), {'month': '2025'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export-pdf'), {'month': month}).status_code, 200)
+
+    def test_summary_is_one_query(self):
+        for days_ago in range(10):
+            self.add('10.00', 'expense', self.food, days_ago=days_ago)
+        # Jedno zapytanie na podsumowanie i jedno strumieniujące wiersze
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('export-csv'))
+            b''.join(response.streaming_content)
+
+
+@override_settings(EXPORT_WORKERS=0)
+class ExportJobTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.export_dir.cleanup)
+        self.enterContext(override_settings(EXPORT_ROOT=self.export_dir.name))
+
+    def test_pdf_export_job_lifecycle(self):
+        self.add('120.50', 'expense', self.food, description='Zakupy')
+
+        response = self.client.post('/api/export-jobs/')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+        self.assertEqual(response.json()['status'], 'pending')
+        self.assertEqual(self.client.get(f'/api/export-jobs/{job_id}/download/').status_code, 409)
+
+        call_command('process_export_jobs', stdout=StringIO())
+
+        self.assertEqual(self.client.get(f'/api/export-jobs/{job_id}/').json()['status'], 'done')
+        download = self.client.get(f'/api/export-jobs/{job_id}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
+
+    def test_job_keeps_export_filters(self):
+        self.add('120.50', 'expense', self.food, days_ago=0)
+        self.add('80.00', 'expense', self.food, days_ago=400)
+        month = f'{date.today():%Y-%m}'
+        self.assertEqual(self.client.post('/api/export-jobs/?month=2025-13x').status_code, 400)
+
+        response = self.client.post(f'/api/export-jobs/?month={month}&type=expense')
+        self.assertEqual(response.json()['filters'], {'month': month, 'type': 'expense'})
+        self.assertEqual(response.json()['currency'], 'PLN')
+
+        with patch('Finly_API.jobs.render_summary_pdf', wraps=render_summary_pdf) as render:
+            call_command('process_export_jobs', stdout=StringIO())
+        data = render.call_args.args[0]
+        self.assertEqual((data.total_expense, data.currency), (Decimal('120.50'), 'PLN'))
+
+    def test_stale_and_expired_jobs(self):
+        stale = ExportJob.objects.create(user=self.user, status='running', started_at=now() - timedelta(hours=1))
+        old = ExportJob.objects.create(user=self.user, status='done', file_name='old.pdf',
+                                       finished_at=now() - timedelta(days=30))
+        (Path(self.export_dir.name) / 'old.pdf').write_bytes(b'%PDF')
+        missing = ExportJob.objects.create(user=self.user, status='done', file_name='missing.pdf', finished_at=now())
+
+        call_command('process_export_jobs', stdout=StringIO())
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        self.assertFalse((Path(self.export_dir.name) / 'old.pdf').exists())
+        self.assertEqual(self.client.get(f'/api/export-jobs/{old.pk}/download/').status_code, 410)
+        self.assertEqual(self.client.get(f'/api/export-jobs/{missing.pk}/download/').status_code, 410)
+
+    def test_jobs_are_private(self):
+        job = ExportJob.objects.create(user=self.user)
+        other = User.objects.create_user(username='anna', password='haslo12345')
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.client.get(f'/api/export-jobs/{job.pk}/').status_code, 404)
+
+
+class BudgetSummaryViewTests(FinlyTestCase):
+    def add_on(self, amount, category, day):
+        return Transaction.objects.create(
+            user=self.user, amount=Decimal(amount), type='expense', category=category, date=day
+        )
+
+    def test_budget_summary(self):
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('100.00'), month=date(2025, 4, 1))
+        Budget.objects.create(user=self.user, category=None, amount=Decimal('50.00'), month=date(2025, 4, 1))
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('10.00'), month=date(2025, 4, 15))
+        self.add_on('80.00', self.food, date(2025, 4, 3))
+        self.add_on('40.00', self.food, date(2025, 4, 20))
+        self.add_on('25.00', None, date(2025, 4, 30))
+        self.add_on('999.00', self.food, date(2025, 5, 1))
+
+        data = self.client.get(reverse('budget-summary')).json()
+
+        spent = {(row['category'], row['month'], row['budgeted']): row for row in data}
+        self.assertEqual(spent[('Jedzenie', '2025-04', 100.0)]['spent'], 120.0)
+        self.assertTrue(spent[('Jedzenie', '2025-04', 100.0)]['over_budget'])
+        self.assertEqual(spent[('Brak kategorii', '2025-04', 50.0)]['remaining'], 25.0)
+        self.assertEqual(spent[('Jedzenie', '2025-04', 10.0)]['spent'], 40.0)
+
+    def test_budget_summary_period_filters(self):
+        for month in (3, 4, 5):
+            Budget.objects.create(user=self.user, category=self.food, amount=Decimal('1.00'), month=date(2025, month, 1))
+
+        def months(params):
+            return sorted(row['month'] for row in self.client.get(reverse('budget-summary'), params).json())
+
+        self.assertEqual(months({'month': '2025-04'}), ['2025-04'])
+        self.assertEqual(months({'from': '2025-04', 'to': '2025-05'}), ['2025-04', '2025-05'])
+        self.assertEqual(self.client.get(reverse('budget-summary'), {'from': '04/2025'}).status_code, 400)
+
+    def test_budget_summary_query_count_is_constant(self):
+        for i in range(100):
+            category = Category.objects.create(user=self.user, name=f'Kategoria {i}')
+            Budget.objects.create(user=self.user, category=category, amount=Decimal('10.00'), month=date(2025, 1 + i % 12, 1))
+            self.add_on('5.00', category, date(2025, 1 + i % 12, 10))
+
+        # Wersja danych (klucz cache'u) i jedno zapytanie
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('budget-summary'))
+        self.assertEqual(len(response.json()), 100)
+        self.assertTrue(all(row['spent'] == 5.0 for row in response.json()))
+
+
+class CategoryListViewTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        # Ta sama nazwa, inna kategoria
+        self.other_food = Category.objects.create(user=self.user, name='Jedzenie', icon='pizza')
+        self.add('100.00', 'expense', self.food)
+        self.add('50.00', 'expense', self.food)
+        self.add('50.00', 'expense', self.other_food)
+        self.add('3000.00', 'income', self.salary)
+
+    def rows(self, **params):
+        response = self.client.get(reverse('category-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_groups_by_category_id(self):
+        rows = self.rows()
+
+        self.assertEqual([(row['category_id'], row['icon'], row['total_expense']) for row in rows], [
+            (self.food.id, 'food', 150.0), (self.other_food.id, 'pizza', 50.0), (self.salary.id, 'cash', 0),
+        ])
+
+    def test_ordering_and_slicing_in_sql(self):
+        # Wersja danych (klucz cache'u) i jedno zapytanie
+        with self.assertNumQueries(2):
+            rows = self.rows(order_by='total_income', limit=2, offset=1)
+        self.assertEqual([row['category_id'] for row in rows], [self.food.id, self.other_food.id])
+
+        rows = self.rows(order_by='name', direction='asc', limit=1)
+        self.assertEqual([row['category'] for row in rows], ['Jedzenie'])
+
+    def test_count_average_and_share(self):
+        rows = self.rows(include='count,average,share', limit=1)
+
+        self.assertEqual(rows, [{
+            'category_id': self.food.id, 'category': 'Jedzenie', 'icon': 'food',
+            'total_expense': 150.0, 'total_income': 0,
+            'transaction_count': 2, 'average_expense': 75.0, 'average_income': 0,
+            # Udział liczony względem wszystkich kategorii, nie tylko zwróconej strony
+            'expense_share': 75.0, 'income_share': 0,
+        }])
+        self.assertEqual([row['category_id'] for row in self.rows(order_by='expense_share', direction='asc')][:2],
+                         [self.salary.id, self.other_food.id])
+
+    def test_invalid_parameters(self):
+        for params in ({'order_by': 'amount'}, {'limit': '-1'}, {'offset': 'x'}, {'include': 'median'}):
+            response = self.client.get(reverse('category-list'), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+
+class TransactionValuesSerializerTests(FinlyTestCase):
+    def test_matches_model_serializer(self):
+        self.add('5000.00', 'income', self.salary, description='Wypłata')
+        self.add('0.50', 'expense', None, days_ago=400)
+        self.add('7', 'expense', self.food, days_ago=3, description='Zakupy; "Biedronka"')
+        transactions = Transaction.objects.all()
+
+        fast = TransactionValuesSerializer.to_representation(transactions.values(*TransactionValuesSerializer.columns))
+
+        self.assertEqual(fast, TransactionSerializer(transactions, many=True).data)
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(TransactionSerializer(transactions, many=True).data))
+
+    def test_list_endpoints_use_values(self):
+        self.add('10.00', 'expense', self.food)
+        expected = TransactionSerializer(Transaction.objects.all(), many=True).data
+
+        self.assertEqual(self.client.get(reverse('transaction-list')).json()['results'], expected)
+        self.assertEqual(self.client.get('/api/transactions/', {'paginate': 'false'}).json(), expected)
+
+
+class TransactionPaginationTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        # Kilka transakcji z tą samą datą i kwotą, żeby sprawdzić remisy
+        for i in range(25):
+            self.add(f'{i % 5}.00', 'expense', self.food, days_ago=i // 3)
+
+    def walk(self, url, params):
+        ids = []
+        response = self.client.get(url, params).json()
+        while True:
+            ids.extend(row['id'] for row in response['results'])
+            if not response['next']:
+                return ids, response
+            response = self.client.get(response['next']).json()
+
+    def test_pages_cover_ordering_without_duplicates(self):
+        expected = list(Transaction.objects.order_by('-date', '-created_at', '-id').values_list('id', flat=True))
+        ids, _ = self.walk(reverse('transaction-list'), {'page_size': 4})
+        self.assertEqual(ids, expected)
+
+        by_amount = list(Transaction.objects.order_by('-amount', '-id').values_list('id', flat=True))
+        ids, _ = self.walk(reverse('transaction-list'), {'page_size': 7, 'order_by': 'highest'})
+        self.assertEqual(ids, by_amount)
+
+        ids, _ = self.walk('/api/transactions/', {'page_size': 10})
+        self.assertEqual(ids, expected)
+
+    def test_previous_link(self):
+        first = self.client.get(reverse('transaction-list'), {'page_size': 10}).json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_page_size_cap_and_unpaginated_opt_in(self):
+        with patch.object(KeysetPagination, 'max_page_size', 10):
+            response = self.client.get(reverse('transaction-list'), {'page_size': 100000}).json()
+        self.assertEqual(len(response['results']), 10)
+
+        response = self.client.get(reverse('transaction-list'), {'paginate': 'false'}).json()
+        self.assertIsInstance(response, list)
+        self.assertEqual(len(response), 25)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('transaction-list'), {'cursor': 'nonsense'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_deep_page_query_count(self):
+        response = self.client.get(reverse('transaction-list'), {'page_size': 2}).json()
+        for _ in range(10):
+            response = self.client.get(response['next']).json()
+
+        # Wersja danych (ETag) i jedna strona transakcji
+        with self.assertNumQueries(2):
+            response = self.client.get(response['next']).json()
+        self.assertEqual(len(response['results']), 2)
+
+
+class QueryPlanTests(FinlyTestCase):
+    """EXPLAIN every query the main views run and reject full scans of transactions."""
+
+    table = Transaction._meta.db_table
+
+    def setUp(self):
+        super().setUp()
+        other = User.objects.create_user(username='anna', password='haslo12345')
+        other_category = Category.objects.create(user=other, name='Inne')
+        rows = []
+        for i in range(400):
+            owner, category = (self.user, self.food) if i % 2 else (other, other_category)
+            rows.append(Transaction(
+                user=owner, amount=Decimal(i % 97), type='expense' if i % 3 else 'income',
+                category=category, date=date(2024, 1, 1) + timedelta(days=i), description=f'Opis {i}',
+            ))
+        Transaction.objects.bulk_create(rows)
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('10.00'), month=date(2024, 3, 1))
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('10.00'), month=date(2024, 3, 15))
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Bez enable_seqscan planer i tak wybierze seq scan, jeśli brakuje indeksu
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+                return [row[0] for row in cursor.fetchall() if f'Seq Scan on "{self.table}"' in row[0]]
+
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            # Podzapytania używają aliasów (U0, U1...) zamiast nazwy tabeli
+            names = {self.table, *re.findall(rf'"{self.table}" (U\d+)', sql)}
+            return [row[-1] for row in cursor.fetchall()
+                    if row[-1].startswith('SCAN ') and row[-1].split()[1] in names]
+
+    def assert_no_full_scan(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+            if hasattr(response, 'streaming_content'):
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+
+        for query in queries.captured_queries:
+            if self.table not in query['sql']:
+                continue
+            self.assertEqual(self.full_scans(query['sql']), [], query['sql'])
+
+    def test_main_views_use_indexes(self):
+        self.assert_no_full_scan(reverse('statistics'))
+        self.assert_no_full_scan(reverse('statistics'), {'start_date': '2024-02-01', 'type': 'expense'})
+        self.assert_no_full_scan(reverse('transaction-list'))
+        self.assert_no_full_scan(reverse('transaction-list'), {'order_by': 'highest'})
+        self.assert_no_full_scan(reverse('transaction-list'), {'type': 'income', 'start_date': '2024-03-01'})
+        self.assert_no_full_scan(reverse('transaction-list'), {'category': self.food.id})
+        self.assert_no_full_scan('/api/transactions/')
+        self.assert_no_full_scan(reverse('category-list'))
+        self.assert_no_full_scan(reverse('budget-summary'))
+        self.assert_no_full_scan(reverse('export-csv'))
+
+
+class TransactionImportTests(FinlyTestCase):
+    def test_import_exported_csv(self):
+        self.add('5000.00', 'income', self.salary, days_ago=1, description='Wypłata')
+        self.add('120.50', 'expense', self.food, days_ago=2, description='Zakupy; "Biedronka"')
+        self.add('30.00', 'expense', None, days_ago=3)
+        exported = b''.join(self.client.get(reverse('export-csv')).streaming_content)
+        before = list(Transaction.objects.order_by('id').values_list('date', 'type', 'category', 'amount', 'description'))
+
+        response = self.client.generic('POST', reverse('transaction-import'), exported, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 3, 'error_count': 0, 'errors': []})
+        imported = list(Transaction.objects.order_by('id').values_list('date', 'type', 'category', 'amount', 'description'))[3:]
+        self.assertCountEqual(imported, before)
+        self.assertEqual(verify_rollup(self.user), [])
+
+    def test_import_uploaded_file(self):
+        upload = SimpleUploadedFile('historia.csv', '2025-01-05;expense;Jedzenie;12.30;Obiad\r\n'.encode('utf-8-sig'))
+
+        response = self.client.post(reverse('transaction-import'), {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Transaction.objects.get().description, 'Obiad')
+
+    def test_import_json_reports_row_errors(self):
+        rows = [
+            {'date': '2025-01-05', 'type': 'expense', 'category': 'Jedzenie', 'amount': '12.30'},
+            {'date': '2025-01-06', 'type': 'income', 'category': self.salary.id, 'amount': 100},
+            {'date': 'wczoraj', 'type': 'expense', 'amount': '1.00'},
+            {'date': '2025-01-07', 'type': 'gift', 'category': 'Nieznana', 'amount': '1.00'},
+        ]
+
+        response = self.client.post(reverse('transaction-import'), rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual([error['row'] for error in data['errors']], [3, 4])
+        self.assertEqual(set(data['errors'][1]['errors']), {'type', 'category'})
+
+    def test_import_batches_queries(self):
+        rows = [{'date': '2025-02-01', 'type': 'expense', 'category': 'Jedzenie', 'amount': '1.00'}] * 50
+
+        with patch.object(TransactionImporter, 'batch_size', 20), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('transaction-import'), rows, format='json')
+
+        self.assertEqual(response.json()['created'], 50)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "Finly_API_transaction"')]
+        self.assertEqual(len(inserts), 3)
+
+
+class AnalyticsCacheTests(FinlyTestCase):
+    def test_write_invalidates_cached_statistics(self):
+        self.add('100.00', 'expense', self.food)
+        first = self.client.get(reverse('statistics'))
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        # Tylko odczyt wersji danych użytkownika
+        with self.assertNumQueries(1):
+            cached = self.client.get(reverse('statistics'))
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.json(), first.json())
+
+        self.client.post('/api/transactions/', {
+            'amount': '50.00', 'type': 'expense', 'category': self.food.id, 'date': date.today().isoformat(),
+        })
+        fresh = self.client.get(reverse('statistics'))
+        self.assertEqual(fresh['X-Cache'], 'MISS')
+        self.assertEqual(fresh.json()['balance'], -150.0)
+
+    def test_cache_is_per_user_and_per_query(self):
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('10.00'), month=date(2025, 1, 1))
+        self.client.get(reverse('budget-summary'))
+        self.assertEqual(self.client.get(reverse('budget-summary'), {'month': '2025-01'})['X-Cache'], 'MISS')
+
+        other = User.objects.create_user(username='anna', password='haslo12345')
+        self.client.force_authenticate(other)
+        response = self.client.get(reverse('budget-summary'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json(), [])
+
+    def test_category_and_budget_writes_invalidate(self):
+        self.client.get(reverse('category-list'))
+        self.client.patch(f'/api/categories/{self.food.id}/', {'name': 'Żywność'})
+        self.assertEqual(self.client.get(reverse('category-list'))['X-Cache'], 'MISS')
+
+        self.client.get(reverse('budget-summary'))
+        self.client.post('/api/budgets/', {'category': self.food.id, 'amount': '10.00', 'month': '2025-01-01'})
+        self.assertEqual(self.client.get(reverse('budget-summary'))['X-Cache'], 'MISS')
+
+    def test_version_is_shared_through_the_database(self):
+        self.add('100.00', 'expense', self.food)
+        first = self.client.get(reverse('statistics'))
+
+        # Zapis w innym procesie (worker, komenda) widać tylko w bazie
+        DataVersion.objects.filter(user=self.user).update(version=F('version') + 1)
+
+        response = self.client.get(reverse('statistics'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_rolled_back_write_keeps_the_version(self):
+        self.add('100.00', 'expense', self.food)
+        version = DataVersion.objects.get(user=self.user).version
+
+        with self.assertRaises(RuntimeError), db_transaction.atomic():
+            self.add('50.00', 'expense', self.food)
+            raise RuntimeError
+
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, version)
+
+    def test_deleting_the_user_skips_the_version_row(self):
+        self.add('100.00', 'expense', self.food)
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('10.00'), month=date(2025, 1, 1))
+
+        self.user.delete()
+
+        self.assertFalse(DataVersion.objects.exists())
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.client.get(reverse('statistics'))
+        self.client.get(reverse('statistics'))
+        self.assertEqual(self.client.get(reverse('cache-stats')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        stats = self.client.get(reverse('cache-stats')).json()
+        self.assertGreaterEqual(stats['statistics.hit'], 1)
+        self.assertGreaterEqual(stats['statistics.miss'], 1)
+
+
+class ConditionalGetTests(FinlyTestCase):
+    def test_if_none_match_returns_304_after_reading_the_version(self):
+        self.add('100.00', 'expense', self.food)
+        for url in (reverse('statistics'), reverse('category-list'), reverse('transaction-list'), '/api/transactions/'):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertTrue(first.has_header('Last-Modified'))
+
+            # Tylko odczyt wersji danych użytkownika
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(reverse('transaction-list'))['ETag']
+        self.add('10.00', 'income', self.salary)
+
+        response = self.client.get(reverse('transaction-list'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_etag_depends_on_query(self):
+        first = self.client.get(reverse('transaction-list'))
+        response = self.client.get(reverse('transaction-list'), {'type': 'income'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+
+class FastJSONRendererTests(FinlyTestCase):
+    payloads = [
+        {'amount': Decimal('1234.50'), 'zero': Decimal('0.00'), 'negative': Decimal('-0.01'), 'int': 0},
+        {'date': date(2024, 2, 29), 'none': None, 'flag': True, 'list': (1, 2.5, 'a')},
+        {'created_at': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+         'naive': datetime(2024, 1, 2, 3, 4, 5), 'delta': timedelta(days=1, seconds=3)},
+        defaultdict(lambda: {'income': 0, 'expense': 0}, {'2024-01': {'income': Decimal('10.10'), 'expense': 0}}),
+        OrderedDict([('next', None), ('results', [{'id': uuid.UUID(int=1)}])]),
+        {'text': 'Zażółć gęślą jaźń \u2028 \u2029 "cudzysłów" \\ \n', 'lazy': gettext_lazy('Jedzenie')},
+        {1: 'int key', 'big': 2 ** 70},
+        [],
+        'string',
+    ]
+
+    def test_matches_json_renderer(self):
+        for payload in self.payloads:
+            self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload), payload)
+
+    def test_matches_without_orjson(self):
+        with patch('Finly_API.renderers.orjson', None):
+            for payload in self.payloads:
+                self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_indent_uses_stdlib(self):
+        payload = {'amount': Decimal('1.50'), 'list': [1, 2]}
+        media_type = 'application/json; indent=4'
+        self.assertEqual(FastJSONRenderer().render(payload, media_type), JSONRenderer().render(payload, media_type))
+
+    def test_views_render_with_fast_renderer(self):
+        self.add('5000.00', 'income', self.salary)
+        self.add('123.45', 'expense', self.food, days_ago=40)
+        self.add('0.10', 'expense', None)
+
+        for url in (reverse('statistics'), reverse('category-list'), reverse('budget-summary'), '/api/transactions/'):
+            response = self.client.get(url)
+            self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+            self.assertEqual(response.content, JSONRenderer().render(response.data), url)
+
+
+@override_settings(REQUEST_METRICS=True)
+class RequestMetricsTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.admin = User.objects.create_user(username='admin', password='haslo12345', is_staff=True)
+
+    def test_server_timing_header(self):
+        self.add('100.00', 'expense', self.food)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('statistics'))
+
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+, size;desc="\d+ bytes"$')
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertIn(f'desc="{len(response.content)} bytes"', timing)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('request-metrics')).status_code, 403)
+
+    def key(self, url):
+        return metrics.view_key(resolve(url))
+
+    def test_percentiles_per_view(self):
+        for _ in range(3):
+            self.client.get(reverse('statistics'))
+        self.client.get(reverse('budget-summary'))
+        self.client.get(reverse('export-csv'))
+
+        self.client.force_authenticate(self.admin)
+        data = self.client.get(reverse('request-metrics')).json()
+
+        self.assertTrue(data['enabled'])
+        statistics = data['views'][self.key(reverse('statistics'))]
+        self.assertEqual(statistics['GET']['count'], 3)
+        self.assertEqual(set(statistics['GET']['wall_ms']), {'p50', 'p95', 'p99'})
+        self.assertEqual(data['views'][self.key(reverse('budget-summary'))]['GET']['count'], 1)
+        # Rozmiar odpowiedzi strumieniowej jest nieznany
+        self.assertNotIn('size', data['views'][self.key(reverse('export-csv'))]['GET'])
+
+        self.assertEqual(self.client.delete(reverse('request-metrics')).status_code, 204)
+        # Zostaje tylko samo żądanie DELETE
+        self.assertEqual(list(metrics.summary()), [self.key(reverse('request-metrics'))])
+
+    def test_routes_sharing_a_url_name(self):
+        # Lista z routera i TransactionListView mają tę samą nazwę "transaction-list"
+        self.client.get('/api/transactions/')
+        self.client.get('/api/transaction-list/')
+        self.client.get('/api/transaction-list/')
+
+        views = metrics.summary()
+        self.assertEqual(views['transaction-list /api/transactions/']['GET']['count'], 1)
+        self.assertEqual(views['transaction-list /api/transaction-list/']['GET']['count'], 2)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([metrics.percentile(values, p) for p in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(metrics.percentile([7], 99), 7)
+
+    @override_settings(REQUEST_METRICS=False)
+    def test_disabled(self):
+        response = self.client.get(reverse('statistics'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(metrics.summary(), {})
+
+
+class SyntheticDataTests(TestCase):
+    def generate(self, **options):
+        call_command('generate_synthetic_data', users=2, transactions=300, months=6, end_date='2025-06-15',
+                     stdout=StringIO(), **options)
+        return list(Transaction.objects.order_by('user__username', 'date', 'amount').values_list(
+            'user__username', 'date', 'type', 'amount', 'category__name'))
+
+    def test_generates_reproducible_data(self):
+        first = self.generate(seed=7)
+        self.assertEqual(len(first), 600)
+        self.assertEqual(min(row[1] for row in first), date(2025, 1, 1))
+        self.assertEqual(max(row[1] for row in first), date(2025, 6, 15))
+        self.assertTrue(Budget.objects.filter(user__username='synthetic_1').exists())
+        self.assertEqual(verify_rollup(), [])
+
+        self.assertEqual(self.generate(seed=7, clear=True), first)
+        self.assertNotEqual(self.generate(seed=8, clear=True), first)
+
+    def test_refuses_existing_prefix(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+    def test_bench_routes_writes_results(self):
+        self.generate()
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('bench_routes', user='synthetic_1', iterations=2, warmup=0, output=output.name,
+                         routes=['statistics', 'transaction-list', 'transaction-update'], stdout=StringIO())
+            results = json.load(output)
+
+        self.assertEqual(results['meta']['transactions'], 300)
+        self.assertEqual(set(results['routes']), {'statistics', 'transaction-list', 'transaction-update'})
+        self.assertEqual(results['routes']['transaction-update']['status'], 200)
+        self.assertEqual(Transaction.objects.filter(description='bench_routes').count(), 0)
+        for result in results['routes'].values():
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries'], 0)
+
+
+class TimeSeriesViewTests(FinlyTestCase):
+    def add_on(self, day, amount, type, category=None):
+        transaction = self.add(amount, type, category)
+        Transaction.objects.filter(pk=transaction.pk).update(date=day)
+        # update() pomija sygnały
+        rebuild_rollup(self.user)
+        return transaction
+
+    def setUp(self):
+        super().setUp()
+        self.add_on(date(2025, 1, 6), '1000.00', 'income', self.salary)
+        self.add_on(date(2025, 1, 8), '100.00', 'expense', self.food)
+        self.add_on(date(2025, 1, 20), '50.50', 'expense', None)
+        self.add_on(date(2025, 3, 2), '200.00', 'expense', self.food)
+
+    def series(self, **params):
+        response = self.client.get(reverse('time-series'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_monthly_buckets_with_running_balance(self):
+        data = self.series()
+        self.assertEqual(data['interval'], 'month')
+        self.assertEqual(data['opening_balance'], 0)
+        self.assertEqual(data['series'], [
+            {'period': '2025-01-01', 'income': 1000.0, 'expense': 150.5, 'net': 849.5, 'balance': 849.5},
+            {'period': '2025-03-01', 'income': 0, 'expense': 200.0, 'net': -200.0, 'balance': 649.5},
+        ])
+
+    def test_gap_fill(self):
+        periods = [row['period'] for row in self.series(fill='true')['series']]
+        self.assertEqual(periods, ['2025-01-01', '2025-02-01', '2025-03-01'])
+
+        weeks = self.series(interval='week', fill='true', start_date='2025-01-01', end_date='2025-01-31')['series']
+        self.assertEqual([row['period'] for row in weeks],
+                         ['2024-12-30', '2025-01-06', '2025-01-13', '2025-01-20', '2025-01-27'])
+        self.assertEqual([row['balance'] for row in weeks], [0, 900.0, 900.0, 849.5, 849.5])
+
+    def test_day_and_year_intervals(self):
+        days = self.series(interval='day')['series']
+        self.assertEqual([row['period'] for row in days], ['2025-01-06', '2025-01-08', '2025-01-20', '2025-03-02'])
+        years = self.series(interval='year')['series']
+        self.assertEqual(years, [{'period': '2025-01-01', 'income': 1000.0, 'expense': 350.5, 'net': 649.5, 'balance': 649.5}])
+
+    def test_rollup_and_transactions_agree(self):
+        for interval in ('month', 'year'):
+            from_rollup = self.series(interval=interval)['series']
+            # Zakres dat wymusza czytanie surowych transakcji
+            from_transactions = self.series(interval=interval, start_date='2000-01-01')['series']
+            self.assertEqual(from_rollup, from_transactions)
+
+    def test_filters_and_opening_balance(self):
+        data = self.series(interval='day', start_date='2025-01-10', type='expense')
+        self.assertEqual(data['opening_balance'], -100.0)
+        self.assertEqual([row['balance'] for row in data['series']], [-150.5, -350.5])
+
+        self.assertEqual(self.series(start_date='2025-02-01')['opening_balance'], 849.5)
+        food = self.series(start_date='2025-03-05', category='Jedzenie')
+        self.assertEqual(food['opening_balance'], -300.0)
+
+        food = self.series(category='Jedzenie')['series']
+        self.assertEqual([row['expense'] for row in food], [100.0, 200.0])
+
+    def test_opening_balance_from_rollup_and_start_month(self):
+        for start in ('2024-12-31', '2025-01-01', '2025-01-07', '2025-01-21', '2025-02-01', '2025-03-02', '2025-04-01'):
+            before = Transaction.objects.filter(user=self.user, date__lt=start)
+            expected = sum(t.amount if t.type == 'income' else -t.amount for t in before)
+            self.assertEqual(self.series(interval='day', start_date=start)['opening_balance'], float(expected), start)
+
+    def test_invalid_parameters(self):
+        for params in ({'interval': 'hour'}, {'start_date': '2025-13-01'}, {'month': 'styczeń'},
+                       {'interval': 'day', 'fill': 'true', 'start_date': '1900-01-01'}):
+            response = self.client.get(reverse('time-series'), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+
+class TransactionBulkTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.expenses = [self.add(f'{10 * i}.00', 'expense', self.food, days_ago=20 * i) for i in range(1, 6)]
+        self.income = self.add('3000.00', 'income', self.salary, days_ago=3)
+        self.other = User.objects.create_user(username='ola', password='haslo12345')
+        self.foreign = Transaction.objects.create(user=self.other, amount=Decimal('99.00'), type='expense',
+                                                  date=date.today())
+
+    def assertConsistent(self):
+        self.assertEqual(verify_rollup(), [])
+
+    def statements(self, queries, verb):
+        return [q['sql'] for q in queries if q['sql'].startswith(f'{verb} "Finly_API_transaction"')]
+
+    def test_update_by_ids_in_one_statement(self):
+        ids = [t.pk for t in self.expenses[:3]] + [self.foreign.pk]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/transactions/bulk-update/', {
+                'ids': ids, 'patch': {'category': self.salary.pk, 'description': 'Zmiana'},
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {'updated': 3})
+        self.assertEqual(len(self.statements(queries, 'UPDATE')), 1)
+        self.assertEqual(Transaction.objects.filter(category=self.salary, description='Zmiana').count(), 3)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.description, '')
+        self.assertConsistent()
+
+    def test_update_type_by_filter(self):
+        statistics = self.client.get(reverse('statistics')).json()
+        start = (date.today() - timedelta(days=50)).isoformat()
+
+        response = self.client.post('/api/transactions/bulk-update/', {
+            'filter': {'type': 'expense', 'category': 'Jedzenie', 'start_date': start},
+            'patch': {'type': 'income'},
+        }, format='json')
+
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertConsistent()
+        # Wersja cache podbita, statystyki policzone od nowa
+        self.assertNotEqual(statistics['balance'], 2910.0)
+        self.assertEqual(self.client.get(reverse('statistics')).json()['balance'], 2910.0)
+
+    def test_delete_by_filter_in_one_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/transactions/bulk-delete/', {
+                'filter': {'category': str(self.food.pk)},
+            }, format='json')
+
+        self.assertEqual(response.json(), {'deleted': 5})
+        self.assertEqual(len(self.statements(queries, 'DELETE FROM')), 1)
+        self.assertEqual(list(Transaction.objects.filter(user=self.user)), [self.income])
+        self.assertTrue(Transaction.objects.filter(pk=self.foreign.pk).exists())
+        self.assertConsistent()
+        self.assertEqual(self.client.get(reverse('statistics')).json()['balance'], 3000.0)
+
+    def test_raw_delete_refuses_models_with_reverse_relations(self):
+        # Nowy klucz obcy do Transaction wymagałby kolektora usuwania
+        with patch.dict(Transaction._meta.__dict__, {'related_objects': (Category._meta.get_field('budget'),)}):
+            with self.assertRaises(RuntimeError):
+                raw_delete(Transaction.objects.filter(user=self.user))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), len(self.expenses) + 1)
+
+    def test_delete_by_ids_ignores_other_users(self):
+        response = self.client.post('/api/transactions/bulk-delete/', {'ids': [self.foreign.pk]}, format='json')
+        self.assertEqual(response.json(), {'deleted': 0})
+        self.assertTrue(Transaction.objects.filter(pk=self.foreign.pk).exists())
+
+    def test_invalid_payloads(self):
+        foreign_category = Category.objects.create(user=self.other, name='Obca')
+        for url, payload in (
+            ('/api/transactions/bulk-delete/', {}),
+            ('/api/transactions/bulk-delete/', {'ids': [1], 'filter': {}}),
+            ('/api/transactions/bulk-delete/', {'filter': {'start_date': '2025-02-30'}}),
+            ('/api/transactions/bulk-delete/', {'filter': {}}),
+            ('/api/transactions/bulk-delete/', {'filter': {'all': False}}),
+            ('/api/transactions/bulk-delete/', {'filter': {'categry': 'Jedzenie'}}),
+            ('/api/transactions/bulk-update/', {'filter': {}, 'patch': {'description': 'x'}}),
+            ('/api/transactions/bulk-update/', {'filter': {'categry': 'Jedzenie'}, 'patch': {'description': 'x'}}),
+            ('/api/transactions/bulk-update/', {'ids': [1], 'patch': {}}),
+            ('/api/transactions/bulk-update/', {'ids': [1], 'patch': {'type': 'transfer'}}),
+            ('/api/transactions/bulk-update/', {'ids': [1], 'patch': {'category': foreign_category.pk}}),
+        ):
+            response = self.client.post(url, payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), len(self.expenses) + 1)
+
+        response = self.client.post('/api/transactions/bulk-delete/', {'filter': {'all': True}}, format='json')
+        self.assertEqual(response.json(), {'deleted': len(self.expenses) + 1})
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertTrue(Transaction.objects.filter(pk=self.foreign.pk).exists())
+        self.assertConsistent()
+
+
+class AsyncAnalyticsViewTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add('5000.00', 'income', self.salary, days_ago=1)
+        self.add('120.50', 'expense', self.food, days_ago=2)
+        self.add('30.00', 'expense', None)
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('500.00'), month=date.today().replace(day=1))
+
+    async def test_same_payload_as_sync_views(self):
+        await self.async_client.aforce_login(self.user)
+        for name, params in (
+            ('statistics', {}),
+            ('statistics', {'month': f'{date.today():%Y-%m}', 'type': 'expense'}),
+            ('statistics', {'start_date': f'{date.today() - timedelta(days=5)}', 'end_date': f'{date.today()}'}),
+            ('category-list', {'order_by': 'name', 'direction': 'asc'}),
+            ('budget-summary', {}),
+        ):
+            await sync_to_async(get_cache().clear)()
+            expected = await sync_to_async(self.client.get)(reverse(name), params)
+            await sync_to_async(get_cache().clear)()
+            response = await self.async_client.get(reverse(f'{name}-async'), params)
+
+            self.assertEqual(response.status_code, 200, name)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertEqual(json.loads(response.content), expected.json(), (name, params))
+
+    async def test_shares_cache_with_sync_view(self):
+        await self.async_client.aforce_login(self.user)
+        await sync_to_async(self.client.get)(reverse('statistics'))
+        response = await self.async_client.get(reverse('statistics-async'))
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    async def test_conditional_get(self):
+        await self.async_client.aforce_login(self.user)
+        first = await self.async_client.get(reverse('category-list-async'))
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        response = await self.async_client.get(reverse('category-list-async'), headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_errors(self):
+        response = await self.async_client.get(reverse('statistics-async'))
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response.has_header('WWW-Authenticate'))
+
+        await self.async_client.aforce_login(self.user)
+        for name, params in (
+            ('statistics-async', {'month': 'styczen'}),
+            ('budget-summary-async', {'from': 'styczen'}),
+        ):
+            response = await self.async_client.get(reverse(name), params)
+            self.assertEqual(response.status_code, 400, name)
+            self.assertIn('error', json.loads(response.content))
+
+
+class TransactionSearchTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.netflix = self.add('43.00', 'expense', self.food, days_ago=40, description='Netflix')
+        self.netflix_long = self.add('60.00', 'expense', None, days_ago=3,
+                                     description='Netflix subscription family plan upgrade')
+        self.refund = self.add('43.00', 'income', self.salary, days_ago=1, description='netflix refund')
+        self.zabka = self.add('12.00', 'expense', self.food, description='Żabka')
+        self.add('20.00', 'expense', self.food, description='Spotify')
+
+    def search(self, **params):
+        response = self.client.get(reverse('transaction-list'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_matches_words_prefixes_and_diacritics(self):
+        self.assertEqual(set(self.search(search='NETFLIX')), {self.netflix.pk, self.netflix_long.pk, self.refund.pk})
+        self.assertEqual(self.search(search='netf subscr'), [self.netflix_long.pk])
+        self.assertEqual(self.search(search='zabka'), [self.zabka.pk])
+        self.assertEqual(self.search(search='hulu'), [])
+
+    def test_ranked_by_relevance_unless_ordered(self):
+        ids = self.search(search='netflix')
+        self.assertEqual(ids[-1], self.netflix_long.pk)
+        self.assertEqual(self.search(search='netflix', order_by='date'),
+                         [self.refund.pk, self.netflix_long.pk, self.netflix.pk])
+        self.assertEqual(self.search(search='netflix', order_by='highest')[0], self.netflix_long.pk)
+
+    def test_combines_with_filters(self):
+        self.assertEqual(self.search(search='netflix', type='expense', category=self.food.pk), [self.netflix.pk])
+        start = (date.today() - timedelta(days=5)).isoformat()
+        self.assertEqual(set(self.search(search='netflix', start_date=start)), {self.netflix_long.pk, self.refund.pk})
+
+    def test_pagination_over_rank(self):
+        for i in range(7):
+            self.add('1.00', 'expense', description='netflix ' + 'x ' * i)
+        expected = self.search(search='netflix', page_size=100)
+
+        ids = []
+        response = self.client.get(reverse('transaction-list'), {'search': 'netflix', 'page_size': 3}).json()
+        while True:
+            ids.extend(row['id'] for row in response['results'])
+            if not response['next']:
+                break
+            response = self.client.get(response['next']).json()
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(ids), 10)
+
+    def test_index_follows_bulk_writes(self):
+        created = Transaction.objects.bulk_create([
+            Transaction(user=self.user, amount=Decimal('5.00'), type='expense', date=date.today(), description='Hulu'),
+        ])
+        self.assertEqual(self.search(search='hulu'), [created[0].pk])
+
+        Transaction.objects.filter(pk=created[0].pk).update(description='Disney')
+        get_cache().clear()
+        self.assertEqual(self.search(search='hulu'), [])
+
+        raw_delete(Transaction.objects.filter(description='Disney'))
+        get_cache().clear()
+        self.assertEqual(self.search(search='disney'), [])
+
+    def test_uses_search_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.search(search='netflix')
+        self.assertIn('MATCH', queries[-1]['sql'])
+
+    def test_gin_indexes_only_on_postgresql(self):
+        from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLWrapper
+
+        indexes = [index for index in Transaction._meta.indexes if index.name.startswith('transaction_desc_')]
+        postgresql = PostgreSQLWrapper(connection.settings_dict, alias='postgresql')
+        with postgresql.schema_editor(collect_sql=True, atomic=False) as editor:
+            self.assertEqual([str(index.create_sql(Transaction, editor)) for index in indexes], [
+                'CREATE INDEX "transaction_desc_fts_idx" ON "Finly_API_transaction" USING gin '
+                "((to_tsvector('simple'::regconfig, COALESCE(\"description\", ''))))",
+                'CREATE INDEX "transaction_desc_trgm_idx" ON "Finly_API_transaction" USING gin ("description" gin_trgm_ops)',
+            ])
+        # Na SQLite migracje pomijają te indeksy, inaczej baza testowa by nie powstała
+
+    def test_invalid_query(self):
+        response = self.client.get(reverse('transaction-list'), {'search': '!!!'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RecurringRuleTests(FinlyTestCase):
+    def rule(self, user=None, **fields):
+        fields = {'amount': Decimal('50.00'), 'type': 'expense', 'start_date': date(2025, 1, 31), **fields}
+        rule = RecurringRule(user=user or self.user, **fields)
+        rule.next_date = next_occurrence(rule)
+        rule.save()
+        return rule
+
+    def dates(self, rule):
+        return list(Transaction.objects.filter(recurring_rule=rule).order_by('date').values_list('date', flat=True))
+
+    def test_schedule(self):
+        monthly = RecurringRule(frequency='monthly', interval=1, start_date=date(2025, 1, 31))
+        self.assertEqual([occurrence(monthly, i) for i in range(3)],
+                         [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)])
+        self.assertEqual(next_occurrence(monthly, date(2025, 2, 28)), date(2025, 3, 31))
+
+        every_other = RecurringRule(frequency='monthly', interval=2, day_of_month=10, start_date=date(2025, 1, 15),
+                                    end_date=date(2025, 7, 1))
+        self.assertEqual(next_occurrence(every_other), date(2025, 3, 10))
+        self.assertEqual(next_occurrence(every_other, date(2025, 3, 10)), date(2025, 5, 10))
+        self.assertIsNone(next_occurrence(every_other, date(2025, 5, 10)))
+
+        weekly = RecurringRule(frequency='weekly', interval=2, start_date=date(2025, 1, 6))
+        self.assertEqual(next_occurrence(weekly, date(2025, 1, 6)), date(2025, 1, 20))
+        self.assertEqual(next_occurrence(weekly, date(2025, 1, 25)), date(2025, 2, 3))
+
+    def test_materialize_is_idempotent_and_keeps_derived_data(self):
+        other = User.objects.create_user(username='ola', password='haslo12345')
+        rent = self.rule(category=self.food, description='Czynsz')
+        salary = self.rule(type='income', amount=Decimal('4000.00'), category=self.salary, day_of_month=10,
+                           start_date=date(2025, 1, 1))
+        weekly = self.rule(user=other, frequency='weekly', start_date=date(2025, 3, 3), end_date=date(2025, 3, 20))
+
+        out = StringIO()
+        call_command('materialize_recurring', date='2025-04-15', batch_size=2, stdout=out)
+        self.assertIn('Materialized 10 transactions from 3 rules', out.getvalue())
+        self.assertEqual(self.dates(rent), [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)])
+        self.assertEqual(len(self.dates(salary)), 4)
+        self.assertEqual(self.dates(weekly), [date(2025, 3, 3), date(2025, 3, 10), date(2025, 3, 17)])
+        rent.refresh_from_db()
+        weekly.refresh_from_db()
+        self.assertEqual(rent.next_date, date(2025, 4, 30))
+        self.assertIsNone(weekly.next_date)
+
+        self.assertEqual(verify_rollup(), [])
+        self.assertEqual(self.client.get(reverse('statistics')).json()['balance'], 15850.0)
+
+        # Ponowne uruchomienie i zgubione next_date nie tworzą duplikatów
+        call_command('materialize_recurring', date='2025-04-15', stdout=StringIO())
+        RecurringRule.objects.filter(pk=rent.pk).update(next_date=date(2025, 1, 31))
+        call_command('materialize_recurring', date='2025-04-15', stdout=StringIO())
+        self.assertEqual(Transaction.objects.count(), 10)
+        self.assertEqual(verify_rollup(), [])
+        with self.assertRaises(IntegrityError), db_transaction.atomic():
+            Transaction.objects.create(user=self.user, amount=1, type='expense', date=date(2025, 1, 31),
+                                       recurring_rule=rent)
+
+    def test_api(self):
+        response = self.client.post('/api/recurring-rules/', {
+            'amount': '39.99', 'type': 'expense', 'category': self.food.pk, 'description': 'Netflix',
+            'frequency': 'monthly', 'day_of_month': 31, 'start_date': '2025-02-01',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['next_date'], '2025-02-28')
+
+        rule = RecurringRule.objects.get(pk=response.json()['id'])
+        call_command('materialize_recurring', date='2025-03-05', stdout=StringIO())
+        response = self.client.patch(f'/api/recurring-rules/{rule.pk}/', {'day_of_month': 15}, format='json')
+        self.assertEqual(response.json()['next_date'], '2025-03-15')
+
+        foreign = Category.objects.create(user=User.objects.create_user(username='ola'), name='Obca')
+        for payload in (
+            {'category': foreign.pk},
+            {'frequency': 'weekly'},
+            {'interval': 0},
+            {'end_date': '2024-01-01'},
+        ):
+            response = self.client.patch(f'/api/recurring-rules/{rule.pk}/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+
+
+class BudgetAlertTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.month = date.today().replace(day=1)
+        self.budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('100.00'), month=self.month)
+
+    def alerts(self):
+        return list(BudgetAlert.objects.filter(budget=self.budget).order_by('threshold').values_list('threshold', 'spent'))
+
+    def test_spend_is_maintained_on_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.add('30.00', 'expense', self.food)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "Finly_API_budget"')]
+        self.assertEqual(len(updates), 1)
+
+        self.add('500.00', 'income', self.food)
+        second = self.add('20.00', 'expense', self.food)
+        self.add('5.00', 'expense', None)
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent, Decimal('50.00'))
+
+        first.amount = Decimal('40.00')
+        first.save()
+        second.delete()
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent, Decimal('40.00'))
+        self.assertEqual(verify_budgets(), [])
+
+    def test_thresholds_recorded_once(self):
+        self.add('70.00', 'expense', self.food)
+        self.assertEqual(self.alerts(), [])
+        crossing = self.add('15.00', 'expense', self.food)
+        self.assertEqual(self.alerts(), [(80, Decimal('85.00'))])
+
+        crossing.delete()
+        self.add('40.00', 'expense', self.food)
+        self.assertEqual(self.alerts(), [(80, Decimal('85.00')), (100, Decimal('110.00'))])
+
+    def test_budget_created_after_spending(self):
+        self.add('90.00', 'expense', None)
+        budget = Budget.objects.create(user=self.user, category=None, amount=Decimal('100.00'), month=self.month)
+        self.assertEqual(budget.spent, Decimal('90.00'))
+        self.assertEqual(list(budget.alerts.values_list('threshold', flat=True)), [80])
+
+    def test_bulk_writes_refresh_spend(self):
+        transactions = [self.add('10.00', 'expense', self.food) for _ in range(9)]
+        response = self.client.post('/api/transactions/bulk-update/', {
+            'ids': [t.pk for t in transactions[:5]], 'patch': {'category': None},
+        }, format='json')
+        self.assertEqual(response.json(), {'updated': 5})
+        self.assertEqual(verify_budgets(), [])
+
+        TransactionImporter(self.user).run(json_rows([
+            {'date': date.today().isoformat(), 'type': 'expense', 'amount': '80.00', 'category': 'Jedzenie'},
+        ]))
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent, Decimal('120.00'))
+        self.assertEqual([threshold for threshold, _ in self.alerts()], [80, 100])
+
+        self.client.post('/api/transactions/bulk-delete/', {'filter': {'category': str(self.food.pk)}}, format='json')
+        self.assertEqual(verify_budgets(), [])
+
+        self.food.delete()
+        self.assertEqual(verify_budgets(), [])
+
+    def test_alert_list(self):
+        other = User.objects.create_user(username='ola')
+        other_budget = Budget.objects.create(user=other, amount=Decimal('1.00'), month=self.month)
+        Transaction.objects.create(user=other, amount=Decimal('5.00'), type='expense', date=date.today())
+        self.add('200.00', 'expense', self.food)
+
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/budget-alerts/').json()
+        self.assertEqual([(row['threshold'], row['category'], row['budget']) for row in data['results']],
+                         [(80, 'Jedzenie', self.budget.pk), (100, 'Jedzenie', self.budget.pk)][::-1])
+        self.assertEqual(self.client.get('/api/budget-alerts/', {'budget': other_budget.pk}).json()['results'], [])
+
+
+class CurrencyTests(FinlyTestCase):
+    def setUp(self):
+        super().setUp()
+        clear_rate_cache()
+        store_rates({
+            ('EUR', date(2025, 1, 3)): Decimal('4.20'),
+            ('EUR', date(2025, 1, 6)): Decimal('4.30'),
+            ('USD', date(2025, 1, 3)): Decimal('4.00'),
+        })
+
+    def add_in(self, amount, currency, type, category, day):
+        return Transaction.objects.create(
+            user=self.user, amount=Decimal(amount), currency=currency, type=type, category=category, date=day,
+        )
+
+    def add_mixed(self):
+        self.add_in('100.00', 'PLN', 'expense', self.food, date(2025, 1, 4))
+        self.add_in('10.00', 'EUR', 'expense', self.food, date(2025, 1, 4))
+        self.add_in('1000.00', 'EUR', 'income', self.salary, date(2025, 1, 6))
+        self.add_in('5.00', 'USD', 'expense', self.food, date(2025, 1, 10))
+
+    def test_rates(self):
+        # Sobota dostaje kurs piątku, po ostatnim kursie obowiązuje ostatni, przed pierwszym pierwszy
+        self.assertEqual(FxRate.objects.filter(currency='EUR').count(), 4)
+        self.assertEqual(rate('EUR', date(2025, 1, 4)), Decimal('4.20'))
+        self.assertEqual(rate('EUR', date(2025, 2, 1)), Decimal('4.30'))
+        self.assertEqual(rate('EUR', date(2024, 12, 1)), Decimal('4.20'))
+        self.assertEqual(rate('PLN', date(2025, 1, 4)), 1)
+        with self.assertNumQueries(0):
+            rate('EUR', date(2025, 1, 4))
+        with self.assertNumQueries(1):
+            rate('EUR', date(2025, 2, 1))
+
+        self.assertEqual(convert(Decimal('100.00'), 'PLN', 'EUR', date(2025, 1, 4)), Decimal('23.81'))
+        self.assertEqual(convert(Decimal('5.00'), 'USD', 'EUR', date(2025, 1, 10)), Decimal('4.65'))
+        with self.assertRaises(ValueError):
+            rate('GBP', date(2025, 1, 4))
+
+    def test_statistics_in_reporting_currency(self):
+        self.add_mixed()
+        self.assertEqual(verify_rollup(), [])
+        self.assertEqual(MonthlyRollup.objects.filter(user=self.user, category=self.food).count(), 3)
+
+        month = self.client.get(reverse('statistics'), {'month': '2025-01'}).json()
+        dates = self.client.get(reverse('statistics'), {'start_date': '2025-01-01', 'end_date': '2025-01-31'}).json()
+        self.assertEqual(month, dates)
+        self.assertEqual(month['by_category']['Jedzenie'], {'income': 0, 'expense': 162.0, 'icon': 'food'})
+        self.assertEqual(month['balance'], 4138.0)
+
+        # Pierwsze użycie waluty sprawdza, czy ma kursy; potem tylko wersja danych i te same dwa zapytania
+        with self.assertNumQueries(4):
+            euro = self.client.get(reverse('statistics'), {'month': '2025-01', 'currency': 'eur'}).json()
+        with self.assertNumQueries(3):
+            self.client.get(reverse('statistics'), {'month': '2025-01', 'type': 'expense', 'currency': 'EUR'})
+        self.assertEqual(euro['by_category']['Jedzenie']['expense'], 38.46)
+        self.assertEqual(euro['monthly'], {'2025-01': {'income': 1000.0, 'expense': 38.46}})
+        self.assertEqual(
+            self.client.get(reverse('statistics'), {'start_date': '2025-01-01', 'currency': 'EUR'}).json()['balance'],
+            euro['balance'],
+        )
+
+        response = self.client.get(reverse('statistics'), {'currency': 'GBP'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('GBP', response.json()['error'])
+
+    def test_category_list_and_export_in_reporting_currency(self):
+        self.add_mixed()
+        rows = {row['category']: row for row in self.client.get(reverse('category-list'), {'currency': 'EUR'}).json()}
+        self.assertEqual(rows['Jedzenie']['total_expense'], 38.46)
+        self.assertEqual(rows['Pensja']['total_income'], 1000.0)
+
+        response = self.client.get(reverse('export-csv'), {'currency': 'EUR'})
+        lines = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').replace('﻿', '').splitlines(),
+                                delimiter=';'))
+        self.assertEqual(lines[0], ['Podsumowanie', 'EUR'])
+        self.assertEqual(lines[2], ['Wydatki', '38.46'])
+        self.assertEqual(sorted(line[-1] for line in lines[lines.index(CSV_HEADER) + 1:]), ['EUR', 'EUR', 'PLN', 'USD'])
+
+    def test_rollup_conversion_stays_within_the_month(self):
+        self.add_mixed()
+        self.add_in('43.00', 'PLN', 'expense', self.food, date(2025, 2, 1))
+        self.add_in('8.60', 'PLN', 'expense', self.food, date(2024, 12, 31))
+        rows = {row['category']: row for row in self.client.get(reverse('category-list'), {'currency': 'EUR'}).json()}
+        # Każdy miesiąc przeliczany kursami swoich dni: 38.46 + 43/4.30 + 8.60/4.20
+        self.assertEqual(rows['Jedzenie']['total_expense'], 50.51)
+
+    def test_time_series_in_reporting_currency(self):
+        self.add_in('100.00', 'EUR', 'income', self.salary, date(2025, 1, 6))
+        self.add_in('100.00', 'PLN', 'expense', self.food, date(2025, 1, 8))
+        self.assertEqual(self.client.get(reverse('statistics')).json()['balance'], 330.0)
+
+        for params in ({}, {'start_date': '2025-01-01'}):
+            series = self.client.get(reverse('time-series'), params).json()['series']
+            self.assertEqual(series, [{'period': '2025-01-01', 'income': 430.0, 'expense': 100.0, 'net': 330.0,
+                                       'balance': 330.0}], params)
+        self.assertEqual(
+            self.client.get(reverse('time-series'), {'start_date': '2025-01-07'}).json()['opening_balance'], 430.0,
+        )
+        self.assertEqual(
+            self.client.get(reverse('time-series'), {'start_date': '2025-02-01'}).json()['opening_balance'], 330.0,
+        )
+
+        euro = self.client.get(reverse('time-series'), {'interval': 'day', 'currency': 'EUR'}).json()['series']
+        self.assertEqual([(row['income'], row['expense'], row['balance']) for row in euro],
+                         [(100.0, 0, 100.0), (0, 23.26, 76.74)])
+        response = self.client.get(reverse('time-series'), {'currency': 'GBP'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_budget_spend_in_budget_currency(self):
+        pln_budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('150.00'), month=date(2025, 1, 1))
+        eur_budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('50.00'), currency='EUR',
+                                     month=date(2025, 1, 1))
+        self.add_mixed()
+        pln_budget.refresh_from_db()
+        eur_budget.refresh_from_db()
+        self.assertEqual((pln_budget.spent, eur_budget.spent), (Decimal('162.00'), Decimal('38.46')))
+        self.assertEqual(list(pln_budget.alerts.order_by('threshold').values_list('threshold', flat=True)), [80, 100])
+        self.assertEqual(verify_budgets(), [])
+
+        Transaction.objects.get(currency='USD').delete()
+        eur_budget.refresh_from_db()
+        self.assertEqual(eur_budget.spent, Decimal('33.81'))
+        self.assertEqual(verify_budgets(), [])
+
+        check_currency('EUR')
+        # Wersja danych użytkownika i jedno zapytanie o budżety
+        with self.assertNumQueries(2):
+            summary = self.client.get(reverse('budget-summary'), {'currency': 'EUR'}).json()
+        converted = {row['id']: row for row in summary}
+        self.assertEqual(converted[pln_budget.pk]['currency'], 'EUR')
+        self.assertEqual((converted[pln_budget.pk]['budgeted'], converted[pln_budget.pk]['spent']), (35.71, 33.81))
+        self.assertEqual(converted[eur_budget.pk]['spent'], 33.81)
+        own = {row['id']: row for row in self.client.get(reverse('budget-summary')).json()}
+        self.assertEqual((own[pln_budget.pk]['currency'], own[pln_budget.pk]['spent']), ('PLN', 142.0))
+
+    def test_currency_validation(self):
+        payload = {'amount': '12.00', 'type': 'expense', 'date': '2025-01-04'}
+        response = self.client.post('/api/transactions/', {**payload, 'currency': 'eur'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['currency'], 'EUR')
+        self.assertEqual(self.client.post('/api/transactions/', payload, format='json').json()['currency'], 'PLN')
+        response = self.client.post('/api/transactions/', {**payload, 'currency': 'GBP'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('currency', response.json())
+
+        result = TransactionImporter(self.user).run(json_rows([
+            {'date': '2025-01-04', 'type': 'expense', 'amount': '1.00', 'currency': 'usd'},
+            {'date': '2025-01-04', 'type': 'expense', 'amount': '1.00', 'currency': 'GBP'},
+        ]))
+        self.assertEqual((result.created, result.errors[0]['row']), (1, 2))
+        self.assertTrue(Transaction.objects.filter(currency='USD').exists())
+        self.assertEqual(verify_rollup(), [])
+
+    def test_load_fx_rates_command(self):
+        budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('100.00'), month=date(2025, 1, 1))
+        self.add_in('10.00', 'EUR', 'expense', self.food, date(2025, 1, 8))
+        budget.refresh_from_db()
+        self.assertEqual(budget.spent, Decimal('43.00'))
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('date,currency,rate\n2025-01-07,eur,4.40\n2025-01-09,EUR,4.50\n')
+        out = StringIO()
+        call_command('load_fx_rates', file.name, stdout=out)
+        self.assertIn('Stored 3 rates of EUR', out.getvalue())
+        self.assertEqual(rate('EUR', date(2025, 1, 8)), Decimal('4.40'))
+        budget.refresh_from_db()
+        self.assertEqual(budget.spent, Decimal('44.00'))
+
+        for content in ('day,currency,rate\n', 'date,currency,rate\n2025-01-07,EUR,-1\n', 'date,currency,rate\n2025-01-07,PLN,1\n'):
+            with open(file.name, 'w') as bad:
+                bad.write(content)
+            with self.assertRaises(CommandError):
+                call_command('load_fx_rates', file.name, stdout=StringIO())
@@ -1,25 +1,39 @@
 from django.urls import path, include
 from rest_framework import routers
 from .serializers import TransactionSerializer, CategorySerializer, BudgetSerializer
+from .async_views import AsyncStatisticsView, AsyncCategoryListView, AsyncBudgetSummaryView
 from .views import (
         TransactionView, CategoryView, BudgetView, RegisterView,
-        UserView, StatisticsView, ExportCSVView, ExportPDFView, TransactionListView,CategoryListView,BudgetSummaryView)
+        UserView, StatisticsView, ExportCSVView, ExportPDFView, TransactionListView,CategoryListView,BudgetSummaryView,
+        ExportJobView, TransactionImportView, CacheStatsView, RequestMetricsView,
+        TimeSeriesView, RecurringRuleView, BudgetAlertView)
 
 router = routers.DefaultRouter()
 router.register(r'transactions',TransactionView, basename='transaction')
 router.register(r'categories', CategoryView, basename='category')
 router.register(r'budgets', BudgetView, basename='budget')
+router.register(r'recurring-rules', RecurringRuleView, basename='recurring-rule')
+router.register(r'budget-alerts', BudgetAlertView, basename='budget-alert')
 router.register(r'register', RegisterView, basename='register')
 router.register(r'users', UserView)
+router.register(r'export-jobs', ExportJobView, basename='export-job')
 
 urlpatterns = [
         path('', include(router.urls)),
         path('statistics/', StatisticsView.as_view(), name='statistics'),
+        path('time-series/', TimeSeriesView.as_view(), name='time-series'),
         path('export-csv/', ExportCSVView.as_view(), name='export-csv'),
         path('export-pdf/', ExportPDFView.as_view(), name='export-pdf'),
         path('transaction-list/', TransactionListView.as_view(), name='transaction-list'),
+        path('transaction-import/', TransactionImportView.as_view(), name='transaction-import'),
         path('category-list/', CategoryListView.as_view(), name='category-list'),
-        path('budgets-summary/', BudgetSummaryView.as_view(), name='budget-summary')
+        path('budgets-summary/', BudgetSummaryView.as_view(), name='budget-summary'),
+        # Warianty asynchroniczne (ASGI), te same odpowiedzi i wpisy w cache
+        path('async/statistics/', AsyncStatisticsView.as_view(), name='statistics-async'),
+        path('async/category-list/', AsyncCategoryListView.as_view(), name='category-list-async'),
+        path('async/budgets-summary/', AsyncBudgetSummaryView.as_view(), name='budget-summary-async'),
+        path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
+        path('request-metrics/', RequestMetricsView.as_view(), name='request-metrics'),
 
 
 ]
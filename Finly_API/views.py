@@ -1,33 +1,74 @@
 import csv
-from calendar import month
-from collections import defaultdict
 from datetime import datetime
 from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from django.db.models import Sum, Q
-from django.db.models.functions import TruncMonth
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F, Sum, Q, Value
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
 from django.shortcuts import render
 from django.utils.timezone import now
-from reportlab.pdfgen import canvas
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework import viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from datetime import date, timedelta
+from datetime import timedelta
 from unicodedata import category
-from .serializers import TransactionSerializer, CategorySerializer, BudgetSerializer, RegisterSerializer, UserSerializer
-from .models import Transaction, Budget, Category
+from .serializers import (
+    TransactionSerializer, CategorySerializer, BudgetSerializer, RegisterSerializer, UserSerializer, ExportJobSerializer,
+    TransactionValuesSerializer, TransactionBulkUpdateSerializer, TransactionBulkDeleteSerializer,
+    RecurringRuleSerializer, BudgetAlertSerializer,
+)
+from .models import Transaction, Budget, BudgetAlert, Category, MonthlyRollup, ExportJob, RecurringRule
+from .analytics import (
+    build_statistics, build_rollup_statistics, build_time_series, rollup_total, average, Share, TransactionFilters,
+    SERIES_INTERVALS,
+)
+from .currency import check_currency, converted_amount, reporting_currency
+from .exports import ExportData, csv_lines
+from .search import search_transactions
+from .jobs import submit_export_job, export_root
+from .pdf import render_summary_pdf
+from .pagination import KeysetPagination
+from .imports import CSVStreamParser, TransactionImporter, csv_rows, json_rows
+from .bulk import update_transactions, delete_transactions
+from .cache import cache_per_user, cache_stats, conditional_per_user
+from . import metrics
 from django.contrib.auth.models import User
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
 
 
 
+class AtomicWritesMixin:
+    """Save/delete in one transaction with the rollup and budget rows the signals derive from it."""
+
+    def perform_create(self, serializer):
+        with db_transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with db_transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with db_transaction.atomic():
+            super().perform_destroy(instance)
+
+
 # Create your views here.
-class TransactionView(viewsets.ModelViewSet):
+class TransactionView(AtomicWritesMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    @conditional_per_user('transactions', bypass_params=('user',))
+    def list(self, request, *args, **kwargs):
+        # Szybka ścieżka: słowniki z .values() zamiast instancji i ModelSerializer
+        rows = self.filter_queryset(self.get_queryset()).values(*TransactionValuesSerializer.columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(TransactionValuesSerializer.to_representation(page))
+        return Response(TransactionValuesSerializer.to_representation(rows.iterator(chunk_size=2000)))
 
     def get_queryset(self):
         user_param = self.request.query_params.get('user')
@@ -35,23 +76,62 @@ class TransactionView(viewsets.ModelViewSet):
             return Transaction.objects.filter(user__username=user_param)
         return Transaction.objects.filter(user=self.request.user)
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    def get_bulk_queryset(self, data):
+        # Zawsze tylko transakcje zalogowanego użytkownika, niezależnie od ?user=
+        transactions = Transaction.objects.filter(user=self.request.user)
+        if 'ids' in data:
+            return transactions.filter(id__in=data['ids'])
+        return filter_transaction_list(transactions, data['filter'])
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        serializer = TransactionBulkUpdateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        updated = update_transactions(
+            request.user, self.get_bulk_queryset(serializer.validated_data), serializer.validated_data['patch']
+        )
+        return Response({"updated": updated})
 
-class CategoryView(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        serializer = TransactionBulkDeleteSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        deleted = delete_transactions(request.user, self.get_bulk_queryset(serializer.validated_data))
+        return Response({"deleted": deleted})
+
+class CategoryView(AtomicWritesMixin, viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Category.objects.filter(user=self.request.user)
 
-class BudgetView(viewsets.ModelViewSet):
+class BudgetView(AtomicWritesMixin, viewsets.ModelViewSet):
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Budget.objects.filter(user=self.request.user)
 
+class RecurringRuleView(viewsets.ModelViewSet):
+    serializer_class = RecurringRuleSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return RecurringRule.objects.filter(user=self.request.user)
+
+class BudgetAlertView(viewsets.ReadOnlyModelViewSet):
+    serializer_class = BudgetAlertSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        alerts = BudgetAlert.objects.filter(user=self.request.user).select_related('budget__category')
+        budget = self.request.query_params.get('budget')
+        if budget and budget.isdigit():
+            alerts = alerts.filter(budget_id=budget)
+        return alerts.order_by('-created_at', '-id')
+
 class RegisterView(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
@@ -64,130 +144,64 @@ class UserView(viewsets.ModelViewSet):
 class StatisticsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_per_user('statistics')
+    @cache_per_user('statistics')
     def get(self, request):
         user = request.user
 
-        category_name = request.query_params.get('category')
-        month_param = request.query_params.get('month')
-        type_param = request.query_params.get('type')
-        start_date_str = request.query_params.get('start_date')
-        end_date_str = request.query_params.get('end_date')
-
-        transactions = Transaction.objects.filter(user=user).select_related('category')
-
-        # Parse daty
         try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
-        except ValueError:
-            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
+            filters = TransactionFilters(request.query_params)
+            currency = reporting_currency(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
         # Filtry
-        if start_date:
-            transactions = transactions.filter(date__gte=start_date)
-        if end_date:
-            transactions = transactions.filter(date__lte=end_date)
-        if category_name:
-            transactions = transactions.filter(category__name=category_name)
-        if month_param:
-            try:
-                year, month = map(int, month_param.split('-'))
-                transactions = transactions.filter(date__year=year, date__month=month)
-            except:
-                return Response({'error': "Invalid month format. Use YYYY-MM"}, status=400)
-        if type_param in ['income', 'expense']:
-            transactions = transactions.filter(type=type_param)
-
-        # Statystyki
-        total_income = transactions.filter(type='income').aggregate(total=Sum('amount'))['total'] or 0
-        total_expense = transactions.filter(type='expense').aggregate(total=Sum('amount'))['total'] or 0
-        balance = total_income - total_expense
-
-        # Ostatnie 30 dni (również na bazie filtrowanych danych)
-        today = date.today()
-        last_30_days = today - timedelta(days=30)
-        recent_income = transactions.filter(type='income', date__gte=last_30_days).aggregate(total=Sum('amount'))['total'] or 0
-        recent_expense = transactions.filter(type='expense', date__gte=last_30_days).aggregate(total=Sum('amount'))['total'] or 0
-
-        # By category
-        category_data = defaultdict(lambda: {'income': 0, 'expense': 0, 'icon': ''})
-        for transaction in transactions:
-            if transaction.category:
-                category_data[transaction.category.name]['icon'] = transaction.category.icon
-                category_data[transaction.category.name][transaction.type] += transaction.amount
-
-        # Monthly
-        monthly_data = defaultdict(lambda: {'income': 0, 'expense': 0})
-        monthly_transactions = transactions.annotate(month=TruncMonth('date'))
-        for transaction in monthly_transactions:
-            key = transaction.date.strftime('%Y-%m')
-            monthly_data[key][transaction.type] += transaction.amount
-
-        # Most expense category
-        most_expense_category = transactions.filter(type='expense').values('category__name').annotate(total=Sum('amount')).order_by('-total')[:1]
-        most_expense_category = most_expense_category[0]['category__name'] if most_expense_category else None
-        most_expense_category_amount = transactions.filter(type='expense', category__name=most_expense_category).aggregate(total=Sum('amount'))['total'] or 0
-        most_expense_category_icon = Category.objects.filter(name=most_expense_category).first().icon if most_expense_category else None
+        transactions = filters.apply(Transaction.objects.filter(user=user))
+        rollups = filters.apply_to_rollups(MonthlyRollup.objects.filter(user=user))
 
-        return Response({
-            "balance": balance,
-            "last_30_days": {
-                "income": recent_income,
-                "expense": recent_expense
-            },
-            "by_category": category_data,
-            "most_expense_category": {
-                "name": most_expense_category,
-                "amount": most_expense_category_amount,
-                "icon": most_expense_category_icon
-            },
-            "monthly": monthly_data
-        })
+        # Filtry dzienne wymagają surowych transakcji, pozostałe czytamy z rollupu
+        if filters.has_dates:
+            return Response(build_statistics(transactions, currency=currency))
+        return Response(build_rollup_statistics(rollups, transactions, currency=currency))
 
 
-class ExportCSVView(APIView):
+class TimeSeriesView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_per_user('time-series')
+    @cache_per_user('time-series')
     def get(self, request):
-        user = request.user
-        transactions = Transaction.objects.filter(user=user).select_related('category')
+        interval = request.query_params.get('interval', 'month')
+        if interval not in SERIES_INTERVALS:
+            return Response({"error": "Invalid interval. Use day, week, month or year."}, status=400)
+        fill = request.query_params.get('fill') == 'true'
 
-        # Obliczanie podsumowania
-        total_income = transactions.filter(type='income').aggregate(total=Sum('amount'))['total'] or 0
-        total_expense = transactions.filter(type='expense').aggregate(total=Sum('amount'))['total'] or 0
-        balance = total_income - total_expense
+        try:
+            filters = TransactionFilters(request.query_params)
+            data = build_time_series(request.user, filters, interval, fill=fill,
+                                     currency=reporting_currency(request.query_params))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(data)
 
-        # Obliczanie wydatków na kategorie
-        category_expenses = transactions.filter(type='expense').values('category__name').annotate(total=Sum('amount'))
 
-        response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-        response['Content-Disposition'] = f'attachment; filename="finly_summary_{now().date()}.csv"'
+class ExportCSVView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        writer = csv.writer(response, delimiter=';')
-
-        # Dodanie podsumowania
-        writer.writerow(['Podsumowanie'])
-        writer.writerow(['Przychody', f"{total_income:.2f}"])
-        writer.writerow(['Wydatki', f"{total_expense:.2f}"])
-        writer.writerow(['Bilans', f"{balance:.2f}"])
-        writer.writerow([])
-
-        # Dodanie wydatków na kategorie
-        writer.writerow(['Wydatki na kategorie'])
-        for category in category_expenses:
-            writer.writerow([category['category__name'], f"{category['total']:.2f}"])
-        writer.writerow([])
-
-        # Dodanie nagłówków i transakcji
-        writer.writerow(['Data', 'Typ', 'Kategoria', 'Kwota', 'Opis'])
-        for t in transactions:
-            writer.writerow([
-                t.date,
-                t.type,
-                t.category.name if t.category else '',
-                f"{t.amount:.2f}",
-                t.description or ''
-            ])
+    def get(self, request):
+        # Te same filtry co w StatisticsView
+        try:
+            data = ExportData(request.user, TransactionFilters(request.query_params),
+                              reporting_currency(request.query_params))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # Wiersze transakcji są strumieniowane, bez ładowania całej historii do pamięci
+        response = StreamingHttpResponse(
+            csv_lines(data),
+            content_type='text/csv; charset=utf-8-sig'
+        )
+        response['Content-Disposition'] = f'attachment; filename="finly_summary_{now().date()}.csv"'
 
         return response
 
@@ -195,199 +209,349 @@ class ExportPDFView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        transactions = Transaction.objects.filter(user=user).select_related('category')
-
-        # Obliczanie podsumowania
-        total_income = transactions.filter(type='income').aggregate(total=Sum('amount'))['total'] or 0
-        total_expense = transactions.filter(type='expense').aggregate(total=Sum('amount'))['total'] or 0
-        balance = total_income - total_expense
-
-        # Obliczanie wydatków na kategorie
-        category_expenses = transactions.filter(type='expense').values('category__name').annotate(total=Sum('amount'))
-
-        # Rejestracja czcionek obsługujących polskie znaki
-        pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
-        pdfmetrics.registerFont(TTFont('Arial-Bold', 'arialbd.ttf'))  # Pogrubiona wersja
-
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        y = height - 50
-
-        # Ustawienie czcionki
-        p.setFont("Arial-Bold", 16)
-        p.drawString(50, y, f"Finly - Podsumowanie dla {user.username}")
-        y -= 40
-
-        p.setFont("Arial", 12)
-        p.drawString(50, y, f"Przychody: {total_income:.2f} zł")
-        y -= 20
-        p.drawString(50, y, f"Wydatki: {total_expense:.2f} zł")
-        y -= 20
-        p.drawString(50, y, f"Bilans: {balance:.2f} zł")
-        y -= 40
-
-        # Dodanie wydatków na kategorie
-        p.setFont("Arial-Bold", 14)
-        p.drawString(50, y, "Wydatki na kategorie:")
-        y -= 30
-
-        p.setFont("Arial", 12)
-        for category in category_expenses:
-            p.drawString(50, y, f"{category['category__name']}: {category['total']:.2f} zł")
-            y -= 20
-            if y < 50:
-                p.showPage()
-                y = height - 50
-
-        # Dodanie historii transakcji
-        p.setFont("Arial-Bold", 14)
-        p.drawString(50, y, "Historia transakcji:")
-        y -= 30
-
-        p.setFont("Arial", 12)
-        for t in transactions:
-            line = f"{t.date} | {t.amount} zł | {t.type} | {t.category.name if t.category else ''} | {t.description}"
-            if y < 50:
-                p.showPage()
-                y = height - 50
-            p.drawString(50, y, line)
-            y -= 20
-
-        p.showPage()
-        p.save()
+        try:
+            data = ExportData(request.user, TransactionFilters(request.query_params),
+                              reporting_currency(request.query_params))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        buffer = render_summary_pdf(data, BytesIO())
 
         buffer.seek(0)
         return HttpResponse(buffer, content_type='application/pdf', headers={
             'Content-Disposition': f'attachment; filename="finly_summary_{now().date()}.pdf"'
         })
 
-class TransactionListView(APIView):
-    def get(self, request):
-        user = request.user
-        type_param = request.query_params.get('type')
-        category_param = request.query_params.get('category')
-        start_date_str = request.query_params.get('start_date')
-        end_date_str = request.query_params.get('end_date')
-        order_by = request.query_params.get('order_by')
-
-
-        transactions = Transaction.objects.filter(user=user).select_related('category')
-
-        if type_param in ['income', 'expense']:
-            transactions = transactions.filter(type=type_param)
-
-        if category_param:
-            try:
-                category_id = int(category_param)
-                transactions = transactions.filter(category__id=category_id)
-            except ValueError:
-                transactions = transactions.filter(category__name=category_param)
+class ExportJobView(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                    viewsets.GenericViewSet):
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
 
-        if start_date_str:
-            transactions = transactions.filter(date__gte=start_date_str)
-        if end_date_str:
-            transactions = transactions.filter(date__lte=end_date_str)
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user)
 
+    def create(self, request, *args, **kwargs):
+        # Te same filtry i waluta co w /export-pdf/, zapisane dla workera
+        try:
+            filters = TransactionFilters(request.query_params)
+            currency = reporting_currency(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        job = ExportJob.objects.create(user=request.user, filters=filters.params, currency=currency)
+        submit_export_job(job)
+        return Response(self.get_serializer(job).data, status=202)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status == 'expired':
+            return Response({"error": "Export file has expired, create a new export."}, status=410)
+        if job.status != 'done':
+            return Response({"error": f"Export is not ready (status: {job.status})."}, status=409)
+        try:
+            file = open(export_root() / job.file_name, 'rb')
+        except FileNotFoundError:
+            return Response({"error": "Export file is no longer available, create a new export."}, status=410)
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f"finly_summary_{job.created_at.date()}.pdf",
+            content_type='application/pdf'
+        )
 
-        if order_by == 'highest':
-            transactions = transactions.order_by('-amount')
-        elif order_by == 'lowest':
-            transactions = transactions.order_by('amount')
+class TransactionImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, CSVStreamParser, MultiPartParser]
+
+    def post(self, request):
+        data = request.data
+        if isinstance(data, list):
+            rows = json_rows(data)
+        elif hasattr(data, 'get') and data.get('file') is not None:
+            rows = csv_rows(data['file'])
+        elif hasattr(data, 'readline'):
+            rows = csv_rows(data)
         else:
-            transactions = transactions.order_by("-date")
+            return Response({"error": "Send a JSON array, a text/csv body or a 'file' upload."}, status=400)
 
+        try:
+            result = TransactionImporter(request.user).run(rows)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            return Response({"error": f"Invalid CSV file: {exc}"}, status=400)
 
-        serialized = TransactionSerializer(transactions, many=True)
-        return Response(serialized.data)
+        if result.created:
+            status = 201
+        else:
+            status = 400 if result.error_count else 200
+        return Response({
+            "created": result.created,
+            "error_count": result.error_count,
+            "errors": result.errors
+        }, status=status)
+
+def filter_transaction_list(transactions, params):
+    """type/category/start_date/end_date filters of TransactionListView, also used by the bulk actions."""
+    type_param = params.get('type')
+    category_param = params.get('category')
+    start_date_str = params.get('start_date')
+    end_date_str = params.get('end_date')
+
+    if type_param in ['income', 'expense']:
+        transactions = transactions.filter(type=type_param)
+
+    if category_param:
+        try:
+            category_id = int(category_param)
+            transactions = transactions.filter(category__id=category_id)
+        except ValueError:
+            transactions = transactions.filter(category__name=category_param)
 
+    if start_date_str:
+        transactions = transactions.filter(date__gte=start_date_str)
+    if end_date_str:
+        transactions = transactions.filter(date__lte=end_date_str)
+    return transactions
 
-class CategoryListView(APIView):
-    permission_classes = [IsAuthenticated]
 
+class TransactionListView(APIView):
+    @conditional_per_user('transaction-list')
     def get(self, request):
         user = request.user
+        order_by = request.query_params.get('order_by')
 
-        order_by = request.query_params.get('order_by', 'total_expense')
-        order_direction = request.query_params.get('direction', 'desc')
-
-        category_stats = (
-            Transaction.objects.filter(user=user)
-            .values('category__name', 'category__icon')
-            .annotate(
-                total_expense=Sum('amount', filter=Q(type='expense')),
-                total_income=Sum('amount', filter=Q(type='income')),
-            )
-        )
+        search = request.query_params.get('search', '').strip()
 
-        for stat in category_stats:
-            stat['total_expense'] = stat.get('total_expense', 0) or 0
-            stat['total_income'] = stat.get('total_income', 0) or 0
+        transactions = filter_transaction_list(Transaction.objects.filter(user=user), request.query_params)
+        columns = TransactionValuesSerializer.columns
+        if search:
+            try:
+                transactions = search_transactions(transactions, search)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+            # rank potrzebny w kursorze paginacji
+            columns = [*columns, 'rank']
 
-        if order_direction == 'desc':
-            order_by = f"-{order_by}"
+        if order_by == 'highest':
+            transactions = transactions.order_by('-amount', '-id')
+        elif order_by == 'lowest':
+            transactions = transactions.order_by('amount', 'id')
+        elif search and order_by != 'date':
+            # Wyniki wyszukiwania domyślnie od najtrafniejszych
+            transactions = transactions.order_by('-rank', '-date', '-created_at', '-id')
+        else:
+            transactions = transactions.order_by('-date', '-created_at', '-id')
+
+        rows = transactions.values(*columns)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(TransactionValuesSerializer.to_representation(page))
+
+        return Response(TransactionValuesSerializer.to_representation(rows.iterator(chunk_size=2000)))
+
+
+CATEGORY_EXTRAS = {
+    'count': ('transaction_count',),
+    'average': ('average_expense', 'average_income'),
+    'share': ('expense_share', 'income_share'),
+}
+CATEGORY_ORDER_FIELDS = {
+    'name': 'category__name',
+    'total_expense': 'total_expense',
+    'total_income': 'total_income',
+    **{field: field for fields in CATEGORY_EXTRAS.values() for field in fields},
+}
+
+
+class CategoryListParams:
+    """?order_by=, ?direction=, ?limit=, ?offset= and ?include= of CategoryListView.
+
+    Raises ValueError with the message the views return as {"error": ...}.
+    """
+
+    def __init__(self, params):
+        self.order_by = params.get('order_by', 'total_expense')
+        if self.order_by not in CATEGORY_ORDER_FIELDS:
+            raise ValueError(f"Invalid sorting field: {self.order_by}. Use one of: {', '.join(CATEGORY_ORDER_FIELDS)}.")
+        self.descending = params.get('direction', 'desc') == 'desc'
+        self.limit = self._non_negative(params, 'limit')
+        self.offset = self._non_negative(params, 'offset') or 0
+        self.include = [name for name in params.get('include', '').split(',') if name]
+        for name in self.include:
+            if name not in CATEGORY_EXTRAS:
+                raise ValueError(f"Invalid include value: {name}. Use one of: {', '.join(CATEGORY_EXTRAS)}.")
+
+    @staticmethod
+    def _non_negative(params, name):
+        if not params.get(name):
+            return None
         try:
-            category_stats = sorted(category_stats, key=lambda x: x.get(order_by.lstrip('-'), 0),
-                                    reverse=order_by.startswith('-'))
-        except KeyError:
-            return Response({"error": f"Invalid sorting field: {order_by}"}, status=400)
+            value = int(params[name])
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise ValueError(f"{name} must be a non-negative integer.")
+        return value
+
+    @property
+    def extra_fields(self):
+        return [field for name in self.include for field in CATEGORY_EXTRAS[name]]
+
+
+def category_totals(user, currency=None, params=None):
+    """Per category id totals in `currency`, ordered and sliced in SQL according to `params`.
+
+    The optional count, averages and shares are computed in the same query;
+    shares use SUM() OVER () so the percentages refer to all categories even
+    when only a page of them is returned.
+    """
+    params = params or CategoryListParams({})
+    total = rollup_total(currency or settings.BASE_CURRENCY)
+    rows = (
+        MonthlyRollup.objects.filter(user=user)
+        .values('category_id', 'category__name', 'category__icon')
+        .annotate(
+            total_expense=Sum(total, filter=Q(type='expense')),
+            total_income=Sum(total, filter=Q(type='income')),
+        )
+    )
+    extra = set(params.extra_fields) | {params.order_by}
+    if 'transaction_count' in extra:
+        rows = rows.annotate(transaction_count=Sum('count'))
+    if extra & {'average_expense', 'average_income'}:
+        rows = rows.annotate(
+            average_expense=average(F('total_expense'), Sum('count', filter=Q(type='expense'))),
+            average_income=average(F('total_income'), Sum('count', filter=Q(type='income'))),
+        )
+    if extra & {'expense_share', 'income_share'}:
+        rows = rows.annotate(expense_share=Share(F('total_expense')), income_share=Share(F('total_income')))
+
+    # Puste sumy (NULL) odpowiadają zeru, więc zawsze lądują na końcu przy sortowaniu malejącym
+    field = F(CATEGORY_ORDER_FIELDS[params.order_by])
+    ordering = field.desc(nulls_last=True) if params.descending else field.asc(nulls_first=True)
+    rows = rows.order_by(ordering, 'category_id')
+    if params.limit is not None:
+        return rows[params.offset:params.offset + params.limit]
+    return rows[params.offset:]
+
+
+def category_list_payload(category_stats, params=None):
+    """Serialize category_totals() rows with the ?include= fields of `params`."""
+    extra_fields = params.extra_fields if params else []
+    return [
+        {
+            "category_id": stat['category_id'],
+            "category": stat['category__name'],
+            "icon": stat['category__icon'],
+            "total_expense": stat['total_expense'] or 0,
+            "total_income": stat['total_income'] or 0,
+            **{field: stat[field] or 0 for field in extra_fields},
+        }
+        for stat in category_stats
+    ]
 
-        serialized_data = [
-            {
-                "category": stat['category__name'],
-                "icon": stat['category__icon'],
-                "total_expense": stat['total_expense'],
-                "total_income": stat['total_income']
-            }
-            for stat in category_stats
-        ]
 
-        return Response(serialized_data)
+class CategoryListView(APIView):
+    permission_classes = [IsAuthenticated]
 
+    @conditional_per_user('category-list')
+    @cache_per_user('category-list')
+    def get(self, request):
+        try:
+            params = CategoryListParams(request.query_params)
+            rows = category_totals(request.user, reporting_currency(request.query_params), params)
+            return Response(category_list_payload(rows, params))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+
+def filter_budgets(budgets, params):
+    """?month=, ?from= and ?to= (YYYY-MM) of BudgetSummaryView; raises ValueError on a bad month."""
+    month_param = params.get('month')
+    from_param = params.get('from')
+    to_param = params.get('to')
+
+    # Filtry okresu, np. tylko bieżący miesiąc
+    if month_param:
+        year, month = map(int, month_param.split('-'))
+        budgets = budgets.filter(month__year=year, month__month=month)
+    if from_param:
+        budgets = budgets.filter(month__gte=datetime.strptime(from_param, '%Y-%m').date())
+    if to_param:
+        to_month = datetime.strptime(to_param, '%Y-%m').date()
+        budgets = budgets.filter(month__lt=(to_month + timedelta(days=31)).replace(day=1))
+    return budgets
+
+
+def budgets_in_currency(budgets, currency=None):
+    """Annotate reported_amount/reported_spent/reported_currency for budget_summary_item.
+
+    Without a currency every budget keeps its own; otherwise both amounts are
+    converted in the query at the rates of the budget's first day.
+    """
+    if currency is None:
+        return budgets.annotate(
+            reported_amount=F('amount'), reported_spent=F('spent'), reported_currency=F('currency'),
+        )
+    return budgets.annotate(
+        reported_amount=converted_amount(currency, amount='amount', day='month'),
+        reported_spent=converted_amount(currency, amount='spent', day='month'),
+        reported_currency=Value(currency),
+    )
+
+
+def budget_summary_item(budget):
+    amount = budget.reported_amount
+    spent = budget.reported_spent
+    return {
+        "id": budget.id,
+        "category": budget.category.name if budget.category else "Brak kategorii",
+        "icon": budget.category.icon if budget.category else "",
+        "month": budget.month.strftime('%Y-%m'),
+        "currency": budget.reported_currency,
+        "budgeted": float(amount),
+        "spent": float(spent),
+        "remaining": float(amount - spent),
+        "over_budget": spent > amount
+    }
 
 
 class BudgetSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cache_per_user('budget-summary')
     def get(self, request):
-        user = request.user
-        budgets = Budget.objects.filter(user=user)
-
-        summary = []
-        for budget in budgets:
-            start_date = budget.month
-            end_month = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-            end_date = end_month - timedelta(days=1)
-
-            spent = Transaction.objects.filter(
-                user=user,
-                type='expense',
-                category=budget.category,
-                date__range=(start_date, end_date)
-            ).aggregate(total=Sum('amount'))['total'] or 0
-
-            summary.append({
-                "id": budget.id,
-                "category": budget.category.name if budget.category else "Brak kategorii",
-                "icon": budget.category.icon if budget.category else "",
-                "month": budget.month.strftime('%Y-%m'),
-                "budgeted": float(budget.amount),
-                "spent": float(spent),
-                "remaining": float(budget.amount - spent),
-                "over_budget": spent > budget.amount
-            })
-
-        return Response(summary)
-
-
-
-
+        budgets = Budget.objects.filter(user=request.user).select_related('category')
+        try:
+            budgets = filter_budgets(budgets, request.query_params)
+        except ValueError:
+            return Response({'error': "Invalid month format. Use YYYY-MM"}, status=400)
+        # Bez ?currency= każdy budżet w swojej walucie
+        currency = request.query_params.get('currency')
+        try:
+            budgets = budgets_in_currency(budgets, check_currency(currency) if currency else None)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
+        return Response([budget_summary_item(budget) for budget in budgets])
 
 
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
 
+    def get(self, request):
+        return Response(cache_stats())
 
 
+class RequestMetricsView(APIView):
+    permission_classes = [IsAdminUser]
 
+    def get(self, request):
+        return Response({
+            'enabled': settings.REQUEST_METRICS,
+            'window': settings.REQUEST_METRICS_WINDOW,
+            'views': metrics.summary(),
+        })
 
+    def delete(self, request):
+        metrics.reset()
+        return Response(status=204)